@@ -0,0 +1,71 @@
+"""
+Microbenchmark contact building.
+
+Compares the previous reduce-based builder, which copied the accumulated list for every contact, with the
+linear builder in scrapr.model.contact. Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/bench_contact.py
+"""
+
+import time
+import tracemalloc
+from functools import reduce
+from typing import Callable, Dict, List
+
+from scrapr.model.contact import create_contact_from, create_contacts_from, iter_contact_records_from
+
+QUADRATIC_SIZES = (1_000, 5_000, 20_000)
+LINEAR_SIZES = (1_000, 10_000, 100_000)
+
+
+def _attributes(size: int) -> List[List[str]]:
+    return [[f"Dr. Consultant {i}", "Cardiology", str(1_000_000 + i), "Adults", "028 9068 7444"] for i in range(size)]
+
+
+def _reduce_builder(contacts_attributes: List[List[str]]) -> List[Dict[str, str]]:
+    def _process_contact(contacts: List[Dict[str, str]], contact_attributes: List[str]) -> List[Dict[str, str]]:
+        return contacts + [create_contact_from(contact_attributes)]
+
+    return reduce(_process_contact, contacts_attributes, [])
+
+
+def _time(builder: Callable[[List[List[str]]], object], size: int) -> float:
+    attributes = _attributes(size)
+    start = time.perf_counter()
+    builder(attributes)
+    return time.perf_counter() - start
+
+
+def _peak_bytes(builder: Callable[[List[List[str]]], object], size: int) -> int:
+    attributes = _attributes(size)
+    tracemalloc.start()
+    result = builder(attributes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def _report(name: str, builder: Callable[[List[List[str]]], object], sizes: tuple) -> None:
+    print(name)
+    previous = None
+    for size in sizes:
+        elapsed = _time(builder, size)
+        growth = f"x{elapsed / previous[1]:.1f} for x{size / previous[0]:.0f} rows" if previous else ""
+        print(f"  {size:>7} rows: {elapsed * 1000:9.1f} ms  {growth}")
+        previous = (size, elapsed)
+
+
+def main() -> None:
+    _report("reduce builder (before)", _reduce_builder, QUADRATIC_SIZES)
+    _report("create_contacts_from (dicts)", create_contacts_from, LINEAR_SIZES)
+    _report("iter_contact_records_from (records)", lambda rows: list(iter_contact_records_from(rows)), LINEAR_SIZES)
+
+    size = LINEAR_SIZES[-1]
+    dict_peak = _peak_bytes(create_contacts_from, size)
+    record_peak = _peak_bytes(lambda rows: list(iter_contact_records_from(rows)), size)
+    print(f"peak memory for {size} contacts: dicts {dict_peak / 2**20:.1f} MiB, records {record_peak / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
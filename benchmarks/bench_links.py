@@ -0,0 +1,27 @@
+"""
+Microbenchmark link extraction backends on a real consultant page.
+
+    PYTHONPATH=src python benchmarks/bench_links.py
+"""
+
+import pathlib
+import time
+
+from scrapr.action.links import LINK_EXTRACTORS
+
+PAGE = pathlib.Path(__file__).parent.parent / "tests" / "resources" / "contact.html"
+ROUNDS = 200
+
+
+def main() -> None:
+    html = PAGE.read_text(encoding="utf-8")
+    for name, extract_links in LINK_EXTRACTORS.items():
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            links = extract_links(html, "https://ulsterindependentclinic.com/consultant/4188537/")
+        elapsed = (time.perf_counter() - start) / ROUNDS
+        print(f"{name:>5}: {elapsed * 1000:6.2f} ms/page, {len(links)} links")
+
+
+if __name__ == "__main__":
+    main()
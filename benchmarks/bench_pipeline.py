@@ -0,0 +1,134 @@
+"""
+Benchmark crawling, extraction, contact building and writing against a local fake scraper API.
+
+Nothing leaves the machine and no credits are spent. Run from the repository root:
+
+    PYTHONPATH=src python benchmarks/bench_pipeline.py
+    PYTHONPATH=src python benchmarks/bench_pipeline.py --sizes 10x500 --latency 0.05 --error-rate 0.02 --json out.json
+
+Sizes are given as <listing pages>x<consultants>.
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+import warnings
+from typing import Any, Callable, Dict, List, Tuple
+
+from fake_api import API_KEY, FakeScraperApi
+
+from scrapr.action.parse import Parser
+from scrapr.action.persist import CsvWriter, JsonLinesWriter, Writer
+from scrapr.action.scrape import API_RENDER, Scraper, ScraperServiceCreditsExhaustedException
+from scrapr.action.store import SqliteContactStore
+from scrapr.model import contact
+from scrapr.sites import uic
+
+DEFAULT_SIZES = "2x20,5x100,10x500"
+WRITERS: Dict[str, Callable[[], Writer]] = {
+    "csv": CsvWriter,
+    "jsonl": JsonLinesWriter,
+    "sqlite": SqliteContactStore,
+}
+
+
+def _timed(function: Callable[[], Any]) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def _parse_size(size: str) -> Tuple[int, int]:
+    listing_pages, consultants = size.lower().split("x")
+    return int(listing_pages), int(consultants)
+
+
+def _bench_size(listing_pages: int, consultants: int, args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"listing_pages": listing_pages, "consultants": consultants}
+    with FakeScraperApi(
+        listing_pages,
+        consultants,
+        latency=args.latency,
+        render_latency=args.render_latency,
+        error_rate=args.error_rate,
+        credits=args.credits,
+    ) as api:
+        site = api.site
+        with Scraper(
+            api.api_url,
+            API_KEY,
+            tiers=(API_RENDER,),
+            max_in_flight=args.concurrency,
+            backoff_factor=0,
+            rules=uic.create_crawl_rules(site.start_url, site.consultant_prefix),
+        ) as scraper:
+            pages: List[Tuple[str, str]] = []
+            started = time.perf_counter()
+            try:
+                pages.extend(scraper.iter_pages_from_targets(site.listing_urls(), site.consultant_prefix))
+            except ScraperServiceCreditsExhaustedException:
+                results["credits_exhausted"] = True
+            elapsed = time.perf_counter() - started
+        results["crawl"] = {"seconds": elapsed, "pages": len(pages), "pages_per_second": len(pages) / elapsed}
+        results["api_requests"] = dict(api.requests)
+
+        parser = Parser(site.consultant_url(0), site.contact(0))
+        for workers in sorted({1, args.workers}):
+            parser.workers = workers
+            elapsed, extracted = _timed(lambda: parser.get_results_from_html(pages))
+            results[f"extract_{workers}_workers"] = {"seconds": elapsed, "pages_per_second": len(pages) / elapsed}
+        parser.close()
+
+    elapsed, contacts = _timed(lambda: list(contact.iter_contact_records_from(extracted)))
+    results["contacts"] = {"seconds": elapsed, "contacts": len(contacts)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, create_writer in WRITERS.items():
+            writer = create_writer()
+            elapsed, _ = _timed(lambda: writer(contact.to_rows(contacts), f"{directory}/contacts.{name}"))
+            results[f"write_{name}"] = {"seconds": elapsed, "rows_per_second": len(contacts) / elapsed}
+    return results
+
+
+def _print(results: Dict[str, Any]) -> None:
+    print(f"{results['listing_pages']} listing pages, {results['consultants']} consultants")
+    for stage, values in results.items():
+        if isinstance(values, dict) and "seconds" in values:
+            rates = ", ".join(f"{key} {value:,.1f}" for key, value in values.items() if key.endswith("_second"))
+            print(f"  {stage:>20}: {values['seconds'] * 1000:9.1f} ms  {rates}")
+    print(f"  {'api requests':>20}: {results['api_requests']}")
+    if results.get("credits_exhausted"):
+        print(f"  {'':>20}  the fake API ran out of credits; later stages ran on the pages fetched before that")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated <listing pages>x<consultants>.")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake API waits per request.")
+    arg_parser.add_argument("--render-latency", type=float, help="Seconds per rendered request; defaults to --latency.")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests failing with 500.")
+    arg_parser.add_argument("--credits", type=int, help="Credits in the fake account; 403 once they run out.")
+    arg_parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight while crawling.")
+    arg_parser.add_argument("--workers", type=int, default=2, help="Extraction processes to compare with one.")
+    arg_parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # autoscraper passes options to lxml that it has deprecated.
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    all_results: List[Dict[str, Any]] = []
+    for size in args.sizes.split(","):
+        results = _bench_size(*_parse_size(size), args)
+        _print(results)
+        all_results.append(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump(all_results, json_file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
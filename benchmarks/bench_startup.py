@@ -0,0 +1,66 @@
+"""
+Measure CLI cold start with -X importtime.
+
+    PYTHONPATH=src python benchmarks/bench_startup.py
+"""
+
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+SRC = pathlib.Path(__file__).parent.parent / "src"
+ROUNDS = 5
+TOP = 8
+
+QUEUE = os.path.join(tempfile.gettempdir(), "scrapr-bench-jobs.sqlite")
+
+# The bare interpreter, then commands that never scrape, then the scraping stack itself for comparison.
+SCENARIOS: Dict[str, List[str]] = {
+    "python": ["-c", "pass"],
+    "import scrapr.main": ["-c", "import scrapr.main"],
+    "scrapr --help": ["-m", "scrapr.main", "--help"],
+    "scrapr --list-sites": ["-m", "scrapr.main", "--list-sites"],
+    "worker status": ["-m", "scrapr.worker", "--queue", QUEUE, "status"],
+    "import scrapr.action.scrape": ["-c", "import scrapr.action.scrape"],
+}
+
+
+def _run(arguments: List[str]) -> Tuple[float, Dict[str, int]]:
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *arguments], env=env, capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, _top_level_imports(completed.stderr)
+
+
+def _top_level_imports(importtime: str) -> Dict[str, int]:
+    # Lines look like "import time:   self [us] | cumulative | imported package"; nesting is shown by indentation.
+    cumulative: Dict[str, int] = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, total, name = line.split("|")
+        if not name.startswith("  "):
+            cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+def main() -> None:
+    for scenario, arguments in SCENARIOS.items():
+        runs = [_run(arguments) for _ in range(ROUNDS)]
+        wall = statistics.median(elapsed for elapsed, _ in runs)
+        imports = runs[-1][1]
+        print(f"{scenario:>28}: {wall * 1000:7.1f} ms wall, {sum(imports.values()) / 1000:7.1f} ms importing")
+        for name, total in sorted(imports.items(), key=lambda item: item[1], reverse=True)[:TOP]:
+            print(f"{'':>30}{total / 1000:7.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Generate a synthetic clinic site of listing pages and consultant pages.
+
+Consultant pages reuse the real consultant page from the test resources with the contact details
+swapped out, so extraction works on markup of realistic size and shape.
+"""
+
+import html
+import pathlib
+from typing import Dict, List, Optional
+
+PAGE = pathlib.Path(__file__).parent.parent / "tests" / "resources" / "contact.html"
+SAMPLE_URL = "https://ulsterindependentclinic.com/consultant/4188537/"
+SAMPLE_CONTACT = ["Mr. Andrew Adair", "Orthopaedic", "4188537", "Adults & Children", "028 9068 7444"]
+SPECIALISMS = ["Cardiology", "Dermatology", "ENT", "Neurology", "Orthopaedic", "Urology"]
+PAGE_KEY = "?page_2826c="
+
+
+class ClinicSite:
+    def __init__(self, base_url: str, listing_pages: int, consultants: int):
+        if listing_pages < 1 or consultants < listing_pages:
+            raise ValueError("need at least one listing page and one consultant per listing page")
+        self.base_url = base_url.rstrip("/")
+        self.listing_pages = listing_pages
+        self.consultants = consultants
+        self._template = PAGE.read_text(encoding="utf-8").replace(
+            "https://ulsterindependentclinic.com/consultant/", f"{self.consultant_prefix}"
+        )
+
+    @property
+    def start_url(self) -> str:
+        return f"{self.base_url}/consultants/"
+
+    @property
+    def consultant_prefix(self) -> str:
+        return f"{self.base_url}/consultant/"
+
+    def listing_url(self, page: int) -> str:
+        return f"{self.start_url}{PAGE_KEY}{page}"
+
+    def consultant_url(self, index: int) -> str:
+        return f"{self.consultant_prefix}{self.gmc_number(index)}/"
+
+    def listing_urls(self) -> List[str]:
+        return [self.listing_url(page) for page in range(1, self.listing_pages + 1)]
+
+    def consultant_urls(self) -> List[str]:
+        return [self.consultant_url(index) for index in range(self.consultants)]
+
+    @staticmethod
+    def gmc_number(index: int) -> str:
+        return str(5_000_000 + index)
+
+    def contact(self, index: int) -> List[str]:
+        return [
+            f"Dr. Consultant {index}",
+            SPECIALISMS[index % len(SPECIALISMS)],
+            self.gmc_number(index),
+            "Adults" if index % 2 else "Adults & Children",
+            f"028 9000 {index % 10_000:04d}",
+        ]
+
+    def page(self, path_and_query: str) -> Optional[str]:
+        url = f"{self.base_url}{path_and_query}"
+        if url.startswith(f"{self.start_url}{PAGE_KEY}"):
+            number = url.rsplit("=", 1)[1]
+            if number.isdigit() and 1 <= int(number) <= self.listing_pages:
+                return self._listing(int(number))
+            return self._listing(None)
+        if url.startswith(self.consultant_prefix):
+            number = url[len(self.consultant_prefix) :].strip("/")
+            index = int(number) - 5_000_000 if number.isdigit() else -1
+            if 0 <= index < self.consultants:
+                return self._consultant(index)
+        return None
+
+    def _listing(self, page: Optional[int]) -> str:
+        # Consultants are spread evenly over the listing pages; pages past the end list nobody.
+        links: List[str] = []
+        if page is not None:
+            per_page = -(-self.consultants // self.listing_pages)
+            first = (page - 1) * per_page
+            links = [
+                f'<li><a href="{self.consultant_url(index)}">{html.escape(self.contact(index)[0])}</a></li>'
+                for index in range(first, min(first + per_page, self.consultants))
+            ]
+        pager = "".join(
+            f'<a href="{html.escape(self.listing_url(number))}">{number}</a>'
+            for number in range(1, self.listing_pages + 1)
+        )
+        return f"<html><body><ul>{''.join(links)}</ul><nav>{pager}</nav></body></html>"
+
+    def _consultant(self, index: int) -> str:
+        page = self._template
+        replacements: Dict[str, str] = dict(zip(SAMPLE_CONTACT, self.contact(index)))
+        replacements["Andrew Adair"] = self.contact(index)[0]
+        for sample in sorted(replacements, key=len, reverse=True):
+            page = page.replace(html.escape(sample, quote=False), html.escape(replacements[sample], quote=False))
+            page = page.replace(sample, replacements[sample])
+        return page
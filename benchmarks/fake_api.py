@@ -0,0 +1,124 @@
+"""
+Serve a local stand-in for the scraper API in front of a synthetic clinic site.
+
+The server answers '/api?api_key=...&url=...&render=...' like the real service, and serves the
+site itself under '/site/' so the direct fetch tier and parser training work offline too.
+"""
+
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from clinic_site import ClinicSite
+
+API_KEY = "bench-key"
+
+
+class FakeScraperApi:
+    def __init__(
+        self,
+        listing_pages: int,
+        consultants: int,
+        latency: float = 0.0,
+        render_latency: Optional[float] = None,
+        error_rate: float = 0.0,
+        credits: Optional[int] = None,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.render_latency = latency if render_latency is None else render_latency
+        self.error_rate = error_rate
+        self.credits = credits
+        self.requests: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.site = ClinicSite(f"{self.url}/site", listing_pages, consultants)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-scraper-api", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/api"
+
+    def __enter__(self) -> "FakeScraperApi":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def _charge(self, cost: int) -> bool:
+        with self._lock:
+            if self.credits is None:
+                return True
+            if self.credits < cost:
+                return False
+            self.credits -= cost
+            return True
+
+    def _fails(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _respond_to_api(self, query: Dict[str, list]) -> Tuple[int, str]:
+        if query.get("api_key", [""])[0] != API_KEY:
+            return 401, "Invalid API key."
+        target = query.get("url", [""])[0]
+        render = query.get("render", ["false"])[0] == "true"
+        self._count("api_render" if render else "api")
+        time.sleep(self.render_latency if render else self.latency)
+        if not self._charge(10 if render else 1):
+            return 403, "You have exhausted the API credits quota of your plan."
+        if self._fails():
+            return 500, "Internal error, please retry."
+        if not target.startswith(self.site.base_url):
+            return 404, "Not found."
+        page = self.site.page(target[len(self.site.base_url) :])
+        return (200, page) if page is not None else (404, "Not found.")
+
+    def _respond_to_site(self, path_and_query: str) -> Tuple[int, str]:
+        self._count("direct")
+        time.sleep(self.latency)
+        page = self.site.page(path_and_query)
+        return (200, page) if page is not None else (404, "Not found.")
+
+    def _handler(self) -> type:
+        api = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                parts = urlsplit(self.path)
+                if parts.path == "/api":
+                    status, body = api._respond_to_api(parse_qs(parts.query))
+                elif parts.path.startswith("/site/"):
+                    query = f"?{parts.query}" if parts.query else ""
+                    status, body = api._respond_to_site(f"{parts.path[len('/site'):]}{query}")
+                else:
+                    status, body = 404, "Not found."
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *_: object) -> None:
+                pass
+
+        return _Handler
@@ -0,0 +1,148 @@
+"""
+Cache fetched HTML on disk.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Mapping, Optional, Pattern, Sequence, Tuple
+
+from requests.exceptions import RequestException
+
+from scrapr.action.urls import Canonicalise, canonicalise_url
+
+DAY = 24 * 60 * 60
+
+
+class CacheMissException(RequestException):
+    def __init__(self, message: str = "Page is not cached and the scraper is offline."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class HtmlCache:
+    def __init__(
+        self,
+        directory: str,
+        default_ttl: Optional[float] = DAY,
+        ttls: Sequence[Tuple[str, Optional[float]]] = (),
+        max_bytes: int = 512 * 1024 * 1024,
+        compresslevel: int = 6,
+        canonicalise: Canonicalise = canonicalise_url,
+    ):
+        self.directory = directory
+        self.default_ttl = default_ttl
+        self.ttls: List[Tuple[Pattern[str], Optional[float]]] = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self.canonicalise = canonicalise
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Entry sizes in least to most recently used order; file times are only read once, at start-up.
+        self._sizes: OrderedDict[str, int] = OrderedDict(
+            (path, os.path.getsize(path)) for path in sorted(self._entries(), key=_last_used)
+        )
+        self._total = sum(self._sizes.values())
+
+    def key_for(self, url: str, options: Mapping[str, str]) -> str:
+        material = json.dumps([self.canonicalise(url), sorted(options.items())])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, url: str) -> Optional[float]:
+        canonical_url = self.canonicalise(url)
+        for pattern, ttl in self.ttls:
+            if pattern.search(canonical_url):
+                return ttl
+        return self.default_ttl
+
+    def get(self, url: str, options: Mapping[str, str], allow_stale: bool = False) -> Optional[str]:
+        # Offline runs have nothing better than a stale copy, so they ask for one regardless of its age.
+        path = self._path_for(self.key_for(url, options))
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as cache_file:
+                metadata = json.loads(cache_file.readline())
+                ttl = self.ttl_for(url)
+                if not allow_stale and ttl is not None and time.time() - metadata['fetched_at'] > ttl:
+                    self.misses += 1
+                    return None
+                html = cache_file.read()
+            # The file time carries the recency across restarts; the in-memory order serves eviction.
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        with self._lock:
+            if path in self._sizes:
+                self._sizes.move_to_end(path)
+        self.hits += 1
+        return html
+
+    def put(self, url: str, options: Mapping[str, str], html: str) -> None:
+        path = self._path_for(self.key_for(url, options))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        metadata = {'url': url, 'options': dict(options), 'fetched_at': time.time()}
+
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as raw_file:
+                with gzip.GzipFile(fileobj=raw_file, mode='wb', compresslevel=self.compresslevel) as cache_file:
+                    cache_file.write(json.dumps(metadata).encode('utf-8') + b'\n')
+                    cache_file.write(html.encode('utf-8'))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._total += size - self._sizes.get(path, 0)
+            self._sizes[path] = size
+            self._sizes.move_to_end(path)
+            self._evict()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._total
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in list(self._sizes):
+                self._remove(path)
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and self._sizes:
+            self._remove(next(iter(self._sizes)))
+
+    def _remove(self, path: str) -> None:
+        self._total -= self._sizes.pop(path, 0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.html.gz')
+
+    def _entries(self) -> List[str]:
+        return [
+            os.path.join(root, name)
+            for root, _, names in os.walk(self.directory)
+            for name in names
+            if name.endswith('.html.gz')
+        ]
+
+
+def _last_used(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
@@ -0,0 +1,84 @@
+"""
+Checkpoint crawl progress so interrupted runs can resume.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Set, Tuple
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class CrawlCheckpoint:
+    def __init__(self, path: str, interval: float = 30.0):
+        self.path = path
+        self.interval = interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'key TEXT PRIMARY KEY, url TEXT NOT NULL, status TEXT NOT NULL, position INTEGER, updated_at REAL)'
+        )
+        self._connection.commit()
+        self._pending: Dict[str, Tuple[str, str]] = {}
+        self._position = self._next_position()
+        self._positions: Dict[str, int] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def load(self) -> Tuple[List[str], Set[str]]:
+        # Failed pages go back on the frontier, behind the pages that were never attempted.
+        rows = self._connection.execute(
+            'SELECT key, url, status FROM pages ORDER BY status = ?, position', (FAILED,)
+        ).fetchall()
+        frontier = [url for _, url, status in rows if status != DONE]
+        seen = {key for key, _, _ in rows}
+        return frontier, seen
+
+    def record(self, key: str, url: str, status: str) -> None:
+        with self._lock:
+            if key not in self._positions:
+                self._positions[key] = self._position
+                self._position += 1
+            self._pending[key] = (url, status)
+            due = time.monotonic() - self._last_flush >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            now = time.time()
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT INTO pages (key, url, status, position, updated_at) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at',
+                    [(key, url, status, self._positions.get(key), now) for key, (url, status) in pending.items()],
+                )
+
+    def statuses(self) -> Dict[str, str]:
+        self.flush()
+        return dict(self._connection.execute('SELECT url, status FROM pages').fetchall())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending = {}
+            self._positions = {}
+            self._position = 0
+            with self._connection:
+                self._connection.execute('DELETE FROM pages')
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def _next_position(self) -> int:
+        (position,) = self._connection.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM pages').fetchone()
+        return int(position)
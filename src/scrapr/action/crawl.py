@@ -0,0 +1,179 @@
+"""
+Crawl web pages concurrently.
+"""
+
+import asyncio
+import logging
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Pattern, Sequence, Set, Tuple, Type
+
+from requests.exceptions import RequestException
+
+from scrapr.action.checkpoint import DONE, FAILED, PENDING, CrawlCheckpoint
+from scrapr.action.metrics import PAGES_CRAWLED, REGISTRY
+from scrapr.action.throttle import CreditBudgetReachedException
+from scrapr.action.urls import Canonicalise, canonicalise_url
+
+logger = logging.getLogger(__name__)
+
+Fetch = Callable[[str], str]
+ExtractLinks = Callable[[str, str], Set[str]]
+OnPage = Callable[[str, str], None]
+
+# Listing pages are expanded for links but not extracted; detail pages are extracted but not expanded.
+LISTING = 'listing'
+DETAIL = 'detail'
+
+
+class CrawlRules:
+    def __init__(self, listing: Sequence[str] = (), detail: Sequence[str] = (), max_depth: Optional[int] = None):
+        if max_depth is not None and max_depth < 0:
+            raise ValueError("max_depth must not be negative")
+        self.listing: List[Pattern[str]] = [re.compile(pattern) for pattern in listing]
+        self.detail: List[Pattern[str]] = [re.compile(pattern) for pattern in detail]
+        self.max_depth = max_depth
+
+    def classify(self, url: str) -> Optional[str]:
+        if any(pattern.search(url) for pattern in self.detail):
+            return DETAIL
+        if any(pattern.search(url) for pattern in self.listing):
+            return LISTING
+        return None
+
+    def expands(self, url: str, depth: int) -> bool:
+        if self.max_depth is not None and depth >= self.max_depth:
+            return False
+        return self.classify(url) != DETAIL
+
+    def emits(self, url: str) -> bool:
+        return self.classify(url) != LISTING
+
+
+# Without rules every page is both expanded and extracted, without a depth limit.
+FOLLOW_ALL = CrawlRules()
+
+
+class CrawlEngine:
+    def __init__(
+        self,
+        fetch: Fetch,
+        extract_links: ExtractLinks,
+        max_in_flight: int = 10,
+        recoverable: Tuple[Type[BaseException], ...] = (RequestException, OSError),
+        canonicalise: Canonicalise = canonicalise_url,
+        stop_on: Tuple[Type[BaseException], ...] = (CreditBudgetReachedException,),
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        resume: bool = False,
+        rules: CrawlRules = FOLLOW_ALL,
+        defer_done: bool = False,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.fetch = fetch
+        self.extract_links = extract_links
+        self.max_in_flight = max_in_flight
+        self.recoverable = recoverable
+        self.canonicalise = canonicalise
+        self.stop_on = stop_on
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.rules = rules
+        # Emitted pages stay pending until the consumer acknowledges them, so a resumed crawl fetches them again.
+        self.defer_done = defer_done
+        self.fetches_avoided = 0
+        self.pages_failed = 0
+        self.stopped: Optional[BaseException] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def crawl(self, seeds: Iterable[str], on_page: Optional[OnPage] = None) -> Set[str]:
+        visited: Set[str] = set()
+        seen: Set[str] = set()
+        to_visit: Deque[str] = deque()
+        depths: Dict[str, int] = {}
+        in_flight: Set[asyncio.Future] = set()
+
+        def _schedule(urls: Iterable[str], depth: int = 0) -> None:
+            for url in urls:
+                key = self.canonicalise(url)
+                if key in seen:
+                    self.fetches_avoided += 1
+                    continue
+                seen.add(key)
+                to_visit.append(url)
+                depths[url] = depth
+                self._record(url, PENDING)
+
+        if self.checkpoint is not None:
+            if self.resume:
+                frontier, seen_before = self.checkpoint.load()
+                logger.info("Resuming crawl with %d pending of %d known pages.", len(frontier), len(seen_before))
+                seen.update(seen_before)
+                to_visit.extend(frontier)
+            else:
+                self.checkpoint.clear()
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='crawl')
+        _schedule(seeds)
+
+        try:
+            while (to_visit and self.stopped is None) or in_flight:
+                while to_visit and self.stopped is None and len(in_flight) < self.max_in_flight:
+                    current_url = to_visit.popleft()
+                    logger.info("Crawling: %s", current_url, extra={'url': current_url})
+                    visited.add(current_url)
+                    expand = self.rules.expands(current_url, depths.get(current_url, 0))
+                    in_flight.add(asyncio.ensure_future(self._visit(current_url, expand)))
+
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    url, html, links = future.result()
+                    emitted = False
+                    if on_page is not None and html is not None and self.rules.emits(url):
+                        on_page(url, html)
+                        emitted = True
+                    _schedule(sorted(links), depths.pop(url, 0) + 1)
+                    status = self._status_of(html)
+                    if status == FAILED:
+                        self.pages_failed += 1
+                    # A deferred page is still pending from scheduling; the consumer may already have acknowledged it.
+                    if not (emitted and self.defer_done):
+                        self._record(url, status)
+                    REGISTRY.inc(PAGES_CRAWLED, status=status)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            if self.checkpoint is not None:
+                self.checkpoint.flush()
+
+        return visited
+
+    def _record(self, url: str, status: str) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.record(self.canonicalise(url), url, status)
+
+    def _status_of(self, html: Optional[str]) -> str:
+        if html is not None:
+            return DONE
+        # Pages skipped because the crawl was stopping were never attempted.
+        return PENDING if self.stopped is not None else FAILED
+
+    async def _visit(self, url: str, expand: bool = True) -> Tuple[str, Optional[str], Set[str]]:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._fetch_links, url, expand)
+
+    def _fetch_links(self, url: str, expand: bool = True) -> Tuple[str, Optional[str], Set[str]]:
+        try:
+            html = self.fetch(url)
+            return url, html, self.extract_links(html, url) if expand else set()
+        except self.stop_on as e:
+            # Pages already in flight still finish, but nothing new is scheduled.
+            if self.stopped is None:
+                logger.warning("Stopping crawl: %s", e)
+                self.stopped = e
+            return url, None, set()
+        except self.recoverable as e:
+            logger.warning("An error occurred: %s. Continuing...", e, extra={'url': url})
+            return url, None, set()
@@ -0,0 +1,139 @@
+"""
+Queue site jobs in SQLite for a long-running worker.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL,
+    start_url TEXT,
+    pages INTEGER,
+    output TEXT,
+    status TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+'''
+
+
+class JobSpec(NamedTuple):
+    site: str
+    start_url: Optional[str] = None
+    pages: Optional[int] = None
+    output: Optional[str] = None
+
+
+class QueuedJob(NamedTuple):
+    id: int
+    spec: JobSpec
+    status: str
+    enqueued_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+
+class JobQueue:
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit, so that claiming can take the write lock itself; other processes may share the queue.
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def enqueue(self, spec: JobSpec) -> int:
+        with self._lock:
+            cursor = self._connection.execute(
+                'INSERT INTO jobs (site, start_url, pages, output, status, enqueued_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (spec.site, spec.start_url, spec.pages, spec.output, QUEUED, time.time()),
+            )
+            return cursor.lastrowid  # type: ignore[return-value]
+
+    def claim(self) -> Optional[QueuedJob]:
+        # The write lock is taken before reading, so two workers never claim the same job.
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._connection.execute(
+                    'SELECT id FROM jobs WHERE status = ? ORDER BY id LIMIT 1', (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._connection.execute(
+                        'UPDATE jobs SET status = ?, started_at = ? WHERE id = ?', (RUNNING, time.time(), row['id'])
+                    )
+                self._connection.execute('COMMIT')
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+        return None if row is None else self.get(row['id'])
+
+    def complete(self, job_id: int, result: Dict[str, Any]) -> None:
+        self._finish(job_id, DONE, result=json.dumps(result))
+
+    def fail(self, job_id: int, error: str) -> None:
+        self._finish(job_id, FAILED, error=error)
+
+    def release(self, job_id: int) -> None:
+        # A worker stopped mid-job hands it back to the queue rather than leaving it running forever.
+        with self._lock:
+            self._connection.execute(
+                'UPDATE jobs SET status = ?, started_at = NULL WHERE id = ? AND status = ?', (QUEUED, job_id, RUNNING)
+            )
+
+    def get(self, job_id: int) -> Optional[QueuedJob]:
+        with self._lock:
+            row = self._connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return None if row is None else _job_from(row)
+
+    def jobs(self, status: Optional[str] = None) -> List[QueuedJob]:
+        with self._lock:
+            if status is None:
+                rows = self._connection.execute('SELECT * FROM jobs ORDER BY id').fetchall()
+            else:
+                rows = self._connection.execute('SELECT * FROM jobs WHERE status = ? ORDER BY id', (status,)).fetchall()
+        return [_job_from(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _finish(self, job_id: int, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._connection.execute(
+                'UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?',
+                (status, time.time(), result, error, job_id),
+            )
+
+
+def _job_from(row: sqlite3.Row) -> QueuedJob:
+    return QueuedJob(
+        id=row['id'],
+        spec=JobSpec(row['site'], row['start_url'], row['pages'], row['output']),
+        status=row['status'],
+        enqueued_at=row['enqueued_at'],
+        started_at=row['started_at'],
+        finished_at=row['finished_at'],
+        result=None if row['result'] is None else json.loads(row['result']),
+        error=row['error'],
+    )
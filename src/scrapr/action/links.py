@@ -0,0 +1,73 @@
+"""
+Extract links from HTML.
+"""
+
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional
+    etree = None
+
+LinkExtractor = Callable[[str, str], List[str]]
+
+
+def extract_links_with_soup(html: str, base_url: str) -> List[str]:
+    soup = BeautifulSoup(html, 'html.parser')
+    return [urljoin(base_url, link['href']) for link in soup.find_all('a', href=True)]
+
+
+class _AnchorCollector:
+    # lxml parser target: receives tokenizer events without building a document tree.
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.links: List[str] = []
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag == 'a':
+            href = attrib.get('href')
+            if href is not None:
+                self.links.append(urljoin(self.base_url, href))
+
+    def end(self, tag: str) -> None:
+        pass
+
+    def data(self, data: str) -> None:
+        pass
+
+    def comment(self, text: str) -> None:
+        pass
+
+    def close(self) -> List[str]:
+        return self.links
+
+
+def extract_links_with_lxml(html: str, base_url: str) -> List[str]:
+    if etree is None:
+        raise ImportError("The lxml link extractor requires the lxml package")
+    if not html.strip():
+        return []
+
+    collector = _AnchorCollector(base_url)
+    parser = etree.HTMLParser(target=collector)
+    parser.feed(html)
+    parser.close()
+    return collector.links
+
+
+LINK_EXTRACTORS: Dict[str, LinkExtractor] = {
+    'lxml': extract_links_with_lxml,
+    'soup': extract_links_with_soup,
+}
+
+
+def get_link_extractor(backend: Optional[str] = None) -> LinkExtractor:
+    if backend is None:
+        backend = 'lxml' if etree is not None else 'soup'
+    try:
+        return LINK_EXTRACTORS[backend]
+    except KeyError as e:
+        raise ValueError(f"Unknown link extraction backend: {backend}") from e
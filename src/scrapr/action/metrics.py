@@ -0,0 +1,191 @@
+"""
+Collect run metrics and export them as a JSON report or Prometheus text.
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+PREFIX = 'scrapr_'
+
+# Stages overlap because the pipeline streams, so each stage reports the seconds spent inside it
+# summed over every thread, not a slice of the run's wall time.
+STAGE_SECONDS = 'stage_seconds'
+REQUEST_SECONDS = 'request_seconds'
+BYTES_DOWNLOADED = 'bytes_downloaded'
+PAGES_CRAWLED = 'pages_crawled'
+PAGES_EXTRACTED = 'pages_extracted'
+PARSE_FAILURES = 'parse_failures'
+CONTACTS_CREATED = 'contacts_created'
+CONTACT_ERRORS = 'contact_errors'
+ROWS_WRITTEN = 'rows_written'
+CACHE_HITS = 'cache_hits'
+CACHE_MISSES = 'cache_misses'
+CREDITS_SPENT = 'credits_spent'
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class Metrics:
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._started = self._clock()
+            self._counters: Dict[str, Dict[Labels, float]] = {}
+            self._gauges: Dict[str, Dict[Labels, float]] = {}
+            self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            values = self._counters.setdefault(name, {})
+            values[key] = values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            histograms = self._histograms.setdefault(name, {})
+            histograms.setdefault(key, Histogram()).observe(value)
+
+    def value(self, name: str, **labels: str) -> float:
+        key = _labels(labels)
+        with self._lock:
+            return self._counters.get(name, {}).get(key, self._gauges.get(name, {}).get(key, 0))
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        with self._lock:
+            return self._histograms.get(name, {}).get(_labels(labels))
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.inc(STAGE_SECONDS, self._clock() - started, stage=name)
+
+    def elapsed(self) -> float:
+        return self._clock() - self._started
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = self.elapsed()
+        with self._lock:
+            report: Dict[str, Any] = {'started_at': self.started_at, 'elapsed_seconds': elapsed}
+            for name, values in sorted({**self._counters, **self._gauges}.items()):
+                report[name] = _by_labels(values)
+            for name, histograms in sorted(self._histograms.items()):
+                report[name] = _by_labels(
+                    {
+                        key: {
+                            'count': histogram.count,
+                            'sum': histogram.sum,
+                            'buckets': {_format_bound(bound): count for bound, count in histogram.cumulative()},
+                        }
+                        for key, histogram in histograms.items()
+                    }
+                )
+            pages = sum(self._counters.get(PAGES_CRAWLED, {}).values())
+        report['pages_per_second'] = pages / elapsed if elapsed > 0 else 0.0
+        return report
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for kind, metrics in (('counter', self._counters), ('gauge', self._gauges)):
+                for name, values in sorted(metrics.items()):
+                    lines.append(f'# TYPE {PREFIX}{name} {kind}')
+                    lines.extend(
+                        f'{PREFIX}{name}{_format_labels(key)} {value:g}' for key, value in sorted(values.items())
+                    )
+            for name, histograms in sorted(self._histograms.items()):
+                lines.append(f'# TYPE {PREFIX}{name} histogram')
+                for key, histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative():
+                        bucket_labels = key + (('le', _format_bound(bound)),)
+                        lines.append(f'{PREFIX}{name}_bucket{_format_labels(bucket_labels)} {count}')
+                    lines.append(f'{PREFIX}{name}_sum{_format_labels(key)} {histogram.sum:g}')
+                    lines.append(f'{PREFIX}{name}_count{_format_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, filename: str) -> None:
+        _write_atomically(filename, json.dumps(self.report(), indent=4, sort_keys=True) + '\n')
+
+    def write_prometheus(self, filename: str) -> None:
+        # Written atomically so the node exporter's textfile collector never reads a partial file.
+        _write_atomically(filename, self.to_prometheus())
+
+
+REGISTRY = Metrics()
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _by_labels(values: Dict[Labels, Any]) -> Any:
+    if list(values) == [()]:
+        return values[()]
+    return {','.join(f'{key}={value}' for key, value in labels): value for labels, value in sorted(values.items())}
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if math.isinf(bound) else f'{bound:g}'
+
+
+def _write_atomically(filename: str, content: str) -> None:
+    directory = os.path.dirname(filename) or '.'
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as temp_file:
+            temp_file.write(content)
+        os.replace(temp_path, filename)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
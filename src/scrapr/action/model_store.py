@@ -0,0 +1,77 @@
+"""
+Persist trained parsers between runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from autoscraper import AutoScraper
+
+logger = logging.getLogger(__name__)
+
+
+def autoscraper_version() -> str:
+    try:
+        return version('autoscraper')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+class ModelStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key_for(sample_url: str, wanted_list: List[str]) -> str:
+        material = json.dumps([sample_url, wanted_list, autoscraper_version()])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def load(self, key: str) -> Optional[AutoScraper]:
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+
+        from autoscraper import AutoScraper
+
+        parser = AutoScraper()
+        try:
+            parser.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable parser model %s: %s", path, e)
+            return None
+        return parser
+
+    def save(self, key: str, parser: AutoScraper) -> None:
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(file_descriptor)
+        try:
+            parser.save(temp_path)
+            os.replace(temp_path, self.path_for(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def invalidate(self, key: str) -> bool:
+        try:
+            os.remove(self.path_for(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def clear(self) -> int:
+        models = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        for name in models:
+            os.remove(os.path.join(self.directory, name))
+        return len(models)
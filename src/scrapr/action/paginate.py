@@ -0,0 +1,77 @@
+"""
+Discover how many listing pages a paginated site has.
+"""
+
+import logging
+from typing import Callable, Iterable, Iterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from requests.exceptions import RequestException
+
+from scrapr.action.links import LinkExtractor
+
+logger = logging.getLogger(__name__)
+
+Fetch = Callable[[str], str]
+HasResults = Callable[[str, str], bool]
+
+DEFAULT_MAX_PAGES = 500
+
+
+def listing_url(base_url: str, query_parameter_key: str, page: int) -> str:
+    return f"{base_url}{query_parameter_key}{page}"
+
+
+def iter_listing_urls(base_url: str, query_parameter_key: str, total_pages: Optional[int] = None) -> Iterator[str]:
+    page = 1
+    while total_pages is None or page <= total_pages:
+        yield listing_url(base_url, query_parameter_key, page)
+        page += 1
+
+
+def page_numbers_in(links: Iterable[str], query_parameter_key: str) -> List[int]:
+    name = query_parameter_key.lstrip('?&').rstrip('=')
+    numbers = []
+    for link in links:
+        for value in parse_qs(urlsplit(link).query).get(name, []):
+            if value.isdigit():
+                numbers.append(int(value))
+    return numbers
+
+
+def discover_total_pages(
+    fetch: Fetch,
+    base_url: str,
+    query_parameter_key: str,
+    has_results: HasResults,
+    extract_links: LinkExtractor,
+    max_pages: int = DEFAULT_MAX_PAGES,
+) -> int:
+    # Jump to the furthest page each pager advertises, which also copes with windowed pagers.
+    # Without a pager, probe one page at a time until a page comes back without results.
+    last_page = 0
+    page = 1
+    trust_pager = True
+    while page <= max_pages:
+        url = listing_url(base_url, query_parameter_key, page)
+        try:
+            html = fetch(url)
+        except RequestException:
+            html = ''
+        if not has_results(url, html):
+            if page > last_page + 1:
+                # The pager overstated the count; check the skipped pages one by one instead.
+                page, trust_pager = last_page + 1, False
+                continue
+            break
+
+        last_page = page
+        numbers = page_numbers_in(extract_links(html, url), query_parameter_key) if trust_pager else []
+        next_page = min(max(numbers), max_pages) if numbers else page + 1
+        if next_page <= page:
+            # The pager points no further on, or the page limit has been reached.
+            break
+        page = next_page
+
+    logger.info("Discovered %d listing pages at %s.", last_page, base_url)
+    return last_page
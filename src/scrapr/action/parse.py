@@ -2,14 +2,71 @@
 Parse HTML content.
 """
 
-from typing import Any
+import multiprocessing
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 
 from autoscraper import AutoScraper
 
+from scrapr.action.metrics import PAGES_EXTRACTED, PARSE_FAILURES, REGISTRY, STAGE_SECONDS
+from scrapr.action.model_store import ModelStore
+from scrapr.action.pipeline import batched
+
+PARSE_STAGE = 'parse'
+CLASS_ATTRIBUTE = re.compile(r'''(?<![\w-])class\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+
+_worker_parser: Optional[AutoScraper] = None
+
 
 class Parser:
-    def __init__(self, url: str, wanted_list: list[str]):
-        self.parser = _create_custom_parser(url, wanted_list)
+    def __init__(
+        self,
+        url: str,
+        wanted_list: list[str],
+        store: Optional[ModelStore] = None,
+        retrain: bool = False,
+        workers: int = 1,
+        chunksize: int = 16,
+        html: Optional[str] = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.url = url
+        self.wanted_list = wanted_list
+        self.store = store
+        self.workers = workers
+        self.chunksize = chunksize
+        # Training uses this copy of the sample page when given, instead of downloading it.
+        self.html = html
+        self.key = ModelStore.key_for(url, wanted_list)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        stored = None if store is None or retrain else store.load(self.key)
+        if stored is not None:
+            self.parser = stored
+            self.anchors = _anchors(self.parser.stack_list)
+        else:
+            self.retrain()
+
+    def retrain(self) -> None:
+        self.parser = _create_custom_parser(self.url, self.wanted_list, self.html)
+        self.anchors = _anchors(self.parser.stack_list)
+        # Running workers still hold the old rules.
+        self.close()
+        # An empty rule set means training failed; never persist it.
+        if self.store is not None and self.parser.stack_list:
+            self.store.save(self.key, self.parser)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def invalidate(self) -> bool:
+        return self.store is not None and self.store.invalidate(self.key)
 
     def get_result(self, url: str) -> Any:
         return self.parser.get_result_similar(url)
@@ -17,12 +74,116 @@ class Parser:
     def get_results(self, urls: list[str]) -> list[list[str]]:
         return [self.get_result(url) for url in urls]
 
+    def get_result_from_html(self, html: str, url: Optional[str] = None) -> Any:
+        with REGISTRY.stage(PARSE_STAGE):
+            return _extract(self.parser, html, url)
+
+    def matches_layout(self, html: str) -> bool:
+        # A cheap stand-in for extraction: some element carries every class one learned rule hangs off.
+        if self.anchors is None:
+            return bool(self.get_result_from_html(html))
+        elements = {frozenset((double or single).split()) for double, single in CLASS_ATTRIBUTE.findall(html)}
+        return any(classes <= names for classes in self.anchors for names in elements)
+
+    def get_results_from_html(self, pages: Iterable[Tuple[str, str]]) -> list[list[str]]:
+        return list(self.iter_results_from_html(pages))
+
+    def iter_results_from_html(self, pages: Iterable[Tuple[str, str]]) -> Iterator[list[str]]:
+        if self.workers > 1:
+            return _counted(self._iter_results_in_parallel(pages))
+        return _counted(self.get_result_from_html(html, url) for url, html in pages)
+
+    def _iter_results_in_parallel(self, pages: Iterable[Tuple[str, str]]) -> Iterator[list[str]]:
+        # At most two chunks per worker are queued so that a slow consumer holds back the producer.
+        executor = self._pool()
+        pending: Deque[Future] = deque()
+        try:
+            for chunk in batched(pages, self.chunksize):
+                pending.append(executor.submit(_extract_chunk, chunk))
+                if len(pending) >= self.workers * 2:
+                    yield from _timed_results(pending.popleft())
+            while pending:
+                yield from _timed_results(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Spawned workers are kept for every later run of pages until close. The rules are shipped once per worker;
+        # afterwards only chunks of html cross the process boundary.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.parser.stack_list,),
+            )
+        return self._executor
+
+
+def _anchors(stack_list: List[Dict[str, Any]]) -> Optional[List[FrozenSet[str]]]:
+    # The classes of the innermost classed element of each rule, or None when some rule has none to check.
+    anchors = []
+    for stack in stack_list:
+        classes = next(
+            (names for names in (_class_names(element[1]) for element in reversed(stack['content'])) if names), None
+        )
+        if classes is None:
+            return None
+        anchors.append(classes)
+    return anchors or None
 
-def _create_custom_parser(url: str, wanted_list: list[str]) -> AutoScraper:
+
+def _class_names(attributes: Dict[str, Any]) -> FrozenSet[str]:
+    names = attributes.get('class') or []
+    return frozenset(name for name in (names.split() if isinstance(names, str) else names) if name)
+
+
+def _create_custom_parser(url: str, wanted_list: list[str], html: Optional[str] = None) -> AutoScraper:
     parser = AutoScraper()
-    _ = parser.build(url, wanted_list)
+    _ = parser.build(url, wanted_list, html=html)
     return parser
 
+
+def _extract(parser: AutoScraper, html: str, url: Optional[str] = None) -> Any:
+    # AutoScraper downloads the url itself when it is given no html.
+    if not html:
+        return []
+    return parser.get_result_similar(url=url, html=html)
+
+
+def _init_worker(stack_list: list) -> None:
+    global _worker_parser  # pylint: disable=global-statement
+    _worker_parser = AutoScraper()
+    _worker_parser.stack_list = stack_list
+
+
+def _extract_chunk(pages: List[Tuple[str, str]]) -> Tuple[float, List[Any]]:
+    # Workers cannot reach the parent's metrics, so each chunk reports its own extraction time.
+    started = time.monotonic()
+    results = [_extract(_worker_parser, html, url) for url, html in pages]
+    return time.monotonic() - started, results
+
+
+def _timed_results(future: 'Future[Tuple[float, List[Any]]]') -> List[Any]:
+    elapsed, results = future.result()
+    REGISTRY.inc(STAGE_SECONDS, elapsed, stage=PARSE_STAGE)
+    return results
+
+
+def _counted(results: Iterable[Any]) -> Iterator[Any]:
+    # An empty result means the learned rules found nothing on the page.
+    extracted = failures = 0
+    try:
+        for result in results:
+            extracted += 1
+            failures += not result
+            yield result
+    finally:
+        REGISTRY.inc(PAGES_EXTRACTED, extracted)
+        REGISTRY.inc(PARSE_FAILURES, failures)
+
+
 # """
 # Parse HTML content.
 # """
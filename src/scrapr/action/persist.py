@@ -1,27 +1,184 @@
 import json
 import csv
-from typing import List, Dict
+import logging
+import os
+import shutil
+import textwrap
+from abc import ABC, abstractmethod
+from itertools import chain
+from typing import Callable, Iterable, Dict, List, Optional, TextIO
 
+from scrapr.action.metrics import REGISTRY, ROWS_WRITTEN
+from scrapr.action.pipeline import batched
 
-def write_to_json(data: List[Dict[str, str]], filename: str) -> None:
+logger = logging.getLogger(__name__)
+
+FLUSH_EVERY = 100
+WRITE_STAGE = 'write'
+
+
+def write_to_json(data: Iterable[Dict[str, str]], filename: str) -> None:
     with open(filename, 'w', encoding='utf-8') as json_file:
-        json.dump(data, json_file, indent=4)
-    print(f"Data has been written to {filename} in JSON format.")
+        json_file.write('[')
+        count = 0
+        for count, row in enumerate(data, 1):
+            json_file.write(',\n' if count > 1 else '\n')
+            json_file.write(textwrap.indent(json.dumps(row, indent=4), ' ' * 4))
+            if count % FLUSH_EVERY == 0:
+                json_file.flush()
+        json_file.write('\n]' if count else ']')
+    logger.info("Data has been written to %s in JSON format.", filename)
 
 
-def write_to_csv(data: List[Dict[str, str]], filename: str) -> None:
-    if not data:
-        print("The data list is empty. No CSV file will be created.")
+def write_to_csv(data: Iterable[Dict[str, str]], filename: str) -> None:
+    rows = iter(data)
+    first_row = next(rows, None)
+    if first_row is None:
+        logger.info("The data list is empty. No CSV file will be created.")
         return
 
-    fieldnames = list(data[0].keys())
+    fieldnames = list(first_row.keys())
 
     with open(filename, 'w', newline='', encoding='utf-8') as csv_file:
         writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
 
         writer.writeheader()
 
-        for row in data:
+        for count, row in enumerate(chain([first_row], rows), 1):
             writer.writerow(row)
+            if count % FLUSH_EVERY == 0:
+                csv_file.flush()
+
+    logger.info("Data has been written to %s in CSV format.", filename)
+
+
+class Writer(ABC):
+    def __init__(self, append: bool = False, batch_size: int = FLUSH_EVERY):
+        self.append = append
+        self.batch_size = batch_size
+        self.filename: Optional[str] = None
+        self.rows_written = 0
+        # Called with the running row count each time a batch is durable.
+        self.on_flush: Optional[Callable[[int], None]] = None
+        self._pending: List[Dict[str, str]] = []
+
+    @abstractmethod
+    def open(self, filename: str) -> None: ...
+
+    def write_batch(self, rows: Iterable[Dict[str, str]]) -> None:
+        self._pending.extend(rows)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self._write_rows(self._pending)
+            self._sync()
+            self.rows_written += len(self._pending)
+            REGISTRY.inc(ROWS_WRITTEN, len(self._pending))
+            self._pending = []
+            if self.on_flush is not None:
+                self.on_flush(self.rows_written)
+
+    @abstractmethod
+    def close(self) -> None: ...
+
+    @abstractmethod
+    def _write_rows(self, rows: List[Dict[str, str]]) -> None: ...
+
+    def _sync(self) -> None:
+        pass
+
+    def __call__(self, data: Iterable[Dict[str, str]], filename: str) -> None:
+        # Only the writer's own work is timed; pulling rows from upstream stages is not.
+        with REGISTRY.stage(WRITE_STAGE):
+            self.open(filename)
+        try:
+            for batch in batched(data, self.batch_size):
+                with REGISTRY.stage(WRITE_STAGE):
+                    self.write_batch(batch)
+        except BaseException:
+            self.abort()
+            raise
+        with REGISTRY.stage(WRITE_STAGE):
+            self.close()
+
+    def abort(self) -> None:
+        pass
+
+
+class _AtomicFileWriter(Writer):
+    # Rows go to '<filename>.part', which replaces the target only on close. An interrupted run leaves the
+    # part file behind, and an appending writer picks it up again on the next run.
+    def __init__(self, append: bool = False, batch_size: int = FLUSH_EVERY):
+        super().__init__(append=append, batch_size=batch_size)
+        self._file: Optional[TextIO] = None
+
+    @property
+    def part_filename(self) -> str:
+        return f'{self.filename}.part'
+
+    def open(self, filename: str) -> None:
+        self.filename = filename
+        self.rows_written = 0
+        self._pending = []
+        if self.append and not os.path.exists(self.part_filename) and os.path.exists(filename):
+            shutil.copyfile(filename, self.part_filename)
+        self._file = open(self.part_filename, 'a' if self.append else 'w', newline='', encoding='utf-8')
+        self._start(is_empty=self._file.tell() == 0)
+
+    def _sync(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._finish()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            os.replace(self.part_filename, self.filename)  # type: ignore[arg-type]
+            logger.info("Data has been written to %s.", self.filename)
+
+    def abort(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _start(self, is_empty: bool) -> None:
+        pass
+
+    def _finish(self) -> None:
+        pass
+
+
+class CsvWriter(_AtomicFileWriter):
+    def __init__(self, fieldnames: Optional[List[str]] = None, append: bool = False, batch_size: int = FLUSH_EVERY):
+        super().__init__(append=append, batch_size=batch_size)
+        self.fieldnames = fieldnames
+        self._has_header = False
+
+    def _start(self, is_empty: bool) -> None:
+        self._has_header = not is_empty
+        if self._has_header and self.fieldnames is None:
+            with open(self.part_filename, newline='', encoding='utf-8') as csv_file:
+                self.fieldnames = next(csv.reader(csv_file), None)
+        elif not self._has_header and self.fieldnames is not None:
+            csv.DictWriter(self._file, fieldnames=self.fieldnames).writeheader()  # type: ignore[arg-type]
+            self._has_header = True
+
+    def _write_rows(self, rows: List[Dict[str, str]]) -> None:
+        if self.fieldnames is None:
+            self.fieldnames = list(rows[0].keys())
+        writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)  # type: ignore[arg-type]
+        if not self._has_header:
+            writer.writeheader()
+            self._has_header = True
+        writer.writerows(rows)
+
 
-    print(f"Data has been written to {filename} in CSV format.")
+class JsonLinesWriter(_AtomicFileWriter):
+    def _write_rows(self, rows: List[Dict[str, str]]) -> None:
+        self._file.writelines(json.dumps(row) + '\n' for row in rows)  # type: ignore[union-attr]
@@ -0,0 +1,125 @@
+"""
+Stream items between pipeline stages.
+"""
+
+import queue
+import threading
+from collections import deque
+from typing import Callable, Deque, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+Emit = Callable[[T], None]
+
+
+class PipelineClosedException(Exception):
+    def __init__(self, message: str = "The consuming stage stopped reading."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class _Done:
+    pass
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def stream_from(produce: Callable[[Emit], None], maxsize: int = 100, poll_interval: float = 0.1) -> Iterator[T]:
+    buffer: queue.Queue = queue.Queue(maxsize=maxsize)
+    closed = threading.Event()
+
+    def _put(item: object) -> None:
+        while not closed.is_set():
+            try:
+                buffer.put(item, timeout=poll_interval)
+                return
+            except queue.Full:
+                continue
+        raise PipelineClosedException()
+
+    def _run() -> None:
+        try:
+            produce(_put)
+        except PipelineClosedException:
+            return
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            _put_quietly(_Failure(e))
+        else:
+            _put_quietly(_Done())
+
+    def _put_quietly(item: object) -> None:
+        try:
+            _put(item)
+        except PipelineClosedException:
+            pass
+
+    producer = threading.Thread(target=_run, name='pipeline-producer', daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if isinstance(item, _Done):
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        closed.set()
+        producer.join()
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    if size < 1:
+        raise ValueError("size must be at least 1")
+
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Acknowledger:
+    # Follows pages through the parse, contact and row stages so that a page is acknowledged only once the rows
+    # it produced are durable. A page that produced no row is acknowledged with the next row that is.
+    def __init__(self, acknowledge: Callable[[List[str]], None]):
+        self.acknowledge = acknowledge
+        self._parsing: Deque[str] = deque()
+        self._settled: Deque[Tuple[int, str]] = deque()
+        self._rows = 0
+
+    def pages(self, pages: Iterable[Tuple[str, T]]) -> Iterator[Tuple[str, T]]:
+        for url, page in pages:
+            self._parsing.append(url)
+            yield url, page
+
+    def results(self, results: Iterable[T]) -> Iterator[T]:
+        # Parsers yield one result per page, in page order.
+        for result in results:
+            self._settled.append((self._rows + 1, self._parsing.popleft()))
+            yield result
+
+    def rows(self, rows: Iterable[T]) -> Iterator[T]:
+        for row in rows:
+            self._rows += 1
+            yield row
+
+    def flushed(self, rows_written: int) -> None:
+        urls = []
+        while self._settled and self._settled[0][0] <= rows_written:
+            urls.append(self._settled.popleft()[1])
+        if urls:
+            self.acknowledge(urls)
+
+    def finish(self) -> None:
+        # Every row has been written, so every page that was parsed is done.
+        urls = [url for _, url in self._settled]
+        self._settled.clear()
+        if urls:
+            self.acknowledge(urls)
@@ -0,0 +1,36 @@
+"""
+Run several site jobs concurrently in one process.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, NamedTuple, Optional, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+
+class Job(NamedTuple):
+    name: str
+    run: Callable[[], None]
+
+
+def run_jobs(jobs: Sequence[Job], max_concurrent: Optional[int] = None) -> Dict[str, BaseException]:
+    # One failing site must not cost the others their run, so failures are collected and reported at the end.
+    if max_concurrent is not None and max_concurrent < 1:
+        raise ValueError("max_concurrent must be at least 1")
+    failures: Dict[str, BaseException] = {}
+    if not jobs:
+        return failures
+
+    with ThreadPoolExecutor(max_workers=max_concurrent or len(jobs), thread_name_prefix='scrapr-job') as executor:
+        futures = {executor.submit(job.run): job.name for job in jobs}
+        for future in as_completed(futures):
+            name = futures[future]
+            error = future.exception()
+            if error is not None:
+                logger.error("Job %s failed: %s", name, error, exc_info=error)
+                failures[name] = error
+            else:
+                logger.info("Job %s finished.", name)
+    return failures
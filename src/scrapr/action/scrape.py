@@ -2,13 +2,85 @@
 Scrape web pages from websites.
 """
 
-from typing import Set, List, Optional
-from functools import reduce
-from collections import deque
-from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+import asyncio
+import logging
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import IO, Callable, Dict, Iterable, Iterator, Set, List, Optional, Sequence, Tuple, TypeVar, cast
+from functools import partial
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+from urllib3.exceptions import MaxRetryError
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+from scrapr.action.cache import CacheMissException, HtmlCache
+from scrapr.action.checkpoint import DONE, CrawlCheckpoint
+from scrapr.action.crawl import FOLLOW_ALL, CrawlEngine, CrawlRules, OnPage
+from scrapr.action.links import get_link_extractor
+from scrapr.action.metrics import BYTES_DOWNLOADED, REGISTRY, REQUEST_SECONDS
+from scrapr.action.paginate import DEFAULT_MAX_PAGES, discover_total_pages, iter_listing_urls
+from scrapr.action.pipeline import Emit, stream_from
+from scrapr.action.sitemap import discover_urls_from_sitemaps
+from scrapr.action.throttle import CreditAccountant, CreditBudgetReachedException, RateLimiter
+from scrapr.action.urls import Canonicalise, canonicalise_url, url_pattern
+from scrapr.action.warc import WarcWriter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+FETCH_STAGE = 'fetch'
+DISCOVER_STAGE = 'discover'
+RENDER_OPTIONS = {'render': 'true', 'autoparse': 'false'}
+
+# Only the encodings urllib3 can decode here are offered: gzip and deflate, plus br and zstd when installed.
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 1024
+HEADER_CHARSET = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+# Fetch tiers from cheapest to most expensive, with the options that identify each in the cache.
+DIRECT = 'direct'
+API = 'api'
+API_RENDER = 'api_render'
+FETCH_TIERS = (DIRECT, API, API_RENDER)
+TIER_OPTIONS: Dict[str, Dict[str, str]] = {
+    DIRECT: {'tier': DIRECT},
+    API: {'render': 'false', 'autoparse': 'false'},
+    API_RENDER: RENDER_OPTIONS,
+}
+
+Validator = Callable[[str, str], bool]
+T = TypeVar('T')
+
+
+def is_non_empty_page(_: str, html: str) -> bool:
+    return bool(html.strip())
+
+
+def declared_encoding(body: bytes, content_type: Optional[str] = None) -> str:
+    # Undeclared pages are read as UTF-8 rather than paying for charset detection on every page.
+    header_match = HEADER_CHARSET.search(content_type or '')
+    if header_match is not None:
+        return header_match.group(1)
+    meta_match = META_CHARSET.search(body[:SNIFF_BYTES])
+    if meta_match is not None:
+        return meta_match.group(1).decode('ascii')
+    return 'utf-8'
+
+
+def decode_html(body: bytes, content_type: Optional[str] = None) -> str:
+    try:
+        return body.decode(declared_encoding(body, content_type), 'replace')
+    except LookupError:
+        return body.decode('utf-8', 'replace')
+
 
 class ScraperServiceCreditsExhaustedException(Exception):
     def __init__(self, message="No credits remaining in account."):
@@ -16,17 +88,180 @@ class ScraperServiceCreditsExhaustedException(Exception):
         super().__init__(self.message)
 
 
+class ResponseTooLargeException(RequestException):
+    def __init__(self, message: str = "The response is larger than the page size limit."):
+        self.message = message
+        super().__init__(self.message)
+
+
+def read_body(response: requests.Response, max_bytes: int = DEFAULT_MAX_BYTES) -> bytes:
+    # iter_content undoes the negotiated compression, so the limit applies to the page itself.
+    content_length = response.headers.get('Content-Length')
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ResponseTooLargeException(f"{response.url} declares {content_length} bytes, over {max_bytes}")
+
+    chunks: List[bytes] = []
+    size = 0
+    for chunk in response.iter_content(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ResponseTooLargeException(f"{response.url} is larger than {max_bytes} bytes")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def create_retry(max_retries: int = 3, backoff_factor: float = 0.5, backoff_jitter: float = 0.5) -> Retry:
+    # 403 is deliberately not retried so that credit exhaustion still fails fast.
+    return Retry(
+        total=max_retries,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET']),
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        respect_retry_after_header=True,
+    )
+
+
+def is_retryable(error: RequestException) -> bool:
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return error.response is not None and error.response.status_code in RETRY_STATUS_CODES
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    # The pool itself never retries: Scraper retries each request above its rate limits and credit accountant.
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    session = requests.Session()
+    session.headers.update({'Connection': 'keep-alive', 'Accept-Encoding': ACCEPT_ENCODING})
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
 class Scraper:
-    def __init__(self, api_url: str, api_key: str):
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_jitter: float = 0.5,
+        timeout: float = 30,
+        max_in_flight: int = 10,
+        canonicalise: Canonicalise = canonicalise_url,
+        cache: Optional[HtmlCache] = None,
+        offline: bool = False,
+        link_backend: Optional[str] = None,
+        tiers: Sequence[str] = (API_RENDER,),
+        validator: Validator = is_non_empty_page,
+        accountant: Optional[CreditAccountant] = None,
+        api_limiter: Optional[RateLimiter] = None,
+        host_limiter: Optional[RateLimiter] = None,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        resume: bool = False,
+        session: Optional[requests.Session] = None,
+        rules: CrawlRules = FOLLOW_ALL,
+        sitemaps: bool = False,
+        sitemap_since: Optional[datetime] = None,
+        archive: Optional[WarcWriter] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        unknown_tiers = set(tiers) - set(FETCH_TIERS)
+        if not tiers or unknown_tiers:
+            raise ValueError(f"tiers must be a non-empty sequence drawn from {FETCH_TIERS}")
         self.api_url = api_url
         self.api_key = api_key
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.canonicalise = canonicalise
+        self.fetches_avoided = 0
+        # Cleared once a crawl stops early or gives up on a page, since it may then have missed contacts.
+        self.crawled_everything = True
+        self.cache = cache
+        self.offline = offline
+        self.extract_links = get_link_extractor(link_backend)
+        self.tiers = tuple(tiers)
+        self.validator = validator
+        self.tier_by_pattern: Dict[str, int] = {}
+        self.accountant = accountant
+        self.api_limiter = api_limiter
+        self.host_limiter = host_limiter
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.rules = rules
+        self.sitemaps = sitemaps
+        self.sitemap_since = sitemap_since
+        self.archive = archive
+        self.max_bytes = max_bytes
+        self.retry = create_retry(max_retries=max_retries, backoff_factor=backoff_factor, backoff_jitter=backoff_jitter)
+        # A session passed in is shared with other scrapers and belongs to the caller.
+        self._owns_session = session is None
+        self.session = session or create_session(pool_size=pool_size)
+
+    def close(self) -> None:
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> 'Scraper':
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
 
-    def _get_html_using_scraper_api(self, target_url: str, auto_parse: str = 'false') -> str:
+    def _get(self, url: str, target: str, **kwargs: object) -> requests.Response:
+        started = time.monotonic()
+        status = 'error'
+        try:
+            response = self.session.get(url=url, timeout=self.timeout, **kwargs)  # type: ignore[arg-type]
+            status = str(response.status_code)
+            return response
+        finally:
+            REGISTRY.observe(REQUEST_SECONDS, time.monotonic() - started, target=target, status=status)
+
+    def _read_html(self, response: requests.Response, target: str) -> str:
+        body = read_body(response, self.max_bytes)
+        REGISTRY.inc(BYTES_DOWNLOADED, len(body), target=target)
+        return decode_html(body, response.headers.get('Content-Type'))
+
+    def _get_html_directly(self, target_url: str) -> str:
+        response = self._get(target_url, DIRECT, stream=True)
+        try:
+            response.raise_for_status()
+            return self._read_html(response, DIRECT)
+        finally:
+            response.close()
+
+    def _open_directly(self, target_url: str) -> IO[bytes]:
+        if self.offline:
+            raise CacheMissException(f"Offline and no cached copy of {target_url}")
+        response = self._with_retries(target_url, DIRECT, partial(self._get_stream_directly, target_url))
+        response.raw.decode_content = True
+        # urllib3's response is a readable binary file object, though not declared as one.
+        return cast(IO[bytes], response.raw)
+
+    def _get_stream_directly(self, target_url: str) -> requests.Response:
+        response = self._get(target_url, DIRECT, stream=True)
         try:
-            payload = {'api_key': self.api_key, 'url': target_url, 'render': 'true', 'autoparse': auto_parse}
-            response = requests.get(url=self.api_url, params=payload, timeout=30)
             response.raise_for_status()
-            return response.text
+        except requests.HTTPError:
+            response.close()
+            raise
+        return response
+
+    def _get_html_using_scraper_api(self, target_url: str, auto_parse: str = 'false', render: bool = True) -> str:
+        response: Optional[requests.Response] = None
+        try:
+            payload = {
+                'api_key': self.api_key,
+                'url': target_url,
+                'render': 'true' if render else 'false',
+                'autoparse': auto_parse,
+            }
+            response = self._get(self.api_url, API, params=payload, stream=True)
+            response.raise_for_status()
+            return self._read_html(response, API)
 
         except requests.HTTPError as e:
             if e.response.status_code == 403:
@@ -36,64 +271,187 @@ class Scraper:
                         f"Scraper API credits exhausted: {error_body}"
                     )
                 raise RequestException(f"Access forbidden (403). Please check your API key and permissions: {str(e)}")
-            raise RequestException(f"HTTP error occurred: {str(e)}")
+            raise RequestException(f"HTTP error occurred: {str(e)}", response=e.response)
         except requests.RequestException as e:
             raise e
+        finally:
+            # Closed only after the error handling above has read the body of a failed response.
+            if response is not None:
+                response.close()
 
     @staticmethod
     def _is_valid_url(url: str, url_part: str, path_part: Optional[str] = None) -> bool:
         return url.startswith(url_part) and (path_part is None or path_part in url)
 
     def get_html_from(self, target_url: str) -> str:
-        return self._get_html_using_scraper_api(target_url=target_url)
+        # Climb from the cheapest tier that last worked for this kind of page until the validator accepts it.
+        pattern = url_pattern(target_url)
+        first_tier = self.tier_by_pattern.get(pattern, 0)
+        html: Optional[str] = None
+        last_error: Optional[RequestException] = None
+        tier = self.tiers[first_tier]
+
+        for index in range(first_tier, len(self.tiers)):
+            try:
+                with REGISTRY.stage(FETCH_STAGE):
+                    html = self._get_html_with_tier(target_url, self.tiers[index])
+                tier = self.tiers[index]
+            except ResponseTooLargeException:
+                # A dearer tier would only download the same oversized page again.
+                raise
+            except RequestException as e:
+                last_error = e
+                continue
+
+            if self.validator(target_url, html):
+                self.tier_by_pattern[pattern] = index
+                return self._archived(target_url, html, tier)
+            logger.info("Tier %s returned an unusable page for %s.", self.tiers[index], target_url)
+
+        if html is not None:
+            return self._archived(target_url, html, tier)
+        raise last_error  # type: ignore[misc]
+
+    def _archived(self, target_url: str, html: str, tier: str) -> str:
+        if self.archive is not None:
+            self.archive.write_page(target_url, html, tier=tier)
+        return html
+
+    def _get_html_with_tier(self, target_url: str, tier: str) -> str:
+        options = TIER_OPTIONS[tier]
+        if self.cache is not None:
+            html = self.cache.get(target_url, options, allow_stale=self.offline)
+            if html is not None:
+                return html
+
+        if self.offline:
+            raise CacheMissException(f"Offline and no cached copy of {target_url}")
+
+        if tier == DIRECT:
+            html = self._with_retries(target_url, tier, partial(self._get_html_directly, target_url))
+        else:
+            fetch = partial(self._get_html_using_scraper_api, target_url=target_url, render=tier == API_RENDER)
+            html = self._with_retries(target_url, tier, fetch)
+        if self.cache is not None:
+            self.cache.put(target_url, options, html)
+        return html
+
+    def _with_retries(self, target_url: str, tier: str, fetch: Callable[[], T]) -> T:
+        # Every attempt waits for its own rate limit slots and is charged on its own, since each is a separate call.
+        retry = self.retry
+        while True:
+            try:
+                with self._throttled(target_url, tier):
+                    return fetch()
+            except RequestException as e:
+                if not is_retryable(e):
+                    raise
+                try:
+                    retry = retry.increment('GET', target_url)
+                except MaxRetryError:
+                    raise e from None
+                logger.info("Retrying %s after: %s", target_url, e, extra={'url': target_url})
+                retry_after = e.response.headers.get('Retry-After') if e.response is not None else None
+                time.sleep(retry.parse_retry_after(retry_after) if retry_after else retry.get_backoff_time())
+
+    @contextmanager
+    def _throttled(self, target_url: str, tier: str) -> Iterator[None]:
+        with ExitStack() as stack:
+            if tier != DIRECT:
+                if self.accountant is not None:
+                    stack.enter_context(self.accountant.charge(tier))
+                if self.api_limiter is not None:
+                    stack.enter_context(self.api_limiter.slot(self.api_key))
+            if self.host_limiter is not None:
+                stack.enter_context(self.host_limiter.slot(urlsplit(target_url).netloc))
+            yield
 
     @staticmethod
     def get_target_contact_urls(base_url: str, query_parameter_key: str, total_pages: int) -> list[str]:
-        def _get_page_range(end: int) -> range:
-            return range(1, end + 1)
+        return list(iter_listing_urls(base_url, query_parameter_key, total_pages))
 
-        return [
-            f"{base_url}{query_parameter_key}{query_parameter_value}"
-            for query_parameter_value in _get_page_range(total_pages)
-        ]
+    def discover_total_pages(
+        self, base_url: str, query_parameter_key: str, filter_url: str, max_pages: int = DEFAULT_MAX_PAGES
+    ) -> int:
+        # With the cache enabled, the crawl that follows does not pay for these listing pages twice.
+        return discover_total_pages(
+            fetch=self.get_html_from,
+            base_url=base_url,
+            query_parameter_key=query_parameter_key,
+            has_results=lambda url, html: bool(self._extract_links(html, url, filter_url)),
+            extract_links=self.extract_links,
+            max_pages=max_pages,
+        )
 
-    def extract_urls_from_targets(self, target_urls: list[str], filter_url: str) -> List[str]:
-        def _flatten(list_of_sets: list[set]) -> list:
-            combined_set = reduce(lambda x, y: x | y, list_of_sets)
-            return list(combined_set)
+    def discover_urls_from_sitemaps(self, site_url: str, filter_url: str) -> Optional[List[str]]:
+        # Sitemaps are plain GETs to the site itself, so this never spends scraper API credits.
+        # None means there is no sitemap to go by, so the caller crawls instead.
+        if not self.sitemaps:
+            return None
+        return discover_urls_from_sitemaps(self._open_directly, site_url, filter_url, since=self.sitemap_since)
 
-        return _flatten([self._extract_urls_from_target(target_url, filter_url) for target_url in target_urls])
+    def extract_urls_from_targets(self, target_urls: list[str], filter_url: str) -> List[str]:
+        return list(asyncio.run(self._crawl_targets(target_urls, filter_url)))
 
-    def _extract_urls_from_target(self, target_url: str, filter_url: str) -> Set[str]:
-        base_url = target_url.rstrip('/')
-        print(f'base_url is {base_url}')
+    def extract_pages_from_targets(self, target_urls: list[str], filter_url: str) -> List[Tuple[str, str]]:
+        pages: List[Tuple[str, str]] = []
+        asyncio.run(self._crawl_targets(target_urls, filter_url, on_page=lambda url, html: pages.append((url, html))))
+        return pages
 
-        visited = set()
-        to_visit = deque([base_url])
+    def iter_pages_from_targets(
+        self, target_urls: list[str], filter_url: str, buffer_size: int = 100
+    ) -> Iterator[Tuple[str, str]]:
+        def _produce(emit: Emit) -> None:
+            asyncio.run(
+                self._crawl_targets(
+                    target_urls, filter_url, on_page=lambda url, html: emit((url, html)), defer_done=True
+                )
+            )
 
-        while to_visit:
-            current_url = to_visit.popleft()
-            if current_url in visited:
-                continue
+        return stream_from(_produce, maxsize=buffer_size)
 
-            print(f"Crawling: {current_url}")
-            visited.add(current_url)
+    def acknowledge(self, urls: Iterable[str]) -> None:
+        # Streamed pages are only checkpointed as done once the consumer has stored what it made of them.
+        if self.checkpoint is None:
+            return
+        for url in urls:
+            self.checkpoint.record(self.canonicalise(url), url, DONE)
+        self.checkpoint.flush()
 
-            try:
-                response = self.get_html_from(current_url)
-                soup = BeautifulSoup(response, 'html.parser')
-
-                new_urls = {
-                    urljoin(base_url, link['href'])
-                    for link in soup.find_all('a', href=True)
-                    if self._is_valid_url(urljoin(base_url, link['href']), filter_url)
-                }
+    def _extract_urls_from_target(self, target_url: str, filter_url: str) -> Set[str]:
+        return asyncio.run(self._crawl_targets([target_url], filter_url))
 
-                to_visit.extend(new_urls - visited)
+    async def _crawl_targets(
+        self, target_urls: list[str], filter_url: str, on_page: Optional[OnPage] = None, defer_done: bool = False
+    ) -> Set[str]:
+        base_urls = [target_url.rstrip('/') for target_url in target_urls]
+        for base_url in base_urls:
+            logger.info('base_url is %s', base_url)
 
-            except ScraperServiceCreditsExhaustedException as e:
-                raise e
-            except (RequestException, OSError) as e:
-                print(f"An error occurred: {e}. Continuing...")
+        engine = CrawlEngine(
+            fetch=self.get_html_from,
+            extract_links=partial(self._extract_links, filter_url=filter_url),
+            max_in_flight=self.max_in_flight,
+            canonicalise=self.canonicalise,
+            checkpoint=self.checkpoint,
+            resume=self.resume,
+            rules=self.rules,
+            defer_done=defer_done,
+            # When the account runs dry, pages in flight still finish and are handed on before the error is raised.
+            stop_on=(CreditBudgetReachedException, ScraperServiceCreditsExhaustedException),
+        )
+        try:
+            visited = await engine.crawl(base_urls, on_page=on_page)
+            if isinstance(engine.stopped, ScraperServiceCreditsExhaustedException):
+                raise engine.stopped
+            return visited
+        finally:
+            self.fetches_avoided += engine.fetches_avoided
+            if engine.stopped is not None or engine.pages_failed:
+                self.crawled_everything = False
+            logger.info("Skipped %d duplicate fetches.", engine.fetches_avoided)
+            if self.accountant is not None:
+                logger.info("Spent %g scraper API credits.", self.accountant.spent)
 
-        return visited
+    def _extract_links(self, html: str, base_url: str, filter_url: str) -> Set[str]:
+        return {url for url in self.extract_links(html, base_url) if self._is_valid_url(url, filter_url)}
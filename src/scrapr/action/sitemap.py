@@ -0,0 +1,157 @@
+"""
+Discover page URLs from a site's robots.txt and sitemaps.
+"""
+
+import gzip
+import io
+import logging
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import IO, TYPE_CHECKING, Callable, Iterator, List, NamedTuple, Optional, Set
+from urllib.parse import urljoin, urlsplit
+
+from defusedxml import DefusedXmlException, ElementTree
+from requests.exceptions import RequestException
+
+if TYPE_CHECKING:
+    from _typeshed import WriteableBuffer
+
+logger = logging.getLogger(__name__)
+
+OpenUrl = Callable[[str], IO[bytes]]
+
+GZIP_MAGIC = b'\x1f\x8b'
+DEFAULT_MAX_SITEMAPS = 50
+# The sitemap protocol caps a sitemap at 50 MB uncompressed, well above the limit for a page.
+DEFAULT_MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+
+class SitemapTooLargeException(RequestException):
+    def __init__(self, message: str = "The sitemap is larger than the sitemap size limit."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class SitemapEntry(NamedTuple):
+    loc: str
+    lastmod: Optional[datetime]
+
+
+def site_root(url: str) -> str:
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}/'
+
+
+def sitemap_urls_from_robots(robots_txt: str, base_url: str) -> List[str]:
+    return [
+        urljoin(base_url, line.split(':', 1)[1].strip())
+        for line in robots_txt.splitlines()
+        if line.strip().lower().startswith('sitemap:')
+    ]
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def iter_sitemap(stream: IO[bytes], max_bytes: int = DEFAULT_MAX_SITEMAP_BYTES) -> Iterator[SitemapEntry | str]:
+    # Yields page entries, and the location of each child sitemap when the document is a sitemap index.
+    # Elements are discarded once read, so memory stays flat however large the sitemap is.
+    buffered = io.BufferedReader(_LimitedReader(stream, max_bytes))
+    source: IO[bytes] = buffered
+    if buffered.peek(2)[:2] == GZIP_MAGIC:
+        # The limit applies to the document once decompressed as well as to what came over the wire.
+        source = io.BufferedReader(_LimitedReader(gzip.GzipFile(fileobj=buffered), max_bytes))
+    fields = {}
+    for _, element in ElementTree.iterparse(source, events=('end',)):
+        name = element.tag.rsplit('}', 1)[-1]
+        if name in ('loc', 'lastmod'):
+            fields[name] = (element.text or '').strip()
+        elif name == 'url' and fields.get('loc'):
+            yield SitemapEntry(fields['loc'], parse_lastmod(fields.get('lastmod')))
+            fields = {}
+            element.clear()
+        elif name == 'sitemap' and fields.get('loc'):
+            yield fields['loc']
+            fields = {}
+            element.clear()
+
+
+def discover_urls_from_sitemaps(
+    open_url: OpenUrl,
+    site_url: str,
+    filter_url: str,
+    since: Optional[datetime] = None,
+    max_sitemaps: int = DEFAULT_MAX_SITEMAPS,
+    max_bytes: int = DEFAULT_MAX_SITEMAP_BYTES,
+) -> Optional[List[str]]:
+    # None means the site has no readable sitemap at all, as opposed to one that lists nothing new.
+    if since is not None and since.tzinfo is None:
+        # Read a naive time as UTC, as parse_lastmod does for a lastmod without an offset.
+        since = since.replace(tzinfo=timezone.utc)
+    root = site_root(site_url)
+    try:
+        with closing(open_url(urljoin(root, 'robots.txt'))) as robots:
+            pending = sitemap_urls_from_robots(robots.read().decode('utf-8', 'replace'), root)
+    except RequestException:
+        pending = []
+    pending = pending or [urljoin(root, 'sitemap.xml')]
+
+    visited: Set[str] = set()
+    read = 0
+    urls: List[str] = []
+    seen_urls: Set[str] = set()
+    while pending and len(visited) < max_sitemaps:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+        try:
+            with closing(open_url(sitemap_url)) as stream:
+                for item in iter_sitemap(stream, max_bytes):
+                    if isinstance(item, str):
+                        pending.append(item)
+                    elif _is_wanted(item, filter_url, since) and item.loc not in seen_urls:
+                        seen_urls.add(item.loc)
+                        urls.append(item.loc)
+            read += 1
+        except (RequestException, OSError, ElementTree.ParseError, DefusedXmlException) as e:
+            logger.info("Ignoring unreadable sitemap %s: %s", sitemap_url, e)
+
+    if not read:
+        logger.info("Found no readable sitemap for %s.", root)
+        return None
+    logger.info("Found %d URLs in %d sitemaps for %s.", len(urls), len(visited), root)
+    return urls
+
+
+class _LimitedReader(io.RawIOBase):
+    def __init__(self, stream: IO[bytes] | gzip.GzipFile, max_bytes: int):
+        self._stream = stream
+        self._max_bytes = max_bytes
+        self._size = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: 'WriteableBuffer') -> int:
+        view = memoryview(buffer).cast('B')
+        data = self._stream.read(len(view))
+        self._size += len(data)
+        if self._size > self._max_bytes:
+            raise SitemapTooLargeException(f"The sitemap is larger than {self._max_bytes} bytes")
+        view[: len(data)] = data
+        return len(data)
+
+
+def _is_wanted(entry: SitemapEntry, filter_url: str, since: Optional[datetime]) -> bool:
+    if not entry.loc.startswith(filter_url):
+        return False
+    # Entries without a lastmod are kept; the sitemap gives no reason to skip them.
+    return since is None or entry.lastmod is None or entry.lastmod >= since
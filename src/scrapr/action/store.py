@@ -0,0 +1,192 @@
+"""
+Store contacts in an indexed SQLite database.
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional
+
+from scrapr.action.persist import FLUSH_EVERY, Writer
+from scrapr.model.contact import CONTACT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# The statements are written out in full rather than built from CONTACT_FIELDS, so no SQL is ever assembled
+# at run time.
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS contacts (
+    site TEXT NOT NULL,
+    id TEXT NOT NULL,
+    full_name TEXT,
+    specialism TEXT,
+    gmc_number TEXT,
+    patient_type TEXT,
+    phone_number TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_changed REAL NOT NULL,
+    PRIMARY KEY (site, id)
+);
+CREATE INDEX IF NOT EXISTS idx_contacts_gmc_number ON contacts (gmc_number);
+CREATE INDEX IF NOT EXISTS idx_contacts_specialism ON contacts (specialism);
+CREATE INDEX IF NOT EXISTS idx_contacts_first_seen ON contacts (site, first_seen);
+CREATE INDEX IF NOT EXISTS idx_contacts_last_seen ON contacts (site, last_seen);
+CREATE INDEX IF NOT EXISTS idx_contacts_last_changed ON contacts (site, last_changed);
+CREATE TABLE IF NOT EXISTS runs (
+    site TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    full_crawl INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (site, started_at)
+);
+'''
+
+_UPSERT = '''
+INSERT INTO contacts (
+    site, id, full_name, specialism, gmc_number, patient_type, phone_number, first_seen, last_seen, last_changed
+)
+VALUES (:site, :_id, :full_name, :specialism, :gmc_number, :patient_type, :phone_number, :seen, :seen, :seen)
+ON CONFLICT (site, id) DO UPDATE SET
+    full_name = excluded.full_name,
+    specialism = excluded.specialism,
+    gmc_number = excluded.gmc_number,
+    patient_type = excluded.patient_type,
+    phone_number = excluded.phone_number,
+    last_seen = excluded.last_seen,
+    last_changed = CASE
+        WHEN full_name IS NOT excluded.full_name
+            OR specialism IS NOT excluded.specialism
+            OR gmc_number IS NOT excluded.gmc_number
+            OR patient_type IS NOT excluded.patient_type
+            OR phone_number IS NOT excluded.phone_number
+        THEN excluded.last_seen
+        ELSE last_changed
+    END
+'''
+
+_SELECT_NEW = '''
+SELECT id AS _id, full_name, specialism, gmc_number, patient_type, phone_number, first_seen, last_seen, last_changed
+FROM contacts WHERE site = ? AND first_seen >= ? ORDER BY id
+'''
+
+_SELECT_CHANGED = '''
+SELECT id AS _id, full_name, specialism, gmc_number, patient_type, phone_number, first_seen, last_seen, last_changed
+FROM contacts WHERE site = ? AND last_changed >= ? AND first_seen < ? ORDER BY id
+'''
+
+_SELECT_NOT_SEEN = '''
+SELECT id AS _id, full_name, specialism, gmc_number, patient_type, phone_number, first_seen, last_seen, last_changed
+FROM contacts WHERE site = ? AND last_seen < ? ORDER BY id
+'''
+
+_SELECT_BY_GMC_NUMBER = '''
+SELECT id AS _id, full_name, specialism, gmc_number, patient_type, phone_number, first_seen, last_seen, last_changed
+FROM contacts WHERE site = ? AND gmc_number = ? ORDER BY id
+'''
+
+_SELECT_BY_SPECIALISM = '''
+SELECT id AS _id, full_name, specialism, gmc_number, patient_type, phone_number, first_seen, last_seen, last_changed
+FROM contacts WHERE site = ? AND specialism = ? ORDER BY id
+'''
+
+
+class SqliteContactStore(Writer):
+    def __init__(self, site: str = 'uic', batch_size: int = FLUSH_EVERY):
+        # Upserts never lose earlier rows, so the store always appends.
+        super().__init__(append=True, batch_size=batch_size)
+        # Sites share one database, and a contact's id is only unique within its site.
+        self.site = site
+        # Asked on close whether the run saw every contact of the site; only such a run can show which were removed.
+        # Without it the rows written are taken to be the site's full contact list.
+        self.is_full_crawl: Optional[Callable[[], bool]] = None
+        self.run_started_at: Optional[float] = None
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def open(self, filename: str) -> None:
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.filename = filename
+        self.rows_written = 0
+        self._pending = []
+        self._connection = sqlite3.connect(filename)
+        self._connection.row_factory = sqlite3.Row
+        self.run_started_at = time.time()
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(
+                'INSERT INTO runs (site, started_at) VALUES (?, ?)', (self.site, self.run_started_at)
+            )
+
+    def _write_rows(self, rows: List[Dict[str, str]]) -> None:
+        seen = time.time()
+        with self._connection:  # type: ignore[union-attr]
+            self._connection.executemany(  # type: ignore[union-attr]
+                _UPSERT,
+                [{**{name: row.get(name) for name in CONTACT_FIELDS}, 'site': self.site, 'seen': seen} for row in rows],
+            )
+
+    def close(self) -> None:
+        self.flush()
+        if self._connection is not None:
+            full_crawl = self.is_full_crawl is None or self.is_full_crawl()
+            with self._connection:
+                self._connection.execute(
+                    'UPDATE runs SET finished_at = ?, full_crawl = ? WHERE site = ? AND started_at = ?',
+                    (time.time(), full_crawl, self.site, self.run_started_at),
+                )
+            self._connection.close()
+            self._connection = None
+            logger.info("Data has been written to %s.", self.filename)
+
+    def abort(self) -> None:
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class ContactQueries:
+    def __init__(self, filename: str, site: str = 'uic'):
+        self.site = site
+        self._connection = sqlite3.connect(filename)
+        self._connection.row_factory = sqlite3.Row
+
+    def last_run_started_at(self) -> Optional[float]:
+        (started_at,) = self._connection.execute(
+            'SELECT MAX(started_at) FROM runs WHERE site = ? AND finished_at IS NOT NULL', (self.site,)
+        ).fetchone()
+        return None if started_at is None else float(started_at)
+
+    def new_since(self, since: float) -> List[Dict[str, str]]:
+        return self._select(_SELECT_NEW, since)
+
+    def changed_since(self, since: float) -> List[Dict[str, str]]:
+        return self._select(_SELECT_CHANGED, since, since)
+
+    def removed_since(self, since: float) -> List[Dict[str, str]]:
+        # A partial run, stopped early or limited to recent pages, says nothing about the contacts it did not see.
+        # Removals are read from the first full crawl since then: the contacts it no longer found.
+        (full_crawl_started_at,) = self._connection.execute(
+            'SELECT MIN(started_at) FROM runs WHERE site = ? AND finished_at IS NOT NULL AND full_crawl '
+            'AND started_at >= ?',
+            (self.site, since),
+        ).fetchone()
+        if full_crawl_started_at is None:
+            return []
+        return self._select(_SELECT_NOT_SEEN, full_crawl_started_at)
+
+    def by_gmc_number(self, gmc_number: str) -> List[Dict[str, str]]:
+        return self._select(_SELECT_BY_GMC_NUMBER, gmc_number)
+
+    def by_specialism(self, specialism: str) -> List[Dict[str, str]]:
+        return self._select(_SELECT_BY_SPECIALISM, specialism)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _select(self, query: str, *params: object) -> List[Dict[str, str]]:
+        cursor = self._connection.execute(query, (self.site, *params))
+        return [dict(row) for row in cursor]
@@ -0,0 +1,119 @@
+"""
+Throttle requests and account for scraper API credits.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Mapping, Optional
+
+# Credits charged per call by the scraper API, keyed by fetch tier.
+DEFAULT_COSTS: Mapping[str, float] = {'direct': 0, 'api': 1, 'api_render': 10}
+
+
+class CreditBudgetReachedException(Exception):
+    def __init__(self, message: str = "The credit budget for this run has been reached."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class RateLimiter:
+    def __init__(
+        self, requests_per_second: Optional[float] = None, max_concurrent: Optional[int] = None, burst: float = 1
+    ):
+        if max_concurrent is not None and max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.requests_per_second = requests_per_second
+        self.max_concurrent = max_concurrent
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, key: str) -> Iterator[None]:
+        bucket, slots = self._limits_for(key)
+        if slots is not None:
+            slots.acquire()
+        try:
+            if bucket is not None:
+                bucket.acquire()
+            yield
+        finally:
+            if slots is not None:
+                slots.release()
+
+    def _limits_for(self, key: str) -> tuple[Optional[TokenBucket], Optional[threading.BoundedSemaphore]]:
+        with self._lock:
+            if self.requests_per_second is not None and key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.requests_per_second, burst=self.burst)
+            if self.max_concurrent is not None and key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self.max_concurrent)
+            return self._buckets.get(key), self._slots.get(key)
+
+
+class CreditAccountant:
+    def __init__(self, budget: Optional[float] = None, costs: Mapping[str, float] = DEFAULT_COSTS):
+        self.budget = budget
+        self.costs = dict(costs)
+        self.spent = 0.0
+        self.calls: Dict[str, int] = {}
+        self._reserved = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> Optional[float]:
+        return None if self.budget is None else self.budget - self.spent
+
+    @contextmanager
+    def charge(self, kind: str) -> Iterator[None]:
+        # Credits are reserved before the call, so concurrent requests cannot overshoot the budget together,
+        # and are refunded when the call fails because the API only bills successful requests.
+        cost = self.costs.get(kind, 0)
+        with self._lock:
+            if self.budget is not None and self.spent + self._reserved + cost > self.budget:
+                raise CreditBudgetReachedException(
+                    f"Credit budget of {self.budget:g} reached after spending {self.spent:g} credits."
+                )
+            self._reserved += cost
+        try:
+            yield
+        except BaseException:
+            with self._lock:
+                self._reserved -= cost
+            raise
+        with self._lock:
+            self._reserved -= cost
+            self.spent += cost
+            self.calls[kind] = self.calls.get(kind, 0) + 1
@@ -0,0 +1,32 @@
+"""
+Normalise URLs.
+"""
+
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+Canonicalise = Callable[[str], str]
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalise_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if parts.port is not None and DEFAULT_PORTS.get(scheme) == parts.port:
+        netloc = netloc.rsplit(':', 1)[0]
+
+    path = parts.path.rstrip('/')
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def url_pattern(url: str) -> str:
+    # Collapses URLs of the same kind of page: numeric path segments become '*' and query values are dropped.
+    parts = urlsplit(canonicalise_url(url))
+    path = '/'.join('*' if any(char.isdigit() for char in segment) else segment for segment in parts.path.split('/'))
+    query = '&'.join(sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)}))
+
+    return urlunsplit((parts.scheme, parts.netloc, path, query, ''))
@@ -0,0 +1,124 @@
+"""
+Archive fetched pages to WARC files and read them back.
+"""
+
+import base64
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WARC_VERSION = b'WARC/1.1'
+HTML_CONTENT_TYPE = 'text/html; charset=utf-8'
+
+
+class WarcFormatException(Exception):
+    def __init__(self, message: str = "The file is not a valid WARC archive."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class WarcWriter:
+    # Each record is its own gzip member, so the archive stays readable up to the last complete record
+    # if a run is killed, and standard WARC tools can seek to any record.
+    def __init__(self, filename: str, compresslevel: int = 6):
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.filename = filename
+        self.compresslevel = compresslevel
+        self.records_written = 0
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = open(filename, 'ab')
+        if self._file.tell() == 0:
+            self._write_record(
+                'warcinfo',
+                b'software: scrapr\r\nformat: WARC File Format 1.1\r\n',
+                {'WARC-Filename': os.path.basename(filename), 'Content-Type': 'application/warc-fields'},
+            )
+
+    def write_page(self, url: str, html: str, **fields: str) -> None:
+        headers = {'WARC-Target-URI': url, 'Content-Type': HTML_CONTENT_TYPE}
+        headers.update({f'WARC-Scrapr-{name.title()}': value for name, value in fields.items()})
+        self._write_record('resource', html.encode('utf-8'), headers)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> 'WarcWriter':
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def _write_record(self, record_type: str, block: bytes, headers: Dict[str, str]) -> None:
+        digest = base64.b32encode(hashlib.sha1(block, usedforsecurity=False).digest()).decode('ascii')
+        all_headers = {
+            'WARC-Type': record_type,
+            'WARC-Record-ID': f'<urn:uuid:{uuid.uuid4()}>',
+            'WARC-Date': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            **headers,
+            'WARC-Block-Digest': f'sha1:{digest}',
+            'Content-Length': str(len(block)),
+        }
+        head = b'\r\n'.join(
+            [WARC_VERSION] + [f'{name}: {value}'.encode('utf-8') for name, value in all_headers.items()]
+        )
+        record = gzip.compress(head + b'\r\n\r\n' + block + b'\r\n\r\n', compresslevel=self.compresslevel)
+        with self._lock:
+            if self._file is None:
+                raise ValueError("write to a closed WARC file")
+            self._file.write(record)
+            self._file.flush()
+            self.records_written += 1
+
+
+def iter_warc_records(filename: str) -> Iterator[Tuple[Dict[str, str], bytes]]:
+    # gzip reads the concatenated members as one stream; uncompressed archives are read as they are.
+    with open(filename, 'rb') as raw_file:
+        compressed = raw_file.read(2) == b'\x1f\x8b'
+    with gzip.open(filename, 'rb') if compressed else open(filename, 'rb') as warc_file:
+        while True:
+            try:
+                record = _read_record(warc_file, filename)
+            except EOFError:
+                # A run killed mid-write leaves its last gzip member incomplete; every record before it is intact.
+                logger.warning("Ignoring the truncated last record of %s.", filename)
+                return
+            if record is None:
+                return
+            yield record
+
+
+def _read_record(warc_file: gzip.GzipFile | BinaryIO, filename: str) -> Optional[Tuple[Dict[str, str], bytes]]:
+    line = warc_file.readline()
+    while line and not line.strip():
+        line = warc_file.readline()
+    if not line:
+        return None
+    if not line.startswith(b'WARC/'):
+        raise WarcFormatException(f"Expected a WARC record in {filename}, found {line[:40]!r}")
+    headers: Dict[str, str] = {}
+    for header_line in iter(warc_file.readline, b'\r\n'):
+        if not header_line:
+            raise WarcFormatException(f"Truncated WARC record in {filename}")
+        name, _, value = header_line.decode('utf-8').partition(':')
+        headers[name.strip()] = value.strip()
+    return headers, warc_file.read(int(headers.get('Content-Length', '0')))
+
+
+def iter_warc_pages(filename: str) -> Iterator[Tuple[str, str]]:
+    for headers, block in iter_warc_records(filename):
+        if headers.get('WARC-Type') in ('resource', 'response') and headers.get('Content-Type', '').startswith(
+            'text/html'
+        ):
+            yield headers['WARC-Target-URI'], block.decode('utf-8', 'replace')
@@ -4,10 +4,11 @@ Configuration management.
 
 import os
 from typing import Dict, Any
-from dotenv import load_dotenv
 
 
 def load_config() -> Dict[str, Any]:
+    from dotenv import load_dotenv
+
     load_dotenv()
     config = {'SCRAPER_API_URL': os.getenv('SCRAPER_API_URL'), 'SCRAPER_API_KEY': os.getenv('SCRAPER_API_KEY')}
 
@@ -0,0 +1,290 @@
+"""
+Build the site jobs of a scrapr run, and the resources they share, for both the command line and the worker.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Sequence
+
+from scrapr.config import load_config
+from scrapr.sites import get_site
+from scrapr.action.checkpoint import CrawlCheckpoint
+from scrapr.action.metrics import CACHE_HITS, CACHE_MISSES, CREDITS_SPENT, REGISTRY
+from scrapr.action.model_store import ModelStore
+from scrapr.action.persist import CsvWriter, Writer
+from scrapr.action.schedule import Job
+from scrapr.action.store import SqliteContactStore
+from scrapr.action.throttle import CreditAccountant, RateLimiter
+from scrapr.action.warc import WarcWriter
+from scrapr.model.command import create_command
+
+# requests, bs4 and autoscraper are only imported once a job needs them, so --help, --list-sites and
+# configuration errors start quickly.
+if TYPE_CHECKING:
+    from scrapr.action.cache import HtmlCache
+    from scrapr.action.crawl import CrawlRules
+    from scrapr.action.parse import Parser
+    from scrapr.action.scrape import Scraper
+
+logger = logging.getLogger(__name__)
+
+
+def get_params(site: str = 'uic') -> Dict[str, Any]:
+    return dict(get_site(site).PARAMS)
+
+
+def get_config() -> Dict[str, str]:
+    return load_config()
+
+
+def _get_writer(append: bool = False, store: bool = False, site: str = 'uic') -> Writer:
+    if store:
+        return SqliteContactStore(site)
+    return CsvWriter(append=append)
+
+
+def _create_parser(
+    url: str, wanted_list: list[str], store: Optional[ModelStore] = None, retrain: bool = False, workers: int = 1
+) -> Parser:
+    from scrapr.action.parse import Parser
+
+    return Parser(url, wanted_list, store=store, retrain=retrain, workers=workers)
+
+
+def _create_cache(directory: str, *filter_urls: str) -> HtmlCache:
+    from scrapr.action.cache import DAY, HtmlCache
+
+    # Consultant pages rarely change; listing pages pick up new consultants.
+    return HtmlCache(
+        directory, default_ttl=DAY, ttls=[(f'^{re.escape(filter_url)}', 7 * DAY) for filter_url in filter_urls]
+    )
+
+
+def _create_scraper(api_url: str, api_key: str, **options: Any) -> Scraper:
+    from scrapr.action.scrape import Scraper
+
+    return Scraper(api_url, api_key, **options)
+
+
+def _create_crawl_rules(site: ModuleType, params: Dict[str, Any], max_depth: int) -> CrawlRules:
+    from scrapr.action.crawl import FOLLOW_ALL
+
+    # Sites without crawl rules follow every matching link, as before.
+    create_crawl_rules = getattr(site, 'create_crawl_rules', None)
+    if create_crawl_rules is None:
+        return FOLLOW_ALL
+    rules: CrawlRules = create_crawl_rules(params['start_url'], params['filter_url'], max_depth=max_depth)
+    return rules
+
+
+def _site_path_for(path: str, site: str, sites: Sequence[str]) -> str:
+    # Each site crawls its own frontier and archive, so several sites cannot share one checkpoint or WARC file.
+    if len(sites) == 1:
+        return path
+    root, extension = os.path.splitext(path)
+    return f'{root}-{site}{extension}'
+
+
+def _parse_date(value: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid ISO date: '{value}'") from e
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(prog='scrapr', description='Scrape contact details from public websites.')
+    arg_parser.add_argument(
+        '--site', dest='sites', action='append', metavar='NAME', help='Site to scrape; repeat for several sites.'
+    )
+    arg_parser.add_argument('--all-sites', action='store_true', help='Scrape every registered site.')
+    arg_parser.add_argument('--list-sites', action='store_true', help='List the registered sites and exit.')
+    arg_parser.add_argument('--jobs', type=int, help='Maximum number of sites scraped at once.')
+    arg_parser.add_argument(
+        '--max-depth',
+        type=int,
+        default=1,
+        help='Link depth from the listing pages beyond which pages are not expanded.',
+    )
+    arg_parser.add_argument(
+        '--sitemap', action='store_true', help='Find pages through the sitemap first and crawl only without one.'
+    )
+    arg_parser.add_argument(
+        '--sitemap-since',
+        type=_parse_date,
+        metavar='DATE',
+        help='Only take sitemap entries modified on or after this ISO date.',
+    )
+    arg_parser.add_argument(
+        '--report', default='.scrapr/report.json', help='JSON file receiving the metrics report of the run.'
+    )
+    arg_parser.add_argument('--prometheus-file', help='Also write the run metrics in Prometheus text format here.')
+    arg_parser.add_argument('--log-level', default='INFO', help='Logging level, such as DEBUG, INFO or WARNING.')
+    arg_parser.add_argument('--log-json', action='store_true', help='Log one JSON object per line.')
+    arg_parser.add_argument(
+        '--max-page-bytes', type=int, help='Abandon pages larger than this once decompressed; 5 MiB by default.'
+    )
+    arg_parser.add_argument('--pool-size', type=int, default=10, help='Connections per host in the shared pool.')
+    arg_parser.add_argument('--cache-dir', default='.scrapr/cache', help='Directory of the on-disk HTML cache.')
+    arg_parser.add_argument('--no-cache', action='store_true', help='Always fetch pages from the scraper API.')
+    arg_parser.add_argument('--offline', action='store_true', help='Only serve pages from the cache.')
+    arg_parser.add_argument(
+        '--always-render', action='store_true', help='Skip the cheaper fetch tiers and always render pages.'
+    )
+    arg_parser.add_argument('--credit-budget', type=float, help='Stop scheduling API calls beyond this many credits.')
+    arg_parser.add_argument('--api-rps', type=float, help='Maximum scraper API requests per second.')
+    arg_parser.add_argument('--api-concurrency', type=int, help='Maximum concurrent scraper API requests.')
+    arg_parser.add_argument('--host-rps', type=float, help='Maximum requests per second to each target host.')
+    arg_parser.add_argument('--host-concurrency', type=int, help='Maximum concurrent requests to each target host.')
+    arg_parser.add_argument(
+        '--resume', action='store_true', help='Continue the last interrupted crawl and append to its output.'
+    )
+    arg_parser.add_argument(
+        '--checkpoint', default='.scrapr/checkpoint.sqlite', help='SQLite file recording crawl progress.'
+    )
+    arg_parser.add_argument(
+        '--checkpoint-interval', type=float, default=30.0, help='Seconds between checkpoint writes.'
+    )
+    arg_parser.add_argument(
+        '--store', metavar='PATH', help='Upsert contacts into this SQLite database instead of writing a CSV file.'
+    )
+    arg_parser.add_argument(
+        '--warc', metavar='PATH', help='Append every fetched page to this WARC file for offline re-extraction.'
+    )
+    arg_parser.add_argument('--model-dir', default='.scrapr/models', help='Directory of trained parser models.')
+    arg_parser.add_argument('--retrain-parser', action='store_true', help='Retrain and store the parser model.')
+    arg_parser.add_argument(
+        '--parse-workers', type=int, default=1, help='Number of processes extracting contacts from pages.'
+    )
+    arg_parser.add_argument(
+        '--invalidate-parser', action='store_true', help='Delete the stored parser model for this site and exit.'
+    )
+    return arg_parser.parse_args(argv)
+
+
+def create_job(
+    site_name: str,
+    args: argparse.Namespace,
+    app_config: Dict[str, str],
+    sites: Sequence[str],
+    shared: Dict[str, Any],
+    overrides: Optional[Dict[str, Any]] = None,
+) -> Job:
+    site = get_site(site_name)
+    params: Dict[str, Any] = {**get_params(site_name), **(overrides or {})}
+
+    def _run() -> None:
+        from scrapr.action.scrape import API_RENDER, DEFAULT_MAX_BYTES, FETCH_TIERS
+
+        parser: Parser = _get_parser(site_name, params, args, shared)
+        checkpoint = CrawlCheckpoint(
+            _site_path_for(args.checkpoint, site_name, sites), interval=args.checkpoint_interval
+        )
+        scraper: Scraper = _create_scraper(
+            api_url=app_config['SCRAPER_API_URL'],
+            api_key=app_config['SCRAPER_API_KEY'],
+            cache=shared['cache'],
+            offline=args.offline,
+            tiers=(API_RENDER,) if args.always_render else FETCH_TIERS,
+            validator=site.create_page_validator(params['filter_url'], parser),
+            accountant=shared['accountant'],
+            api_limiter=shared['api_limiter'],
+            host_limiter=shared['host_limiter'],
+            checkpoint=checkpoint,
+            resume=args.resume,
+            session=shared['session'],
+            rules=_create_crawl_rules(site, params, args.max_depth),
+            sitemaps=args.sitemap,
+            sitemap_since=args.sitemap_since,
+            max_bytes=args.max_page_bytes or DEFAULT_MAX_BYTES,
+        )
+        writer: Writer = _get_writer(append=args.resume, store=args.store is not None, site=site_name)
+        if isinstance(writer, SqliteContactStore):
+            # A resumed or incremental run, or one that did not reach every page, has not seen every contact.
+            writer.is_full_crawl = lambda: scraper.crawled_everything and not (args.resume or args.sitemap_since)
+        if args.warc:
+            scraper.archive = WarcWriter(_site_path_for(args.warc, site_name, sites))
+
+        command_input = [
+            params['start_url'],
+            params['query_parameter_key'],
+            params['total_pages'],
+            params['filter_url'],
+            params['sample_url'],
+            params['wanted_list'],
+            scraper,
+            parser,
+            writer,
+            args.store or params['output_file'],
+        ]
+
+        try:
+            site.execute(create_command(command_input))
+        finally:
+            if scraper.archive is not None:
+                scraper.archive.close()
+            # Each job opens its own checkpoint, so the job closes it, flushing the last recorded pages.
+            checkpoint.close()
+
+    return Job(site_name, _run)
+
+
+def _get_parser(site_name: str, params: Dict[str, Any], args: argparse.Namespace, shared: Dict[str, Any]) -> Parser:
+    # A parser is trained or loaded once per site and process, then reused by every later job for that site.
+    parsers: Dict[str, Parser] = shared['parsers']
+    parser = parsers.get(site_name)
+    if parser is None:
+        parser = _create_parser(
+            params['sample_url'],
+            params['wanted_list'],
+            store=shared['model_store'],
+            retrain=args.retrain_parser,
+            workers=args.parse_workers,
+        )
+        parsers[site_name] = parser
+    return parser
+
+
+def create_shared(args: argparse.Namespace, sites: Sequence[str], store: ModelStore) -> Dict[str, Any]:
+    from scrapr.action.scrape import create_session
+
+    cache_ttls = [get_params(site_name)['filter_url'] for site_name in sites]
+    # Every job shares one connection pool, cache, credit budget, set of rate limits and trained parsers.
+    return {
+        'model_store': store,
+        'cache': None if args.no_cache else _create_cache(args.cache_dir, *cache_ttls),
+        'accountant': CreditAccountant(budget=args.credit_budget),
+        'api_limiter': RateLimiter(args.api_rps, args.api_concurrency),
+        'host_limiter': RateLimiter(args.host_rps, args.host_concurrency),
+        'session': create_session(pool_size=args.pool_size),
+        'parsers': {},
+    }
+
+
+def close_parsers(shared: Dict[str, Any]) -> None:
+    parsers: Dict[str, Parser] = shared['parsers']
+    for parser in parsers.values():
+        parser.close()
+
+
+def write_metrics(args: argparse.Namespace, shared: Dict[str, Any]) -> None:
+    cache: Optional[HtmlCache] = shared['cache']
+    accountant: CreditAccountant = shared['accountant']
+    if cache is not None:
+        REGISTRY.set(CACHE_HITS, cache.hits)
+        REGISTRY.set(CACHE_MISSES, cache.misses)
+    REGISTRY.set(CREDITS_SPENT, accountant.spent)
+    for tier, calls in accountant.calls.items():
+        REGISTRY.set('api_calls', calls, tier=tier)
+
+    REGISTRY.write_report(args.report)
+    logger.info("Run report written to %s.", args.report)
+    if args.prometheus_file:
+        REGISTRY.write_prometheus(args.prometheus_file)
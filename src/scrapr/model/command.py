@@ -1,10 +1,11 @@
 from typing import Dict, List, Any
 
-from scrapr.action.parse import Parser
-from scrapr.action.scrape import Scraper
-
 
 def create_command(params: List[Any]) -> Dict[str, Any]:
+    # Imported here so that importing the command model does not load the scraping and parsing libraries.
+    from scrapr.action.parse import Parser
+    from scrapr.action.scrape import Scraper
+
     if len(params) != 10:
         raise ValueError("Expected 10 parameters")
 
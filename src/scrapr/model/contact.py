@@ -2,34 +2,76 @@
 Create and manage contact entities.
 """
 
+import logging
 import uuid
-from typing import List, Dict
-from functools import reduce
+from typing import Iterable, Iterator, List, Dict, NamedTuple
 
+from scrapr.action.metrics import CONTACT_ERRORS, CONTACTS_CREATED, REGISTRY
 
-def create_contact_from(contact_attributes: List[str]) -> Dict[str, str]:
+logger = logging.getLogger(__name__)
+
+CONTACT_FIELDS = ("_id", "full_name", "specialism", "gmc_number", "patient_type", "phone_number")
+CONTACT_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://www.gmc-uk.org/registration")
+
+
+class Contact(NamedTuple):
+    id: str
+    full_name: str
+    specialism: str
+    gmc_number: str
+    patient_type: str
+    phone_number: str
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(zip(CONTACT_FIELDS, self))
+
+
+def create_contact_record_from(contact_attributes: List[str]) -> Contact:
     if len(contact_attributes) < 5:
         raise ValueError("Not enough contact_attributes provided for the contact")
 
-    return {
-        "_id": str(uuid.uuid4()),
-        "full_name": contact_attributes[0],
-        "specialism": contact_attributes[1],
-        "gmc_number": contact_attributes[2],
-        "patient_type": contact_attributes[3],
-        "phone_number": contact_attributes[4],
-    }
-
-
-def create_contacts_from(contacts_attributes: List[List[str]]) -> List[Dict[str, str]]:
-    def _process_contact(contacts: List[Dict[str, str]], contact_attributes: List[str]) -> List[Dict[str, str]]:
-        try:
-            return contacts + [create_contact_from(contact_attributes)]
-        except ValueError as e:
-            print(f"Error processing contact: {e}")
-            return contacts
-
-    return reduce(_process_contact, contacts_attributes, [])
+    return Contact(contact_id_for(contact_attributes[2]), *contact_attributes[:5])
+
+
+def contact_id_for(gmc_number: str) -> str:
+    # GMC numbers identify a doctor across runs and sites; fall back to a random id when one is missing.
+    if gmc_number.strip():
+        return str(uuid.uuid5(CONTACT_NAMESPACE, gmc_number.strip()))
+    return str(uuid.uuid4())
+
+
+def create_contact_from(contact_attributes: List[str]) -> Dict[str, str]:
+    return create_contact_record_from(contact_attributes).to_dict()
+
+
+def iter_contact_records_from(contacts_attributes: Iterable[List[str]]) -> Iterator[Contact]:
+    # Counted locally and published once, as this loop runs for every contact.
+    created = errors = 0
+    try:
+        for contact_attributes in contacts_attributes:
+            try:
+                contact = create_contact_record_from(contact_attributes)
+            except ValueError as e:
+                errors += 1
+                logger.warning("Error processing contact: %s", e)
+                continue
+            created += 1
+            yield contact
+    finally:
+        REGISTRY.inc(CONTACTS_CREATED, created)
+        REGISTRY.inc(CONTACT_ERRORS, errors)
+
+
+def iter_contacts_from(contacts_attributes: Iterable[List[str]]) -> Iterator[Dict[str, str]]:
+    return to_rows(iter_contact_records_from(contacts_attributes))
+
+
+def create_contacts_from(contacts_attributes: Iterable[List[str]]) -> List[Dict[str, str]]:
+    return list(iter_contacts_from(contacts_attributes))
+
+
+def to_rows(contacts: Iterable[Contact]) -> Iterator[Dict[str, str]]:
+    return (contact.to_dict() for contact in contacts)
 
 
 if __name__ == "__main__":
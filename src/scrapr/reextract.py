@@ -0,0 +1,101 @@
+"""
+Re-extract contacts from a WARC archive without network calls.
+
+    python -m scrapr.reextract crawl.warc.gz --site uic --workers 8
+"""
+
+import argparse
+import logging
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from scrapr.action.model_store import ModelStore
+from scrapr.action.parse import Parser
+from scrapr.action.persist import CsvWriter, Writer
+from scrapr.action.store import SqliteContactStore
+from scrapr.action.urls import canonicalise_url
+from scrapr.action.warc import iter_warc_pages
+from scrapr.log import configure_logging
+from scrapr.model import contact
+from scrapr.sites import get_site
+
+logger = logging.getLogger(__name__)
+
+
+def find_page(filename: str, url: str) -> Optional[str]:
+    key = canonicalise_url(url)
+    return next((html for page_url, html in iter_warc_pages(filename) if canonicalise_url(page_url) == key), None)
+
+
+def iter_detail_pages(filename: str, filter_url: str) -> Iterator[Tuple[str, str]]:
+    # Archives appended over several runs hold a page more than once, and the last copy is the freshest.
+    # A first pass finds where each page was last archived, so pages are never all held in memory at once.
+    latest: Dict[str, int] = {}
+    for position, (url, _) in enumerate(iter_warc_pages(filename)):
+        if url.startswith(filter_url):
+            latest[canonicalise_url(url)] = position
+    for position, (url, html) in enumerate(iter_warc_pages(filename)):
+        if url.startswith(filter_url) and latest.get(canonicalise_url(url)) == position:
+            yield url, html
+
+
+def create_parser(filename: str, sample_url: str, wanted_list: List[str], args: argparse.Namespace) -> Parser:
+    store = ModelStore(args.model_dir)
+    if not args.retrain_parser and os.path.exists(store.path_for(ModelStore.key_for(sample_url, wanted_list))):
+        return Parser(sample_url, wanted_list, store=store, workers=args.workers)
+
+    sample_html = find_page(filename, sample_url)
+    if sample_html is None:
+        logger.warning("%s is not in %s; downloading it to train the parser.", sample_url, filename)
+    return Parser(
+        sample_url, wanted_list, store=store, retrain=args.retrain_parser, workers=args.workers, html=sample_html
+    )
+
+
+def reextract(filename: str, filter_url: str, parser: Parser, writer: Writer, output_file: str) -> None:
+    pages = iter_detail_pages(filename, filter_url)
+    contacts = contact.iter_contact_records_from(parser.iter_results_from_html(pages))
+    writer(contact.to_rows(contacts), output_file)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(
+        prog='scrapr.reextract', description='Extract contacts again from the pages archived by a crawl.'
+    )
+    arg_parser.add_argument('warc', help='WARC file written by scrapr --warc.')
+    arg_parser.add_argument('--site', default='uic', help='Site whose parser and pages to use.')
+    arg_parser.add_argument('--output', help="Output file; defaults to the site's usual output file.")
+    arg_parser.add_argument(
+        '--store', metavar='PATH', help='Upsert contacts into this SQLite database instead of writing a CSV file.'
+    )
+    arg_parser.add_argument(
+        '--workers', type=int, default=os.cpu_count() or 1, help='Number of processes extracting contacts.'
+    )
+    arg_parser.add_argument('--model-dir', default='.scrapr/models', help='Directory of trained parser models.')
+    arg_parser.add_argument(
+        '--retrain-parser', action='store_true', help='Retrain the parser from the archived sample page.'
+    )
+    arg_parser.add_argument('--log-level', default='INFO', help='Logging level, such as DEBUG, INFO or WARNING.')
+    arg_parser.add_argument('--log-json', action='store_true', help='Log one JSON object per line.')
+    return arg_parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    configure_logging(args.log_level, json_format=args.log_json)
+    params = get_site(args.site).PARAMS
+
+    parser = create_parser(args.warc, params['sample_url'], params['wanted_list'], args)
+    try:
+        writer: Writer = CsvWriter()
+        if args.store:
+            writer = SqliteContactStore(args.site)
+            # The archive may hold only part of a crawl, so re-extracting it cannot show which contacts were removed.
+            writer.is_full_crawl = lambda: False
+        reextract(args.warc, params['filter_url'], parser, writer, args.store or args.output or params['output_file'])
+    finally:
+        parser.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Discover the sites scrapr knows how to scrape.
+"""
+
+import importlib
+import pkgutil
+from importlib.metadata import entry_points
+from types import ModuleType
+from typing import Dict
+
+ENTRY_POINT_GROUP = 'scrapr.sites'
+
+# A site is a module with a PARAMS dict, an execute(command) function and a
+# create_page_validator(filter_url, parser) function. Modules in this package are
+# found by name; other packages can add sites through the 'scrapr.sites' entry point group.
+REQUIRED_ATTRIBUTES = ('PARAMS', 'execute', 'create_page_validator')
+
+
+def load_sites() -> Dict[str, ModuleType]:
+    sites: Dict[str, ModuleType] = {}
+    for module_info in pkgutil.iter_modules(__path__):
+        if not module_info.name.startswith('_'):
+            sites[module_info.name] = importlib.import_module(f'{__name__}.{module_info.name}')
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        sites.setdefault(entry_point.name, entry_point.load())
+    return {name: site for name, site in sites.items() if _is_site(site)}
+
+
+def get_site(name: str) -> ModuleType:
+    sites = load_sites()
+    if name not in sites:
+        raise ValueError(f"Unknown site '{name}'; expected one of {sorted(sites)}")
+    return sites[name]
+
+
+def _is_site(module: ModuleType) -> bool:
+    return all(hasattr(module, attribute) for attribute in REQUIRED_ATTRIBUTES)
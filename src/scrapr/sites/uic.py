@@ -1,39 +1,106 @@
+from __future__ import annotations
+
+import re
 from functools import partial
-from typing import List, Dict, Any, Callable
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 
-from scrapr.action.parse import Parser
-from scrapr.action.scrape import Scraper
+from scrapr.action.metrics import REGISTRY
+from scrapr.action.persist import Writer
+from scrapr.action.pipeline import Acknowledger
 from scrapr.model import contact
 
+# Loading the site registry imports this module, so the scraping libraries wait until a crawl needs them.
+if TYPE_CHECKING:
+    from scrapr.action.crawl import CrawlRules
+    from scrapr.action.links import LinkExtractor
+    from scrapr.action.parse import Parser
+    from scrapr.action.scrape import Scraper, Validator
+
+PARAMS: Dict[str, Any] = {
+    'start_url': 'https://ulsterindependentclinic.com/consultants/',
+    'query_parameter_key': '?page_2826c=',
+    # 0 discovers the number of listing pages from the site's pager.
+    'total_pages': 0,
+    'filter_url': 'https://ulsterindependentclinic.com/consultant/',
+    'sample_url': 'https://ulsterindependentclinic.com/consultant/3353330/',
+    'wanted_list': ["Mr. Robin Adair", "ENT", "3353330", "Adults & Children", "028 9068 7444"],
+    'output_file': 'uic_consultant_contacts.csv',
+}
+
 
 def execute(command: Dict[str, Any]) -> None:
+    from scrapr.action.scrape import DISCOVER_STAGE
+
     scraper: Scraper = command.get('scraper')  # type: ignore
     parser: Parser = command.get('parser')  # type: ignore
-    write: Callable[List[Dict[str, str]], None] = command.get('writer')  # type: ignore
+    write: Callable[[Iterable[Dict[str, str]], str], None] = command.get('writer')  # type: ignore
     filter_url: str = command.get('filter_url')  # type: ignore
     start_url: str = command.get('start_url')  # type: ignore
     query_parameter_key: str = command.get('query_parameter_key')  # type: ignore
     total_pages: int = command.get('total_pages')  # type: ignore
     output_file: str = command.get('output_file')  # type: ignore
 
-    get_contact_urls = partial(_get_contact_urls, filter_url=filter_url, scraper=scraper)
+    get_contact_pages = partial(_get_contact_pages, filter_url=filter_url, scraper=scraper)
 
-    target_urls = _get_target_urls(
-        start_url=start_url,
-        query_parameter_key=query_parameter_key,
-        total_pages=total_pages,
-        scraper=scraper,
-    )
+    # Consultant pages listed in a sitemap need no listing pages at all; crawl only when there is no sitemap.
+    # A sitemap listing nothing new means there is nothing to fetch, not that the listing pages should be crawled.
+    with REGISTRY.stage(DISCOVER_STAGE):
+        sitemap_urls = scraper.discover_urls_from_sitemaps(start_url, filter_url)
+        if sitemap_urls is None and total_pages == 0:
+            total_pages = scraper.discover_total_pages(start_url, query_parameter_key, filter_url)
+    if sitemap_urls is not None:
+        target_urls = sitemap_urls
+    else:
+        target_urls = _get_target_urls(
+            start_url=start_url,
+            query_parameter_key=query_parameter_key,
+            total_pages=total_pages,
+            scraper=scraper,
+        )
 
-    contact_urls = get_contact_urls(target_urls)
-    contacts_list = parser.get_results(contact_urls)
+    # Each stage pulls from the previous one, so contacts reach the writer as soon as their page is crawled.
+    # A page is checkpointed as done only once the writer has flushed the rows it produced.
+    acknowledger = Acknowledger(scraper.acknowledge)
+    contact_pages = acknowledger.pages(get_contact_pages(target_urls))
+    contacts_list = acknowledger.results(parser.iter_results_from_html(contact_pages))
 
-    write(contact.create_contacts_from(contacts_list), output_file)
+    contacts = contact.iter_contact_records_from(contacts_list)
 
+    if isinstance(write, Writer):
+        write.on_flush = acknowledger.flushed
+    try:
+        write(acknowledger.rows(contact.to_rows(contacts)), output_file)
+    finally:
+        if isinstance(write, Writer):
+            write.on_flush = None
+    acknowledger.finish()
 
-def _get_contact_urls(target_urls: List[str], filter_url: str, scraper: Scraper) -> List[str]:
-    return scraper.extract_urls_from_targets(target_urls=target_urls, filter_url=filter_url)
+
+def _get_contact_pages(target_urls: List[str], filter_url: str, scraper: Scraper) -> Iterator[Tuple[str, str]]:
+    return scraper.iter_pages_from_targets(target_urls=target_urls, filter_url=filter_url)
 
 
 def _get_target_urls(start_url: str, query_parameter_key: str, total_pages: int, scraper: Scraper) -> List[str]:
     return scraper.get_target_contact_urls(start_url, query_parameter_key, total_pages)
+
+
+def create_page_validator(filter_url: str, parser: Parser, extract_links: Optional[LinkExtractor] = None) -> Validator:
+    from scrapr.action.links import get_link_extractor
+
+    # Consultant pages must have the layout the parser learned; extraction itself happens once, later in the pipeline.
+    # Listing pages must link to at least one consultant.
+    find_links = extract_links or get_link_extractor()
+
+    def _is_valid_page(url: str, html: str) -> bool:
+        if url.startswith(filter_url):
+            return parser.matches_layout(html)
+        return any(link.startswith(filter_url) for link in find_links(html, url))
+
+    return _is_valid_page
+
+
+def create_crawl_rules(start_url: str, filter_url: str, max_depth: int = 1) -> CrawlRules:
+    from scrapr.action.crawl import CrawlRules
+
+    # Listing pages link to consultants; consultant pages are leaves and go straight to extraction.
+    return CrawlRules(listing=[f'^{re.escape(start_url)}'], detail=[f'^{re.escape(filter_url)}'], max_depth=max_depth)
@@ -0,0 +1,175 @@
+"""
+Run queued site jobs back to back in one warm process.
+
+    python -m scrapr.worker enqueue uic --pages 3 --output uic-refresh.csv
+    python -m scrapr.worker run --no-cache
+    python -m scrapr.worker status
+"""
+
+import argparse
+import logging
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from scrapr import jobs
+from scrapr.action.jobqueue import JobQueue, JobSpec
+from scrapr.action.metrics import CONTACTS_CREATED, REGISTRY, ROWS_WRITTEN
+from scrapr.action.model_store import ModelStore
+from scrapr.action.throttle import CreditAccountant
+from scrapr.log import configure_logging
+from scrapr.sites import load_sites
+
+logger = logging.getLogger(__name__)
+
+Execute = Callable[[JobSpec], Dict[str, Any]]
+
+
+def run_worker(
+    queue: JobQueue,
+    execute: Execute,
+    poll_interval: float = 5.0,
+    once: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    stop = stop or threading.Event()
+    processed = 0
+    while not stop.is_set():
+        job = queue.claim()
+        if job is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+
+        logger.info("Starting job %d for %s.", job.id, job.spec.site)
+        try:
+            result = execute(job.spec)
+        except Exception as e:
+            logger.error("Job %d for %s failed: %s", job.id, job.spec.site, e, exc_info=e)
+            queue.fail(job.id, f'{type(e).__name__}: {e}')
+        except BaseException:
+            queue.release(job.id)
+            raise
+        else:
+            queue.complete(job.id, result)
+            logger.info("Job %d for %s finished.", job.id, job.spec.site)
+        processed += 1
+    return processed
+
+
+def create_executor(args: argparse.Namespace, app_config: Dict[str, str], shared: Dict[str, Any]) -> Execute:
+    # Every registered site gets its own checkpoint and archive, whichever sites the queue asks for.
+    sites = sorted(load_sites())
+
+    def _execute(spec: JobSpec) -> Dict[str, Any]:
+        overrides: Dict[str, Any] = {}
+        if spec.start_url is not None:
+            overrides['start_url'] = spec.start_url
+        if spec.pages is not None:
+            overrides['total_pages'] = spec.pages
+        if spec.output is not None:
+            overrides['output_file'] = spec.output
+
+        # The credit budget, metrics and cache counters apply to each job rather than to the lifetime of the worker,
+        # so every report covers its own job and measures its rates from the job's start.
+        shared['accountant'] = CreditAccountant(budget=args.credit_budget)
+        REGISTRY.reset()
+        if shared['cache'] is not None:
+            shared['cache'].hits = shared['cache'].misses = 0
+        started = time.monotonic()
+        try:
+            jobs.create_job(spec.site, args, app_config, sites, shared, overrides).run()
+        finally:
+            jobs.write_metrics(args, shared)
+        return {
+            'rows_written': REGISTRY.value(ROWS_WRITTEN),
+            'contacts_created': REGISTRY.value(CONTACTS_CREATED),
+            'credits_spent': shared['accountant'].spent,
+            'seconds': round(time.monotonic() - started, 3),
+            'output': args.store or overrides.get('output_file') or jobs.get_params(spec.site)['output_file'],
+        }
+
+    return _execute
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(
+        prog='scrapr.worker',
+        description='Queue site jobs and run them in a long-lived worker. '
+        'Options of the run command that it does not know are scrapr options applied to every job.',
+    )
+    arg_parser.add_argument('--queue', default='.scrapr/jobs.sqlite', help='SQLite file holding the job queue.')
+    arg_parser.add_argument('--log-level', default='INFO', help='Logging level, such as DEBUG, INFO or WARNING.')
+    arg_parser.add_argument('--log-json', action='store_true', help='Log one JSON object per line.')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    enqueue = commands.add_parser('enqueue', help='Add a job to the queue.')
+    enqueue.add_argument('site', help='Site to scrape.')
+    enqueue.add_argument('--start-url', help="Listing page to start from instead of the site's own.")
+    enqueue.add_argument('--pages', type=int, help='Number of listing pages; 0 discovers them.')
+    enqueue.add_argument('--output', help="Output file instead of the site's own.")
+
+    run = commands.add_parser('run', help='Run queued jobs until stopped.')
+    run.add_argument('--once', action='store_true', help='Exit once the queue is empty.')
+    run.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to wait when the queue is empty.')
+
+    status = commands.add_parser('status', help='List jobs and their results.')
+    status.add_argument('--status', choices=['queued', 'running', 'done', 'failed'], help='Only list these jobs.')
+
+    args, job_argv = arg_parser.parse_known_args(argv)
+    if job_argv and args.command != 'run':
+        arg_parser.error(f"unrecognized arguments: {' '.join(job_argv)}")
+    args.job_argv = job_argv
+    return args
+
+
+def _enqueue(queue: JobQueue, args: argparse.Namespace) -> None:
+    if args.site not in load_sites():
+        raise SystemExit(f"Unknown site: {args.site}")
+    job_id = queue.enqueue(JobSpec(args.site, args.start_url, args.pages, args.output))
+    print(f"Queued job {job_id} for {args.site}.")
+
+
+def _print_status(queue: JobQueue, args: argparse.Namespace) -> None:
+    for job in queue.jobs(args.status):
+        detail = job.error if job.error is not None else job.result or ''
+        print(f"{job.id}\t{job.spec.site}\t{job.status}\t{detail}")
+
+
+def _run(queue: JobQueue, args: argparse.Namespace) -> None:
+    job_args = jobs.parse_args(args.job_argv)
+    # Configuration, pools, cache and parsers are loaded once and stay warm for every job.
+    app_config = jobs.get_config()
+    shared = jobs.create_shared(job_args, sorted(load_sites()), ModelStore(job_args.model_dir))
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        processed = run_worker(
+            queue, create_executor(job_args, app_config, shared), args.poll_interval, once=args.once, stop=stop
+        )
+    finally:
+        shared['session'].close()
+        jobs.close_parsers(shared)
+    logger.info("Worker stopped after %d jobs.", processed)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    configure_logging(args.log_level, json_format=args.log_json)
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == 'enqueue':
+            _enqueue(queue, args)
+        elif args.command == 'status':
+            _print_status(queue, args)
+        else:
+            _run(queue, args)
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from scrapr.action.cache import HtmlCache
+
+OPTIONS = {"render": "true"}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HtmlCache(str(tmp_path / "cache"))
+
+
+def test_get_returns_none_when_not_cached(cache):
+    assert cache.get("https://example.com/a", OPTIONS) is None
+    assert cache.misses == 1
+
+
+def test_put_then_get_round_trips_html(cache):
+    cache.put("https://example.com/a", OPTIONS, "<html>á</html>")
+
+    assert cache.get("https://example.com/a", OPTIONS) == "<html>á</html>"
+    assert cache.hits == 1
+
+
+def test_key_uses_canonical_url_and_options(cache):
+    cache.put("https://example.com/a/", OPTIONS, "<html></html>")
+
+    assert cache.get("https://example.com/a#top", OPTIONS) == "<html></html>"
+    assert cache.get("https://example.com/a", {"render": "false"}) is None
+
+
+def test_entries_are_compressed(cache):
+    html = "<p>consultant</p>" * 1000
+    cache.put("https://example.com/a", OPTIONS, html)
+
+    assert 0 < cache.size() < len(html) / 10
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = HtmlCache(str(tmp_path), default_ttl=60)
+    cache.put("https://example.com/a", OPTIONS, "old")
+
+    assert cache.get("https://example.com/a", OPTIONS) == "old"
+
+    now = time.time()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        assert cache.get("https://example.com/a", OPTIONS) is None
+
+
+def test_ttl_is_chosen_by_url_pattern(tmp_path):
+    cache = HtmlCache(str(tmp_path), default_ttl=60, ttls=[("/consultant/", None), (r"\?page=", 5)])
+
+    assert cache.ttl_for("https://example.com/consultant/1") is None
+    assert cache.ttl_for("https://example.com/consultants?page=2") == 5
+    assert cache.ttl_for("https://example.com/about") == 60
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = HtmlCache(str(tmp_path), max_bytes=10_000, compresslevel=0)
+    cache.put("https://example.com/a", OPTIONS, "a" * 4000)
+    cache.put("https://example.com/b", OPTIONS, "b" * 4000)
+    assert cache.get("https://example.com/a", OPTIONS) is not None
+
+    with patch("os.path.getmtime") as mock_getmtime:
+        cache.put("https://example.com/c", OPTIONS, "c" * 4000)
+    mock_getmtime.assert_not_called()
+
+    assert cache.size() <= 10_000
+    assert cache.get("https://example.com/b", OPTIONS) is None
+    assert cache.get("https://example.com/a", OPTIONS) is not None
+    assert cache.get("https://example.com/c", OPTIONS) is not None
+
+
+def test_eviction_order_survives_restart(tmp_path):
+    cache = HtmlCache(str(tmp_path), compresslevel=0)
+    cache.put("https://example.com/a", OPTIONS, "a" * 4000)
+    cache.put("https://example.com/b", OPTIONS, "b" * 4000)
+    past = time.time() - 100
+    os.utime(cache._path_for(cache.key_for("https://example.com/b", OPTIONS)), (past, past))
+
+    reopened = HtmlCache(str(tmp_path), max_bytes=10_000, compresslevel=0)
+    reopened.put("https://example.com/c", OPTIONS, "c" * 4000)
+
+    assert reopened.get("https://example.com/b", OPTIONS) is None
+    assert reopened.get("https://example.com/a", OPTIONS) is not None
+
+
+def test_stale_entries_are_served_when_allowed(tmp_path):
+    cache = HtmlCache(str(tmp_path), default_ttl=60)
+    cache.put("https://example.com/a", OPTIONS, "old")
+
+    now = time.time()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        assert cache.get("https://example.com/a", OPTIONS, allow_stale=True) == "old"
+
+
+def test_cache_survives_restart(tmp_path):
+    HtmlCache(str(tmp_path)).put("https://example.com/a", OPTIONS, "persisted")
+
+    reopened = HtmlCache(str(tmp_path))
+
+    assert reopened.size() > 0
+    assert reopened.get("https://example.com/a", OPTIONS) == "persisted"
+
+
+def test_clear_removes_every_entry(cache):
+    cache.put("https://example.com/a", OPTIONS, "a")
+    cache.clear()
+
+    assert cache.size() == 0
+    assert cache.get("https://example.com/a", OPTIONS) is None
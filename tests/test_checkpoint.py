@@ -0,0 +1,53 @@
+import pytest
+
+from scrapr.action.checkpoint import DONE, FAILED, PENDING, CrawlCheckpoint
+
+
+@pytest.fixture
+def checkpoint_path(tmp_path):
+    return str(tmp_path / "state" / "checkpoint.sqlite")
+
+
+def test_load_empty_checkpoint(checkpoint_path):
+    assert CrawlCheckpoint(checkpoint_path).load() == ([], set())
+
+
+def test_records_are_buffered_until_interval(checkpoint_path):
+    checkpoint = CrawlCheckpoint(checkpoint_path, interval=3600)
+    checkpoint.record("a", "https://example.com/a", PENDING)
+
+    assert CrawlCheckpoint(checkpoint_path).load() == ([], set())
+
+    checkpoint.flush()
+    assert CrawlCheckpoint(checkpoint_path).load() == (["https://example.com/a"], {"a"})
+
+
+def test_zero_interval_writes_every_record(checkpoint_path):
+    checkpoint = CrawlCheckpoint(checkpoint_path, interval=0)
+    checkpoint.record("a", "https://example.com/a", PENDING)
+
+    assert CrawlCheckpoint(checkpoint_path).load()[1] == {"a"}
+
+
+def test_load_returns_unfinished_pages_in_discovery_order(checkpoint_path):
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+    for key in "abcd":
+        checkpoint.record(key, f"https://example.com/{key}", PENDING)
+    checkpoint.record("a", "https://example.com/a", DONE)
+    checkpoint.record("b", "https://example.com/b", FAILED)
+    checkpoint.close()
+
+    frontier, seen = CrawlCheckpoint(checkpoint_path).load()
+
+    assert frontier == ["https://example.com/c", "https://example.com/d", "https://example.com/b"]
+    assert seen == {"a", "b", "c", "d"}
+
+
+def test_statuses_and_clear(checkpoint_path):
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+    checkpoint.record("a", "https://example.com/a", DONE)
+
+    assert checkpoint.statuses() == {"https://example.com/a": DONE}
+
+    checkpoint.clear()
+    assert checkpoint.statuses() == {}
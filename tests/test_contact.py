@@ -2,7 +2,10 @@ import pytest
 import uuid
 from typing import List, Dict
 
-from scrapr.model.contact import create_contact_from, create_contacts_from
+from scrapr.action.metrics import REGISTRY
+
+from scrapr.model.contact import (CONTACT_FIELDS, Contact, contact_id_for, create_contact_from, create_contact_record_from,
+                                  create_contacts_from, iter_contact_records_from, iter_contacts_from, to_rows)
 
 @pytest.fixture
 def valid_contact_attributes() -> List[str]:
@@ -69,7 +72,7 @@ def test_create_contacts_from_empty_list():
     contacts = create_contacts_from([])
     assert contacts == []
 
-def test_create_contacts_from_mixed_valid_invalid(valid_contact_attributes, capsys):
+def test_create_contacts_from_mixed_valid_invalid(valid_contact_attributes, caplog):
     invalid_attributes = ["Invalid", "Data"]  # Insufficient attributes
     mixed_attributes = [
         valid_contact_attributes,
@@ -82,11 +85,18 @@ def test_create_contacts_from_mixed_valid_invalid(valid_contact_attributes, caps
     # Check that only valid contacts were created
     assert len(contacts) == 2
 
-    # Verify error message was printed for invalid contact
-    captured = capsys.readouterr()
-    assert "Error processing contact: Not enough contact_attributes provided for the contact" in captured.out
+    # Verify error message was logged for invalid contact
+    assert "Error processing contact: Not enough contact_attributes provided for the contact" in caplog.text
+
+def test_contacts_created_and_errors_are_counted(valid_contact_attributes):
+    REGISTRY.reset()
+
+    create_contacts_from([valid_contact_attributes, ["Invalid"], valid_contact_attributes])
 
-def test_create_contacts_from_all_invalid(capsys):
+    assert REGISTRY.value("contacts_created") == 2
+    assert REGISTRY.value("contact_errors") == 1
+
+def test_create_contacts_from_all_invalid(caplog):
     invalid_attributes = [
         ["Invalid1"],
         ["Invalid2", "Data"],
@@ -98,9 +108,8 @@ def test_create_contacts_from_all_invalid(capsys):
     # Check that no contacts were created
     assert contacts == []
 
-    # Verify error messages were printed
-    captured = capsys.readouterr()
-    assert captured.out.count("Error processing contact") == 3
+    # Verify error messages were logged
+    assert caplog.text.count("Error processing contact") == 3
 
 def test_contact_ids_are_unique(valid_contacts_attributes):
     contacts = create_contacts_from(valid_contacts_attributes)
@@ -135,3 +144,55 @@ def test_create_contact_from_with_empty_strings():
     assert contact["gmc_number"] == ""
     assert contact["patient_type"] == ""
     assert contact["phone_number"] == ""
+
+def test_iter_contacts_from_is_lazy(valid_contact_attributes, caplog):
+    consumed = []
+
+    def _attributes():
+        for attributes in [valid_contact_attributes, ["Invalid"], valid_contact_attributes]:
+            consumed.append(attributes)
+            yield attributes
+
+    contacts = iter_contacts_from(_attributes())
+    assert consumed == []
+
+    assert next(contacts)["full_name"] == "John Doe"
+    assert len(consumed) == 1
+    assert len(list(contacts)) == 1
+    assert "Error processing contact" in caplog.text
+
+def test_create_contact_record_from_valid_attributes(valid_contact_attributes):
+    record = create_contact_record_from(valid_contact_attributes + ["extra"])
+
+    assert isinstance(record, Contact)
+    assert record[1:] == tuple(valid_contact_attributes)
+    assert not hasattr(record, "__dict__")
+
+def test_contact_to_dict_matches_persisted_fields(valid_contact_attributes):
+    row = create_contact_record_from(valid_contact_attributes).to_dict()
+
+    assert tuple(row) == CONTACT_FIELDS
+    assert row["phone_number"] == "123-456-7890"
+
+def test_to_rows_converts_records_lazily(valid_contacts_attributes):
+    rows = to_rows(iter_contact_records_from(valid_contacts_attributes))
+
+    assert next(rows)["full_name"] == "John Doe"
+    assert next(rows)["full_name"] == "Jane Smith"
+
+def test_create_contacts_from_accepts_generator():
+    contacts = create_contacts_from(["Name", "Spec", str(i), "Adult", "028"] for i in range(20000))
+
+    assert len(contacts) == 20000
+    assert contacts[-1]["gmc_number"] == "19999"
+
+
+def test_contact_id_is_stable_for_gmc_number():
+    first = create_contact_from(["Dr A", "ENT", "3353330", "Adults", "028"])
+    second = create_contact_from(["Dr A.", "Cardiology", " 3353330 ", "Children", "029"])
+
+    assert first["_id"] == second["_id"] == contact_id_for("3353330")
+
+
+def test_contact_id_without_gmc_number_is_random():
+    assert contact_id_for("") != contact_id_for("")
@@ -0,0 +1,286 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from requests.exceptions import RequestException
+
+from scrapr.action.checkpoint import DONE, FAILED, PENDING, CrawlCheckpoint
+from scrapr.action.crawl import DETAIL, LISTING, CrawlEngine, CrawlRules
+from scrapr.action.throttle import CreditBudgetReachedException
+
+SITE = {
+    "https://example.com": {"https://example.com/a", "https://example.com/b"},
+    "https://example.com/a": {"https://example.com/c", "https://example.com"},
+    "https://example.com/b": {"https://example.com/c"},
+    "https://example.com/c": set(),
+}
+
+
+def _links_from_site(html, url):
+    return SITE[url.rstrip("/")]
+
+
+def test_crawl_visits_every_reachable_page_once():
+    fetched = []
+    engine = CrawlEngine(fetch=lambda url: fetched.append(url) or url, extract_links=_links_from_site)
+
+    result = asyncio.run(engine.crawl(["https://example.com"]))
+
+    assert result == set(SITE)
+    assert sorted(fetched) == sorted(SITE)
+
+
+def test_crawl_bounds_requests_in_flight():
+    lock = threading.Lock()
+    state = {"current": 0, "peak": 0}
+    pages = {f"https://example.com/{i}" for i in range(20)}
+
+    def _fetch(url):
+        with lock:
+            state["current"] += 1
+            state["peak"] = max(state["peak"], state["current"])
+        time.sleep(0.01)
+        with lock:
+            state["current"] -= 1
+        return url
+
+    def _links(html, url):
+        return pages if url == "https://example.com" else set()
+
+    engine = CrawlEngine(fetch=_fetch, extract_links=_links, max_in_flight=4)
+
+    result = asyncio.run(engine.crawl(["https://example.com"]))
+
+    assert result == pages | {"https://example.com"}
+    assert 1 < state["peak"] <= 4
+
+
+def test_crawl_continues_after_recoverable_error(caplog):
+    def _fetch(url):
+        if url == "https://example.com/a":
+            raise RequestException("boom")
+        return url
+
+    engine = CrawlEngine(fetch=_fetch, extract_links=_links_from_site)
+
+    result = asyncio.run(engine.crawl(["https://example.com"]))
+
+    assert result == set(SITE)
+    assert "An error occurred: boom. Continuing..." in caplog.text
+
+
+def test_crawl_propagates_unrecoverable_error():
+    class FatalError(Exception):
+        pass
+
+    def _fetch(url):
+        raise FatalError()
+
+    engine = CrawlEngine(fetch=_fetch, extract_links=_links_from_site)
+
+    with pytest.raises(FatalError):
+        asyncio.run(engine.crawl(["https://example.com", "https://example.com/b"]))
+
+
+def test_crawl_engine_rejects_empty_pool():
+    with pytest.raises(ValueError):
+        CrawlEngine(fetch=str, extract_links=_links_from_site, max_in_flight=0)
+
+
+def test_crawl_shares_frontier_across_seeds_and_counts_duplicates():
+    fetched = []
+    engine = CrawlEngine(fetch=lambda url: fetched.append(url) or url, extract_links=_links_from_site)
+
+    result = asyncio.run(engine.crawl(["https://example.com", "https://example.com/b/"]))
+
+    assert result == (set(SITE) - {"https://example.com/b"}) | {"https://example.com/b/"}
+    assert len(fetched) == len(SITE)
+    # /b from the root page, /c from the second page and the root from /a
+    assert engine.fetches_avoided == 3
+
+
+def test_crawl_uses_pluggable_canonicaliser():
+    engine = CrawlEngine(fetch=str, extract_links=_links_from_site, canonicalise=lambda url: "same")
+
+    result = asyncio.run(engine.crawl(["https://example.com"]))
+
+    assert result == {"https://example.com"}
+    assert engine.fetches_avoided == 2
+
+
+def test_crawl_stops_scheduling_when_budget_is_reached(caplog):
+    pages = {f"https://example.com/{i}" for i in range(10)}
+    fetched = []
+
+    def _fetch(url):
+        if len(fetched) >= 3:
+            raise CreditBudgetReachedException()
+        fetched.append(url)
+        return url
+
+    def _links(html, url):
+        return pages if url == "https://example.com" else set()
+
+    engine = CrawlEngine(fetch=_fetch, extract_links=_links, max_in_flight=1)
+    pages_seen = []
+
+    result = asyncio.run(engine.crawl(["https://example.com"], on_page=lambda url, html: pages_seen.append(url)))
+
+    assert len(fetched) == 3
+    assert pages_seen == fetched
+    assert len(result) == 4
+    assert isinstance(engine.stopped, CreditBudgetReachedException)
+    assert "Stopping crawl" in caplog.text
+
+
+def test_crawl_resumes_from_checkpoint_without_refetching(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite")
+    pages = {f"https://example.com/{i}" for i in range(6)}
+    fetched = []
+
+    def _links(html, url):
+        return pages if url == "https://example.com" else set()
+
+    def _fetch_with_budget(url):
+        if len(fetched) >= 3:
+            raise CreditBudgetReachedException()
+        fetched.append(url)
+        return url
+
+    first = CrawlEngine(
+        fetch=_fetch_with_budget, extract_links=_links, max_in_flight=1, checkpoint=CrawlCheckpoint(path)
+    )
+    asyncio.run(first.crawl(["https://example.com"]))
+    fetched_first = list(fetched)
+
+    fetched.clear()
+    resumed = CrawlEngine(
+        fetch=lambda url: fetched.append(url) or url,
+        extract_links=_links,
+        checkpoint=CrawlCheckpoint(path),
+        resume=True,
+    )
+    asyncio.run(resumed.crawl(["https://example.com"]))
+
+    assert len(fetched_first) == 3
+    assert set(fetched_first).isdisjoint(fetched)
+    assert set(fetched_first) | set(fetched) == pages | {"https://example.com"}
+    assert set(CrawlCheckpoint(path).statuses().values()) == {DONE}
+
+
+def test_crawl_leaves_deferred_pages_pending_for_the_consumer(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite")
+    checkpoint = CrawlCheckpoint(path)
+    rules = CrawlRules(listing=["^https://example.com$"], detail=["^https://example.com/"])
+    engine = CrawlEngine(
+        fetch=lambda url: url, extract_links=_links_from_site, checkpoint=checkpoint, rules=rules, defer_done=True
+    )
+
+    asyncio.run(engine.crawl(["https://example.com"], on_page=lambda url, html: None))
+
+    assert checkpoint.statuses() == {
+        "https://example.com": DONE,
+        "https://example.com/a": PENDING,
+        "https://example.com/b": PENDING,
+    }
+
+
+def test_crawl_retries_failed_pages_on_resume(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite")
+
+    def _failing(url):
+        if url == "https://example.com/b":
+            raise RequestException("boom")
+        return url
+
+    asyncio.run(
+        CrawlEngine(fetch=_failing, extract_links=_links_from_site, checkpoint=CrawlCheckpoint(path)).crawl(
+            ["https://example.com"]
+        )
+    )
+    assert CrawlCheckpoint(path).statuses()["https://example.com/b"] == FAILED
+
+    fetched = []
+    resumed = CrawlEngine(
+        fetch=lambda url: fetched.append(url) or url,
+        extract_links=_links_from_site,
+        checkpoint=CrawlCheckpoint(path),
+        resume=True,
+    )
+    asyncio.run(resumed.crawl(["https://example.com"]))
+
+    assert fetched == ["https://example.com/b"]
+
+
+def test_crawl_without_resume_starts_over(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite")
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.record("https://example.com", "https://example.com", DONE)
+    checkpoint.flush()
+    fetched = []
+
+    engine = CrawlEngine(
+        fetch=lambda url: fetched.append(url) or url, extract_links=_links_from_site, checkpoint=checkpoint
+    )
+    asyncio.run(engine.crawl(["https://example.com"]))
+
+    assert sorted(fetched) == sorted(SITE)
+    assert PENDING not in checkpoint.statuses().values()
+
+
+LISTINGS = {
+    "https://example.com/list?page=1": {"https://example.com/doctor/1", "https://example.com/doctor/2"},
+    "https://example.com/list?page=2": {"https://example.com/doctor/3"},
+    "https://example.com/doctor/1": {"https://example.com/doctor/9"},
+    "https://example.com/doctor/2": set(),
+    "https://example.com/doctor/3": set(),
+}
+LISTING_RULES = CrawlRules(listing=[r"/list\?"], detail=[r"/doctor/"])
+
+
+def test_crawl_rules_classify_urls():
+    assert LISTING_RULES.classify("https://example.com/list?page=1") == LISTING
+    assert LISTING_RULES.classify("https://example.com/doctor/1") == DETAIL
+    assert LISTING_RULES.classify("https://example.com/about") is None
+
+
+def test_crawl_rules_reject_negative_depth():
+    with pytest.raises(ValueError):
+        CrawlRules(max_depth=-1)
+
+
+def test_detail_pages_are_extracted_but_not_expanded():
+    expanded = []
+    pages = []
+
+    def _extract_links(html, url):
+        expanded.append(url)
+        return LISTINGS[url]
+
+    engine = CrawlEngine(fetch=lambda url: url, extract_links=_extract_links, rules=LISTING_RULES)
+
+    asyncio.run(
+        engine.crawl(
+            ["https://example.com/list?page=1", "https://example.com/list?page=2"],
+            on_page=lambda url, html: pages.append(url),
+        )
+    )
+
+    assert sorted(expanded) == ["https://example.com/list?page=1", "https://example.com/list?page=2"]
+    assert sorted(pages) == [
+        "https://example.com/doctor/1",
+        "https://example.com/doctor/2",
+        "https://example.com/doctor/3",
+    ]
+
+
+def test_max_depth_stops_expanding_unclassified_pages():
+    fetched = []
+    engine = CrawlEngine(
+        fetch=lambda url: fetched.append(url) or url, extract_links=_links_from_site, rules=CrawlRules(max_depth=1)
+    )
+
+    asyncio.run(engine.crawl(["https://example.com"]))
+
+    assert sorted(fetched) == ["https://example.com", "https://example.com/a", "https://example.com/b"]
@@ -0,0 +1,78 @@
+import threading
+
+from scrapr.action.jobqueue import DONE, FAILED, QUEUED, RUNNING, JobQueue, JobSpec
+
+
+def test_jobs_are_claimed_in_order(tmp_path):
+    queue = JobQueue(str(tmp_path / "state" / "jobs.sqlite"))
+    first = queue.enqueue(JobSpec("uic", pages=2))
+    second = queue.enqueue(JobSpec("other", start_url="https://example.com/", output="other.csv"))
+
+    claimed = queue.claim()
+
+    assert claimed.id == first
+    assert claimed.spec == JobSpec("uic", pages=2)
+    assert claimed.status == RUNNING
+    assert claimed.started_at is not None
+    assert queue.claim().spec == JobSpec("other", "https://example.com/", None, "other.csv")
+    assert queue.claim() is None
+    assert [job.id for job in queue.jobs(RUNNING)] == [first, second]
+
+
+def test_completed_and_failed_jobs_keep_their_outcome(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    done_id = queue.enqueue(JobSpec("uic"))
+    failed_id = queue.enqueue(JobSpec("uic"))
+    queue.claim()
+    queue.claim()
+
+    queue.complete(done_id, {"rows_written": 3})
+    queue.fail(failed_id, "RuntimeError: down")
+
+    done = queue.get(done_id)
+    assert done.status == DONE
+    assert done.result == {"rows_written": 3}
+    assert done.finished_at >= done.started_at
+    assert queue.get(failed_id).status == FAILED
+    assert queue.get(failed_id).error == "RuntimeError: down"
+
+
+def test_released_job_goes_back_on_the_queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id = queue.enqueue(JobSpec("uic"))
+    queue.claim()
+
+    queue.release(job_id)
+
+    assert queue.get(job_id).status == QUEUED
+    assert queue.claim().id == job_id
+
+
+def test_queue_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    JobQueue(path).enqueue(JobSpec("uic"))
+
+    assert [job.spec.site for job in JobQueue(path).jobs(QUEUED)] == ["uic"]
+
+
+def test_concurrent_workers_never_claim_the_same_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    queue = JobQueue(path)
+    for _ in range(50):
+        queue.enqueue(JobSpec("uic"))
+    claimed = []
+    lock = threading.Lock()
+
+    def _work():
+        worker_queue = JobQueue(path)
+        while (job := worker_queue.claim()) is not None:
+            with lock:
+                claimed.append(job.id)
+
+    workers = [threading.Thread(target=_work) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(claimed) == [job.id for job in queue.jobs()]
@@ -0,0 +1,167 @@
+import pytest
+from unittest.mock import Mock, patch
+
+from scrapr.jobs import get_params, _get_writer, _create_scraper, _create_cache, _site_path_for, parse_args
+from scrapr.action.scrape import Scraper
+
+
+@pytest.fixture
+def mock_config():
+    return {'SCRAPER_API_URL': 'https://api.example.com', 'SCRAPER_API_KEY': 'test_key'}
+
+
+@pytest.fixture
+def expected_params():
+    return {
+        'start_url': 'https://ulsterindependentclinic.com/consultants/',
+        'query_parameter_key': '?page_2826c=',
+        'total_pages': 0,
+        'filter_url': 'https://ulsterindependentclinic.com/consultant/',
+        'sample_url': 'https://ulsterindependentclinic.com/consultant/3353330/',
+        'wanted_list': ["Mr. Robin Adair", "ENT", "3353330", "Adults & Children", "028 9068 7444"],
+        'output_file': 'uic_consultant_contacts.csv',
+    }
+
+
+def test_get_writer():
+    writer = _get_writer()
+    from scrapr.action.persist import CsvWriter
+
+    assert isinstance(writer, CsvWriter)
+    assert not writer.append
+
+
+def test_get_writer_append():
+    assert _get_writer(append=True).append
+
+
+def test_create_scraper():
+    api_url = "https://api.example.com"
+    api_key = "test_key"
+
+    scraper = _create_scraper(api_url, api_key)
+
+    assert isinstance(scraper, Scraper)
+    assert scraper.api_url == api_url
+    assert scraper.api_key == api_key
+
+
+def test_create_scraper_with_cache(tmp_path):
+    cache = _create_cache(str(tmp_path), "https://example.com/consultant/")
+
+    scraper = _create_scraper("https://api.example.com", "test_key", cache=cache, offline=True)
+
+    assert scraper.cache is cache
+    assert scraper.offline
+    assert cache.ttl_for("https://example.com/consultant/1/") > cache.ttl_for("https://example.com/consultants/")
+
+
+def test_parse_args_defaults():
+    args = parse_args([])
+
+    assert args.cache_dir == ".scrapr/cache"
+    assert not args.no_cache
+    assert not args.offline
+
+
+def test_parse_args_offline():
+    args = parse_args(["--offline", "--cache-dir", "/tmp/cache"])
+
+    assert args.offline
+    assert args.cache_dir == "/tmp/cache"
+
+
+def test_parse_args_resume():
+    args = parse_args(["--resume", "--checkpoint", "/tmp/state.sqlite", "--checkpoint-interval", "5"])
+
+    assert args.resume
+    assert args.checkpoint == "/tmp/state.sqlite"
+    assert args.checkpoint_interval == 5
+
+
+def test_get_writer_store():
+    from scrapr.action.store import SqliteContactStore
+
+    writer = _get_writer(store=True, site="other")
+
+    assert isinstance(writer, SqliteContactStore)
+    assert writer.site == "other"
+
+
+def test_get_params_for_unknown_site():
+    with pytest.raises(ValueError):
+        get_params("nowhere")
+
+
+def test_checkpoint_path_is_per_site_when_running_several():
+    assert _site_path_for("state/checkpoint.sqlite", "uic", ["uic"]) == "state/checkpoint.sqlite"
+    assert _site_path_for("state/checkpoint.sqlite", "uic", ["uic", "other"]) == "state/checkpoint-uic.sqlite"
+
+
+def test_scraper_does_not_close_a_shared_session():
+    session = Mock()
+    scraper = _create_scraper("https://api.example.com", "test_key", session=session)
+
+    scraper.close()
+
+    assert scraper.session is session
+    session.close.assert_not_called()
+
+
+def test_parse_args_sitemap():
+    from datetime import datetime, timezone
+
+    args = parse_args(["--sitemap", "--sitemap-since", "2024-05-01"])
+
+    assert args.sitemap
+    assert args.sitemap_since == datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def test_parse_args_rejects_invalid_sitemap_date():
+    with pytest.raises(SystemExit):
+        parse_args(["--sitemap-since", "last week"])
+
+
+def test_parse_args_warc():
+    assert parse_args([]).warc is None
+    assert parse_args(["--warc", "/tmp/crawl.warc.gz"]).warc == "/tmp/crawl.warc.gz"
+
+
+def test_parse_args_max_page_bytes():
+    assert parse_args([]).max_page_bytes is None
+    assert parse_args(["--max-page-bytes", "1000"]).max_page_bytes == 1000
+
+
+def test_jobs_for_one_site_share_a_trained_parser(mock_config):
+    from scrapr.jobs import create_shared, _get_parser
+    from scrapr.action.model_store import ModelStore
+
+    args = parse_args(["--no-cache"])
+    shared = create_shared(args, ["uic"], Mock(spec=ModelStore))
+    params = get_params("uic")
+    with patch('scrapr.jobs._create_parser') as mock_create_parser:
+        first = _get_parser("uic", params, args, shared)
+        second = _get_parser("uic", params, args, shared)
+
+    assert first is second
+    mock_create_parser.assert_called_once()
+    shared['session'].close()
+
+
+def test_job_closes_its_checkpoint_even_when_it_fails(mock_config, tmp_path):
+    from scrapr.jobs import create_job, create_shared
+    from scrapr.action.model_store import ModelStore
+    from scrapr.action.parse import Parser
+
+    args = parse_args(["--no-cache", "--checkpoint", str(tmp_path / "checkpoint.sqlite")])
+    shared = create_shared(args, ["uic"], Mock(spec=ModelStore))
+    site = Mock(PARAMS=get_params("uic"))
+    site.execute.side_effect = RuntimeError("crawl failed")
+    with patch('scrapr.jobs.get_site', return_value=site), patch(
+        'scrapr.jobs._get_parser', return_value=Mock(spec=Parser)
+    ), patch('scrapr.jobs.CrawlCheckpoint') as mock_checkpoint:
+        with pytest.raises(RuntimeError):
+            create_job("uic", args, mock_config, ["uic"], shared).run()
+
+    mock_checkpoint.return_value.close.assert_called_once()
+    shared['session'].close()
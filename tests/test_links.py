@@ -0,0 +1,50 @@
+import pytest
+
+from scrapr.action.links import extract_links_with_lxml, extract_links_with_soup, get_link_extractor
+
+HTML = """
+<html>
+    <body>
+        <a href="/page1">Page 1</a>
+        <a href="https://example.com/page2">Page 2</a>
+        <a>No href</a>
+        <p><a href="page3?x=1&amp;y=2">Page 3</a></p>
+        <a href="https://other-domain.com/page4">Page 4
+    </body>
+</html>
+"""
+
+EXPECTED = [
+    "https://example.com/page1",
+    "https://example.com/page2",
+    "https://example.com/dir/page3?x=1&y=2",
+    "https://other-domain.com/page4",
+]
+
+
+@pytest.mark.parametrize("extract_links", [extract_links_with_lxml, extract_links_with_soup])
+def test_extract_links_resolves_hrefs_against_page(extract_links):
+    assert extract_links(HTML, "https://example.com/dir/index") == EXPECTED
+
+
+@pytest.mark.parametrize("extract_links", [extract_links_with_lxml, extract_links_with_soup])
+def test_extract_links_from_empty_html(extract_links):
+    assert extract_links("", "https://example.com") == []
+
+
+def test_get_link_extractor_prefers_lxml():
+    assert get_link_extractor() is extract_links_with_lxml
+    assert get_link_extractor("soup") is extract_links_with_soup
+
+
+def test_get_link_extractor_falls_back_without_lxml(monkeypatch):
+    monkeypatch.setattr("scrapr.action.links.etree", None)
+
+    assert get_link_extractor() is extract_links_with_soup
+    with pytest.raises(ImportError):
+        extract_links_with_lxml(HTML, "https://example.com")
+
+
+def test_get_link_extractor_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        get_link_extractor("regex")
@@ -0,0 +1,43 @@
+import json
+import logging
+
+from scrapr.log import JsonFormatter, configure_logging
+
+
+def _record(**extra):
+    record = logging.LogRecord("scrapr.crawl", logging.WARNING, __file__, 1, "An error occurred: %s", ("boom",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_message_and_extra_fields():
+    payload = json.loads(JsonFormatter().format(_record(url="https://example.com")))
+
+    assert payload["level"] == "WARNING"
+    assert payload["logger"] == "scrapr.crawl"
+    assert payload["message"] == "An error occurred: boom"
+    assert payload["url"] == "https://example.com"
+    assert "args" not in payload
+
+
+def test_json_formatter_includes_exceptions():
+    try:
+        raise ValueError("bad page")
+    except ValueError:
+        record = logging.LogRecord("scrapr", logging.ERROR, __file__, 1, "failed", (), __import__("sys").exc_info())
+
+    assert "ValueError: bad page" in json.loads(JsonFormatter().format(record))["exception"]
+
+
+def test_configure_logging_replaces_root_handlers():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    try:
+        configure_logging("debug", json_format=True)
+
+        assert root.level == logging.DEBUG
+        assert len(root.handlers) == 1
+        assert isinstance(root.handlers[0].formatter, JsonFormatter)
+    finally:
+        root.handlers[:] = handlers
+        root.setLevel(level)
@@ -1,11 +1,7 @@
 import pytest
-from unittest.mock import Mock, patch
-from typing import Dict, Any, Callable
+from unittest.mock import patch
 
-from scrapr.main import (_get_params, _get_config, _get_writer, _create_parser,
-                 _create_scraper, main)
-from scrapr.action.parse import Parser
-from scrapr.action.scrape import Scraper
+from scrapr.main import main
 
 @pytest.fixture
 def mock_config():
@@ -14,30 +10,74 @@ def mock_config():
         'SCRAPER_API_KEY': 'test_key'
     }
 
-@pytest.fixture
-def expected_params():
-    return {
-        'start_url': 'https://ulsterindependentclinic.com/consultants/',
-        'query_parameter_key': '?page_2826c=',
-        'total_pages': 1,
-        'filter_url': 'https://ulsterindependentclinic.com/consultant/',
-        'sample_url': 'https://ulsterindependentclinic.com/consultant/3353330/',
-        'wanted_list': ["Mr. Robin Adair", "ENT", "3353330", "Adults & Children", "028 9068 7444"],
-        'output_file': 'uic_consultant_contacts.csv',
-    }
+def test_main_invalidate_parser_removes_model_without_scraping(tmp_path, capsys):
+    with patch('scrapr.main.get_config') as mock_get_config:
+        main(["--invalidate-parser", "--model-dir", str(tmp_path)])
+
+    mock_get_config.assert_not_called()
+    assert "No stored parser model to remove." in capsys.readouterr().out
+
+def test_main_lists_sites(capsys):
+    main(["--list-sites"])
+
+    assert "uic" in capsys.readouterr().out.split()
+
+def test_main_runs_each_site_as_a_job_with_shared_resources(tmp_path, mock_config):
+    with patch('scrapr.main.get_config', return_value=mock_config), \
+            patch('scrapr.main.configure_logging'), \
+            patch('scrapr.main.write_metrics'), \
+            patch('scrapr.main.create_job') as mock_create_job, \
+            patch('scrapr.main.run_jobs', return_value={}) as mock_run_jobs:
+        main(["--site", "uic", "--site", "uic", "--jobs", "2", "--cache-dir", str(tmp_path)])
+
+    assert mock_create_job.call_count == 2
+    shared = [call.args[4] for call in mock_create_job.call_args_list]
+    assert shared[0] is shared[1]
+    mock_run_jobs.assert_called_once()
+    assert mock_run_jobs.call_args.kwargs["max_concurrent"] == 2
+
+def test_main_exits_with_error_when_a_job_fails(tmp_path, mock_config):
+    with patch('scrapr.main.get_config', return_value=mock_config), \
+            patch('scrapr.main.configure_logging'), \
+            patch('scrapr.main.write_metrics'), \
+            patch('scrapr.main.run_jobs', return_value={"uic": RuntimeError("down")}):
+        with pytest.raises(SystemExit, match="1 of 1 site jobs failed: uic"):
+            main(["--cache-dir", str(tmp_path)])
+
+def test_main_writes_run_report_and_prometheus_file(tmp_path, mock_config):
+    import json
 
-def test_get_writer():
-    writer = _get_writer()
-    from scrapr.action.persist import write_to_csv
+    report = tmp_path / "report.json"
+    prometheus = tmp_path / "metrics.prom"
+    with patch('scrapr.main.get_config', return_value=mock_config), \
+            patch('scrapr.main.configure_logging'), \
+            patch('scrapr.main.run_jobs', return_value={}):
+        main(["--cache-dir", str(tmp_path / "cache"), "--report", str(report), "--prometheus-file", str(prometheus)])
 
-    assert writer == write_to_csv
+    assert json.loads(report.read_text())["credits_spent"] == 0
+    assert "scrapr_cache_hits 0" in prometheus.read_text()
 
-def test_create_scraper():
-    api_url = "https://api.example.com"
-    api_key = "test_key"
+def test_importing_main_and_sites_defers_scraping_libraries():
+    import json
+    import os
+    import pathlib
+    import subprocess
+    import sys
 
-    scraper = _create_scraper(api_url, api_key)
+    src = pathlib.Path(__file__).parent.parent / "src"
+    script = (
+        "import json, sys\n"
+        "import scrapr.main, scrapr.worker\n"
+        "from scrapr.sites import load_sites\n"
+        "load_sites()\n"
+        "print(json.dumps(sorted(m for m in ('autoscraper', 'bs4', 'requests') if m in sys.modules)))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "PYTHONPATH": str(src)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
 
-    assert isinstance(scraper, Scraper)
-    assert scraper.api_url == api_url
-    assert scraper.api_key == api_key
+    assert json.loads(completed.stdout) == []
@@ -0,0 +1,116 @@
+import json
+import math
+
+import pytest
+
+from scrapr.action.metrics import REGISTRY, Histogram, Metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def metrics(clock):
+    return Metrics(clock=clock)
+
+
+def test_histogram_counts_values_into_cumulative_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0, math.inf))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(4.25)
+    assert histogram.cumulative() == [(0.1, 1), (1.0, 3), (math.inf, 4)]
+
+
+def test_counters_and_gauges_by_labels(metrics):
+    metrics.inc("pages_crawled", status="done")
+    metrics.inc("pages_crawled", 2, status="done")
+    metrics.inc("pages_crawled", status="failed")
+    metrics.set("credits_spent", 40)
+    metrics.set("credits_spent", 50)
+
+    assert metrics.value("pages_crawled", status="done") == 3
+    assert metrics.value("pages_crawled", status="failed") == 1
+    assert metrics.value("credits_spent") == 50
+    assert metrics.value("unknown") == 0
+
+
+def test_stage_accumulates_time_even_on_error(metrics, clock):
+    with metrics.stage("fetch"):
+        clock.now += 2
+    with pytest.raises(RuntimeError):
+        with metrics.stage("fetch"):
+            clock.now += 3
+            raise RuntimeError("boom")
+
+    assert metrics.value("stage_seconds", stage="fetch") == 5
+
+
+def test_report_includes_histograms_and_pages_per_second(metrics, clock):
+    metrics.inc("pages_crawled", 10, status="done")
+    metrics.inc("rows_written", 4)
+    metrics.observe("request_seconds", 0.2, target="api", status="200")
+    clock.now = 5
+
+    report = metrics.report()
+
+    assert report["elapsed_seconds"] == 5
+    assert report["pages_per_second"] == 2
+    assert report["rows_written"] == 4
+    assert report["pages_crawled"] == {"status=done": 10}
+    latency = report["request_seconds"]["status=200,target=api"]
+    assert latency["count"] == 1
+    assert latency["buckets"]["0.25"] == 1
+    assert latency["buckets"]["0.1"] == 0
+    assert latency["buckets"]["+Inf"] == 1
+
+
+def test_prometheus_text_format(metrics):
+    metrics.inc("pages_crawled", 3, status="done")
+    metrics.set("credits_spent", 30)
+    metrics.observe("request_seconds", 0.2, status="200")
+
+    text = metrics.to_prometheus()
+
+    assert "# TYPE scrapr_pages_crawled counter\nscrapr_pages_crawled{status=\"done\"} 3\n" in text
+    assert "# TYPE scrapr_credits_spent gauge\nscrapr_credits_spent 30\n" in text
+    assert "# TYPE scrapr_request_seconds histogram\n" in text
+    assert 'scrapr_request_seconds_bucket{status="200",le="0.1"} 0\n' in text
+    assert 'scrapr_request_seconds_bucket{status="200",le="+Inf"} 1\n' in text
+    assert 'scrapr_request_seconds_count{status="200"} 1\n' in text
+
+
+def test_prometheus_escapes_label_values(metrics):
+    metrics.inc("errors", kind='say "hi"\\')
+
+    assert 'scrapr_errors{kind="say \\"hi\\"\\\\"} 1' in metrics.to_prometheus()
+
+
+def test_write_report_and_prometheus_files(metrics, tmp_path):
+    metrics.inc("rows_written", 2)
+
+    metrics.write_report(str(tmp_path / "out" / "report.json"))
+    metrics.write_prometheus(str(tmp_path / "out" / "metrics.prom"))
+
+    assert json.loads((tmp_path / "out" / "report.json").read_text())["rows_written"] == 2
+    assert "scrapr_rows_written 2" in (tmp_path / "out" / "metrics.prom").read_text()
+    assert sorted(path.name for path in (tmp_path / "out").iterdir()) == ["metrics.prom", "report.json"]
+
+
+def test_reset_clears_the_registry():
+    REGISTRY.inc("rows_written")
+    REGISTRY.reset()
+
+    assert REGISTRY.value("rows_written") == 0
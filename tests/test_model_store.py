@@ -0,0 +1,62 @@
+import pytest
+from autoscraper import AutoScraper
+
+from scrapr.action.model_store import ModelStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ModelStore(str(tmp_path / "models"))
+
+
+@pytest.fixture
+def trained_parser():
+    parser = AutoScraper()
+    parser.stack_list = [{"content": [["p", {}]], "stack_id": "rule_1", "alias": ""}]
+    return parser
+
+
+def test_key_depends_on_sample_url_and_wanted_list():
+    key = ModelStore.key_for("https://example.com/1", ["a", "b"])
+
+    assert key == ModelStore.key_for("https://example.com/1", ["a", "b"])
+    assert key != ModelStore.key_for("https://example.com/2", ["a", "b"])
+    assert key != ModelStore.key_for("https://example.com/1", ["a"])
+
+
+def test_key_depends_on_autoscraper_version(monkeypatch):
+    key = ModelStore.key_for("https://example.com/1", ["a"])
+
+    monkeypatch.setattr("scrapr.action.model_store.autoscraper_version", lambda: "99.0")
+
+    assert ModelStore.key_for("https://example.com/1", ["a"]) != key
+
+
+def test_load_missing_model_returns_none(store):
+    assert store.load("missing") is None
+
+
+def test_save_then_load_round_trips_rules(store, trained_parser):
+    store.save("key", trained_parser)
+
+    loaded = store.load("key")
+
+    assert loaded.stack_list == trained_parser.stack_list
+
+
+def test_load_ignores_corrupt_model(store, caplog):
+    with open(store.path_for("key"), "w", encoding="utf-8") as model_file:
+        model_file.write("{not json")
+
+    assert store.load("key") is None
+    assert "Ignoring unreadable parser model" in caplog.text
+
+
+def test_invalidate_and_clear(store, trained_parser):
+    store.save("a", trained_parser)
+    store.save("b", trained_parser)
+
+    assert store.invalidate("a")
+    assert not store.invalidate("a")
+    assert store.clear() == 1
+    assert store.load("b") is None
@@ -0,0 +1,88 @@
+from requests.exceptions import HTTPError
+
+from scrapr.action.links import extract_links_with_soup
+from scrapr.action.paginate import discover_total_pages, iter_listing_urls, page_numbers_in
+
+BASE_URL = "https://example.com/consultants/"
+KEY = "?page_2826c="
+
+
+def _listing(page, pager=(), results=True):
+    links = "".join(f'<a href="{BASE_URL}{KEY}{number}">{number}</a>' for number in pager)
+    consultant = f'<a href="https://example.com/consultant/{page}/">Dr {page}</a>' if results else ""
+    return f"<html><body>{consultant}<nav>{links}</nav></body></html>"
+
+
+def _has_results(url, html):
+    return "/consultant/" in html
+
+
+def _discover(pages, max_pages=500):
+    fetched = []
+
+    def _fetch(url):
+        fetched.append(url)
+        page = int(url.rsplit("=", 1)[1])
+        if page not in pages:
+            raise HTTPError("404 Client Error")
+        return pages[page]
+
+    total = discover_total_pages(_fetch, BASE_URL, KEY, _has_results, extract_links_with_soup, max_pages=max_pages)
+    return total, [int(url.rsplit("=", 1)[1]) for url in fetched]
+
+
+def test_iter_listing_urls_is_lazy_and_bounded():
+    urls = iter_listing_urls(BASE_URL, KEY)
+
+    assert [next(urls) for _ in range(2)] == [f"{BASE_URL}{KEY}1", f"{BASE_URL}{KEY}2"]
+    assert list(iter_listing_urls(BASE_URL, KEY, 0)) == []
+
+
+def test_page_numbers_in_reads_the_query_parameter():
+    links = [f"{BASE_URL}{KEY}3", f"{BASE_URL}?sort=name&page_2826c=7", f"{BASE_URL}?page_2826c=next", BASE_URL]
+
+    assert page_numbers_in(links, KEY) == [3, 7]
+
+
+def test_discovery_reads_a_complete_pager():
+    pages = {page: _listing(page, pager=range(1, 6)) for page in range(1, 6)}
+
+    assert _discover(pages) == (5, [1, 5])
+
+
+def test_discovery_follows_a_windowed_pager():
+    pages = {page: _listing(page, pager=range(max(1, page - 2), min(9, page + 3))) for page in range(1, 9)}
+
+    assert _discover(pages) == (8, [1, 3, 5, 7, 8])
+
+
+def test_discovery_probes_until_an_empty_page_without_a_pager():
+    pages = {1: _listing(1), 2: _listing(2), 3: _listing(3, results=False)}
+
+    assert _discover(pages) == (2, [1, 2, 3])
+
+
+def test_discovery_treats_fetch_errors_as_the_end():
+    assert _discover({1: _listing(1), 2: _listing(2)}) == (2, [1, 2, 3])
+
+
+def test_discovery_falls_back_to_probing_when_the_pager_overstates():
+    pages = {page: _listing(page, pager=range(1, 11)) for page in range(1, 4)}
+
+    assert _discover(pages) == (3, [1, 10, 2, 3, 4])
+
+
+def test_discovery_stops_at_max_pages():
+    pages = {page: _listing(page) for page in range(1, 100)}
+
+    assert _discover(pages, max_pages=4) == (4, [1, 2, 3, 4])
+
+
+def test_discovery_stops_at_max_pages_when_the_pager_goes_beyond_it():
+    pages = {page: _listing(page, pager=range(1, 1000)) for page in range(1, 100)}
+
+    assert _discover(pages, max_pages=10) == (10, [1, 10])
+
+
+def test_discovery_of_a_site_without_results():
+    assert _discover({1: _listing(1, results=False)}) == (0, [1])
@@ -0,0 +1,167 @@
+import pathlib
+from unittest.mock import patch
+
+import pytest
+
+from scrapr.action.metrics import REGISTRY
+from scrapr.action.model_store import ModelStore
+from scrapr.action.parse import Parser
+
+# autoscraper builds its soups with the lxml tree builder, which passes options lxml has deprecated.
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+SAMPLE_URL = "https://ulsterindependentclinic.com/consultant/4188537/"
+WANTED_LIST = ["Mr. Andrew Adair", "Orthopaedic", "4188537", "Adults & Children", "028 9068 7444"]
+
+
+@pytest.fixture(scope="module")
+def contact_html():
+    return (pathlib.Path(__file__).parent / "resources" / "contact.html").read_text(encoding="utf-8")
+
+
+@pytest.fixture(scope="module")
+def other_contact_html(contact_html):
+    return (
+        contact_html.replace("Mr. Andrew Adair", "Dr. Jane Smith")
+        .replace("Orthopaedic", "Neurology")
+        .replace("4188537", "1234567")
+    )
+
+
+@pytest.fixture(scope="module")
+def parser(contact_html):
+    with patch("autoscraper.AutoScraper._fetch_html", return_value=contact_html):
+        return Parser(SAMPLE_URL, WANTED_LIST)
+
+
+def test_get_result_from_html(parser, other_contact_html):
+    with patch("autoscraper.AutoScraper._fetch_html") as mock_fetch:
+        result = parser.get_result_from_html(other_contact_html, "https://ulsterindependentclinic.com/consultant/1/")
+
+    mock_fetch.assert_not_called()
+    assert result[:3] == ["Dr. Jane Smith", "Neurology", "1234567"]
+
+
+def test_get_result_from_empty_html_does_not_fetch(parser):
+    with patch("autoscraper.AutoScraper._fetch_html") as mock_fetch:
+        assert parser.get_result_from_html("", "https://ulsterindependentclinic.com/consultant/1/") == []
+
+    mock_fetch.assert_not_called()
+
+
+def test_get_results_from_html_preserves_order(parser, contact_html, other_contact_html):
+    pages = [("https://example.com/1", other_contact_html), ("https://example.com/2", contact_html)]
+
+    results = parser.get_results_from_html(pages)
+
+    assert [result[0] for result in results] == ["Dr. Jane Smith", "Mr. Andrew Adair"]
+
+
+def test_extraction_is_timed_and_failures_counted(parser, contact_html):
+    REGISTRY.reset()
+
+    parser.get_results_from_html([("https://example.com/1", contact_html), ("https://example.com/2", "")])
+
+    assert REGISTRY.value("pages_extracted") == 2
+    assert REGISTRY.value("parse_failures") == 1
+    assert REGISTRY.value("stage_seconds", stage="parse") > 0
+
+
+def test_matches_layout_checks_rule_anchors_without_extracting(parser, other_contact_html):
+    with patch("scrapr.action.parse._extract") as mock_extract:
+        assert parser.matches_layout(other_contact_html)
+        assert not parser.matches_layout("<html><body><p>Loading...</p></body></html>")
+
+    mock_extract.assert_not_called()
+
+
+def test_matches_layout_matches_whole_class_names_on_one_element(parser):
+    assert parser.matches_layout('<div class="one-half consultant-details">Dr. Jane Smith</div>')
+    assert not parser.matches_layout('<div class="consultant-details-first one-half">Dr. Jane Smith</div>')
+    assert not parser.matches_layout('<div class="consultant-details"></div><div class="one-half"></div>')
+    assert not parser.matches_layout("<p>See .consultant-details.one-half in the stylesheet</p>")
+
+
+def test_matches_layout_falls_back_to_extraction_without_anchors(parser, contact_html):
+    with patch.object(parser, "anchors", None):
+        assert parser.matches_layout(contact_html)
+        assert not parser.matches_layout("<p>Loading...</p>")
+
+
+def test_parser_is_trained_once_and_then_loaded_from_store(tmp_path, contact_html):
+    store = ModelStore(str(tmp_path))
+    with patch("autoscraper.AutoScraper._fetch_html", return_value=contact_html) as mock_fetch:
+        trained = Parser(SAMPLE_URL, WANTED_LIST, store=store)
+        loaded = Parser(SAMPLE_URL, WANTED_LIST, store=store)
+
+    assert mock_fetch.call_count == 1
+    assert len(loaded.parser.stack_list) == len(trained.parser.stack_list)
+    assert loaded.get_result_from_html(contact_html) == trained.get_result_from_html(contact_html)
+
+
+def test_parser_retrain_refreshes_stored_model(tmp_path, contact_html):
+    store = ModelStore(str(tmp_path))
+    with patch("autoscraper.AutoScraper._fetch_html", return_value=contact_html) as mock_fetch:
+        Parser(SAMPLE_URL, WANTED_LIST, store=store)
+        Parser(SAMPLE_URL, WANTED_LIST, store=store, retrain=True)
+
+    assert mock_fetch.call_count == 2
+
+
+def test_parser_does_not_store_empty_model(tmp_path):
+    store = ModelStore(str(tmp_path))
+    with patch("autoscraper.AutoScraper._fetch_html", return_value="<html></html>"):
+        parser = Parser(SAMPLE_URL, WANTED_LIST, store=store)
+
+    assert store.load(parser.key) is None
+    assert not parser.invalidate()
+
+
+def test_parser_rejects_empty_worker_pool(contact_html):
+    with pytest.raises(ValueError):
+        Parser(SAMPLE_URL, WANTED_LIST, workers=0)
+
+
+def test_parallel_results_match_serial_order(parser, contact_html, other_contact_html):
+    with patch("autoscraper.AutoScraper._fetch_html", return_value=contact_html):
+        parallel = Parser(SAMPLE_URL, WANTED_LIST, workers=2, chunksize=2)
+    pages = [
+        (f"https://example.com/{index}", other_contact_html if index % 3 else contact_html) for index in range(9)
+    ] + [("https://example.com/empty", "")]
+
+    assert parallel.workers == 2
+    assert parallel.get_results_from_html(pages) == parser.get_results_from_html(pages)
+
+
+def test_parallel_workers_are_kept_between_runs_until_closed(contact_html):
+    with patch("autoscraper.AutoScraper._fetch_html", return_value=contact_html):
+        parallel = Parser(SAMPLE_URL, WANTED_LIST, workers=2, chunksize=1)
+    pages = [("https://example.com/1", contact_html), ("https://example.com/2", contact_html)]
+
+    first = parallel.get_results_from_html(pages)
+    pool = parallel._executor
+    second = parallel.get_results_from_html(pages)
+
+    assert first == second
+    assert pool is not None and parallel._executor is pool
+    parallel.close()
+    assert parallel._executor is None
+
+
+def test_parallel_results_are_streamed(contact_html):
+    with patch("autoscraper.AutoScraper._fetch_html", return_value=contact_html):
+        parallel = Parser(SAMPLE_URL, WANTED_LIST, workers=2, chunksize=1)
+    consumed = []
+
+    def _pages():
+        for index in range(20):
+            consumed.append(index)
+            yield (f"https://example.com/{index}", contact_html)
+
+    results = parallel.iter_results_from_html(_pages())
+    first = next(results)
+    in_flight = len(consumed)
+    results.close()
+
+    assert first[:3] == WANTED_LIST[:3]
+    assert in_flight <= 4
@@ -2,7 +2,7 @@ import pytest
 import json
 import csv
 import os
-from scrapr.action.persist import write_to_json, write_to_csv
+from scrapr.action.persist import write_to_json, write_to_csv, CsvWriter, JsonLinesWriter
 
 @pytest.fixture
 def sample_data():
@@ -20,7 +20,7 @@ def cleanup_files():
         if os.path.exists(file):
             os.remove(file)
 
-def test_write_to_json(sample_data, cleanup_files, capsys):
+def test_write_to_json(sample_data, cleanup_files, caplog):
     filename = "test_output.json"
     write_to_json(sample_data, filename)
 
@@ -32,11 +32,10 @@ def test_write_to_json(sample_data, cleanup_files, capsys):
         saved_data = json.load(f)
     assert saved_data == sample_data
 
-    # Check console output
-    captured = capsys.readouterr()
-    assert f"Data has been written to {filename} in JSON format." in captured.out
+    # Check log output
+    assert f"Data has been written to {filename} in JSON format." in caplog.text
 
-def test_write_to_csv(sample_data, cleanup_files, capsys):
+def test_write_to_csv(sample_data, cleanup_files, caplog):
     filename = "test_output.csv"
     write_to_csv(sample_data, filename)
 
@@ -51,20 +50,18 @@ def test_write_to_csv(sample_data, cleanup_files, capsys):
             saved_data.append(row)
     assert saved_data == sample_data
 
-    # Check console output
-    captured = capsys.readouterr()
-    assert f"Data has been written to {filename} in CSV format." in captured.out
+    # Check log output
+    assert f"Data has been written to {filename} in CSV format." in caplog.text
 
-def test_write_to_csv_empty_data(cleanup_files, capsys):
+def test_write_to_csv_empty_data(cleanup_files, caplog):
     filename = "test_output.csv"
     write_to_csv([], filename)
 
     # Check that file wasn't created
     assert not os.path.exists(filename)
 
-    # Verify console output
-    captured = capsys.readouterr()
-    assert "The data list is empty. No CSV file will be created." in captured.out
+    # Verify log output
+    assert "The data list is empty. No CSV file will be created." in caplog.text
 
 def test_write_to_json_invalid_path():
     with pytest.raises(OSError):
@@ -73,3 +70,122 @@ def test_write_to_json_invalid_path():
 def test_write_to_csv_invalid_path():
     with pytest.raises(OSError):
         write_to_csv([{"test": "data"}], "/invalid/path/test.csv")
+
+def test_write_to_json_streams_from_generator(sample_data, cleanup_files):
+    filename = "test_output.json"
+    write_to_json((row for row in sample_data), filename)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        content = f.read()
+    assert json.loads(content) == sample_data
+    assert content == json.dumps(sample_data, indent=4)
+
+def test_write_to_json_empty_data(cleanup_files):
+    filename = "test_output.json"
+    write_to_json(iter([]), filename)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        assert json.load(f) == []
+
+def test_write_to_csv_streams_from_generator(sample_data, cleanup_files):
+    filename = "test_output.csv"
+    write_to_csv((row for row in sample_data), filename)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        assert list(csv.DictReader(f)) == sample_data
+
+def test_write_to_csv_empty_generator(cleanup_files, caplog):
+    write_to_csv(iter([]), "test_output.csv")
+
+    assert not os.path.exists("test_output.csv")
+    assert "The data list is empty" in caplog.text
+
+@pytest.fixture
+def output_dir(tmp_path):
+    return tmp_path
+
+def test_csv_writer_protocol(sample_data, output_dir):
+    filename = str(output_dir / "contacts.csv")
+    writer = CsvWriter(batch_size=10)
+
+    writer.open(filename)
+    writer.write_batch(sample_data[:1])
+    writer.write_batch(sample_data[1:])
+    writer.close()
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        assert list(csv.DictReader(f)) == sample_data
+    assert writer.rows_written == 2
+    assert not os.path.exists(filename + ".part")
+
+def test_csv_writer_flushes_full_batches_to_part_file(sample_data, output_dir):
+    filename = str(output_dir / "contacts.csv")
+    writer = CsvWriter(batch_size=2)
+
+    writer.open(filename)
+    writer.write_batch(sample_data[:1])
+    assert writer.rows_written == 0
+    writer.write_batch(sample_data[1:])
+
+    # Nothing replaces the target until close, but flushed rows are already on disk.
+    assert not os.path.exists(filename)
+    with open(filename + ".part", 'r', encoding='utf-8') as f:
+        assert list(csv.DictReader(f)) == sample_data
+    writer.close()
+
+def test_writer_reports_each_durable_batch(sample_data, output_dir):
+    filename = str(output_dir / "contacts.csv")
+    flushed = []
+    writer = CsvWriter(batch_size=1)
+    writer.on_flush = lambda rows_written: flushed.append((rows_written, os.path.getsize(filename + ".part")))
+
+    writer(sample_data, filename)
+
+    # Each report comes after its rows have reached the part file.
+    assert [rows_written for rows_written, _ in flushed] == [1, 2]
+    assert 0 < flushed[0][1] < flushed[1][1]
+
+def test_csv_writer_with_fieldnames_writes_header_for_empty_data(output_dir):
+    filename = str(output_dir / "contacts.csv")
+
+    CsvWriter(fieldnames=["name", "age"])([], filename)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        assert f.read().strip() == "name,age"
+
+def test_csv_writer_append_keeps_existing_rows(sample_data, output_dir):
+    filename = str(output_dir / "contacts.csv")
+    CsvWriter()(sample_data[:1], filename)
+
+    CsvWriter(append=True)(sample_data[1:], filename)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        assert list(csv.DictReader(f)) == sample_data
+
+def test_writer_resumes_interrupted_part_file(sample_data, output_dir):
+    filename = str(output_dir / "contacts.jsonl")
+
+    def _interrupted():
+        yield sample_data[0]
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        JsonLinesWriter(batch_size=1)(_interrupted(), filename)
+    assert not os.path.exists(filename)
+    assert os.path.exists(filename + ".part")
+
+    JsonLinesWriter(append=True)(sample_data[1:], filename)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == sample_data
+    assert not os.path.exists(filename + ".part")
+
+def test_json_lines_writer_overwrites_without_append(sample_data, output_dir, caplog):
+    filename = str(output_dir / "contacts.jsonl")
+    JsonLinesWriter()(sample_data, filename)
+
+    JsonLinesWriter()(sample_data[:1], filename)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == sample_data[:1]
+    assert f"Data has been written to {filename}." in caplog.text
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from scrapr.action.pipeline import Acknowledger, batched, stream_from
+
+
+def test_stream_from_yields_items_in_order():
+    def _produce(emit):
+        for item in range(5):
+            emit(item)
+
+    assert list(stream_from(_produce)) == [0, 1, 2, 3, 4]
+
+
+def test_stream_from_bounds_buffered_items():
+    emitted = []
+
+    def _produce(emit):
+        for item in range(10):
+            emit(item)
+            emitted.append(item)
+
+    stream = stream_from(_produce, maxsize=2)
+    assert next(stream) == 0
+    # Producer can run at most maxsize items (plus the one it is blocked on) ahead of the consumer.
+    time.sleep(0.2)
+    assert len(emitted) <= 4
+    assert list(stream) == list(range(1, 10))
+
+
+def test_stream_from_reraises_producer_errors():
+    def _produce(emit):
+        emit(1)
+        raise RuntimeError("crawl failed")
+
+    stream = stream_from(_produce)
+
+    assert next(stream) == 1
+    with pytest.raises(RuntimeError, match="crawl failed"):
+        next(stream)
+
+
+def test_stream_from_stops_producer_when_consumer_closes():
+    stopped = threading.Event()
+
+    def _produce(emit):
+        try:
+            for item in range(1000):
+                emit(item)
+        finally:
+            stopped.set()
+
+    stream = stream_from(_produce, maxsize=1)
+    assert next(stream) == 0
+    stream.close()
+
+    assert stopped.wait(1)
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
+    with pytest.raises(ValueError):
+        list(batched([1], 0))
+
+
+def test_acknowledger_waits_for_rows_to_be_flushed():
+    acknowledged = []
+    acknowledger = Acknowledger(acknowledged.extend)
+    pages = acknowledger.pages([("a", "<p>a</p>"), ("b", ""), ("c", "<p>c</p>"), ("d", "<p>d</p>")])
+    # Page b produces no row, like a page whose contact could not be created.
+    rows = acknowledger.rows(html for _, html in acknowledger.results(pages) if html)
+
+    assert next(rows) == "<p>a</p>"
+    acknowledger.flushed(0)
+    assert acknowledged == []
+    assert next(rows) == "<p>c</p>"
+    acknowledger.flushed(1)
+    assert acknowledged == ["a"]
+    acknowledger.flushed(2)
+    assert acknowledged == ["a", "b", "c"]
+
+    assert list(rows) == ["<p>d</p>"]
+    acknowledger.finish()
+    assert acknowledged == ["a", "b", "c", "d"]
@@ -0,0 +1,83 @@
+import csv
+import pathlib
+from unittest.mock import patch
+
+import pytest
+
+from scrapr.action.warc import WarcWriter
+from scrapr.reextract import find_page, iter_detail_pages, main
+
+# autoscraper builds its soups with the lxml tree builder, which passes options lxml has deprecated.
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+SAMPLE_URL = "https://ulsterindependentclinic.com/consultant/4188537/"
+WANTED_LIST = ["Mr. Andrew Adair", "Orthopaedic", "4188537", "Adults & Children", "028 9068 7444"]
+SITE_PARAMS = {
+    "sample_url": SAMPLE_URL,
+    "wanted_list": WANTED_LIST,
+    "filter_url": "https://ulsterindependentclinic.com/consultant/",
+    "output_file": "uic-contacts.csv",
+}
+
+
+@pytest.fixture
+def contact_html():
+    return (pathlib.Path(__file__).parent / "resources" / "contact.html").read_text(encoding="utf-8")
+
+
+@pytest.fixture
+def archive(tmp_path, contact_html):
+    path = tmp_path / "crawl.warc.gz"
+    other_html = contact_html.replace("Mr. Andrew Adair", "Dr. Jane Smith").replace("4188537", "1234567")
+    with WarcWriter(str(path)) as warc:
+        warc.write_page("https://ulsterindependentclinic.com/consultants/?page=1", "<p>listing</p>")
+        warc.write_page(SAMPLE_URL, contact_html)
+        warc.write_page("https://ulsterindependentclinic.com/consultant/1234567/", other_html)
+        warc.write_page("https://ulsterindependentclinic.com/consultant/1234567", other_html)
+    return path
+
+
+def test_iter_detail_pages_filters_and_keeps_last_copy(tmp_path):
+    path = str(tmp_path / "crawl.warc.gz")
+    with WarcWriter(path) as warc:
+        warc.write_page("https://example.com/list", "listing")
+        warc.write_page("https://example.com/c/1/", "first")
+        warc.write_page("https://example.com/c/2/", "other")
+    # A later run appends to the same archive.
+    with WarcWriter(path) as warc:
+        warc.write_page("https://example.com/c/1", "second")
+
+    assert list(iter_detail_pages(path, "https://example.com/c/")) == [
+        ("https://example.com/c/2/", "other"),
+        ("https://example.com/c/1", "second"),
+    ]
+
+
+def test_find_page_matches_canonical_url(archive, contact_html):
+    assert find_page(str(archive), SAMPLE_URL.rstrip("/")) == contact_html
+    assert find_page(str(archive), "https://ulsterindependentclinic.com/consultant/9/") is None
+
+
+def test_reextract_trains_from_archive_without_network(tmp_path, archive):
+    output = tmp_path / "contacts.csv"
+    with patch("scrapr.reextract.get_site") as mock_get_site, patch("scrapr.reextract.configure_logging"):
+        with patch("autoscraper.AutoScraper._fetch_html") as mock_fetch:
+            mock_get_site.return_value.PARAMS = SITE_PARAMS
+            main([str(archive), "--output", str(output), "--workers", "1", "--model-dir", str(tmp_path / "models")])
+
+    mock_fetch.assert_not_called()
+    with open(output, newline="", encoding="utf-8") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert [row["full_name"] for row in rows] == ["Mr. Andrew Adair", "Dr. Jane Smith"]
+    assert rows[1]["gmc_number"] == "1234567"
+
+
+def test_main_closes_the_parser_even_when_extraction_fails(archive):
+    with patch("scrapr.reextract.get_site") as mock_get_site, patch("scrapr.reextract.configure_logging"):
+        with patch("scrapr.reextract.create_parser") as mock_create_parser:
+            with patch("scrapr.reextract.reextract", side_effect=OSError("disk full")):
+                mock_get_site.return_value.PARAMS = SITE_PARAMS
+                with pytest.raises(OSError):
+                    main([str(archive)])
+
+    mock_create_parser.return_value.close.assert_called_once_with()
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from scrapr.action.schedule import Job, run_jobs
+
+
+def test_run_jobs_runs_every_job_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+    finished = []
+
+    def _job(name):
+        def _run():
+            barrier.wait()
+            finished.append(name)
+
+        return Job(name, _run)
+
+    failures = run_jobs([_job("a"), _job("b"), _job("c")])
+
+    assert failures == {}
+    assert sorted(finished) == ["a", "b", "c"]
+
+
+def test_run_jobs_limits_concurrency():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def _run():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        threading.Event().wait(0.01)
+        with lock:
+            running.pop()
+
+    run_jobs([Job(str(index), _run) for index in range(6)], max_concurrent=2)
+
+    assert max(peak) <= 2
+
+
+def test_failing_job_does_not_stop_the_others(caplog):
+    finished = []
+
+    def _fail():
+        raise RuntimeError("site is down")
+
+    failures = run_jobs([Job("broken", _fail), Job("working", lambda: finished.append("working"))])
+
+    assert list(failures) == ["broken"]
+    assert isinstance(failures["broken"], RuntimeError)
+    assert finished == ["working"]
+    assert "Job broken failed: site is down" in caplog.text
+
+
+def test_run_jobs_rejects_invalid_concurrency():
+    with pytest.raises(ValueError):
+        run_jobs([], max_concurrent=0)
+
+
+def test_run_jobs_without_jobs():
+    assert run_jobs([]) == {}
@@ -1,9 +1,16 @@
+import io
+
 import pytest
 from unittest.mock import Mock, patch
 from bs4 import BeautifulSoup
 import requests
 from requests.exceptions import RequestException
-from scrapr.action.scrape import Scraper, ScraperServiceCreditsExhaustedException
+from scrapr.action.metrics import REGISTRY
+from scrapr.action.cache import CacheMissException, HtmlCache
+from scrapr.action.throttle import CreditAccountant, CreditBudgetReachedException, RateLimiter
+from scrapr.action.scrape import (ACCEPT_ENCODING, API, API_RENDER, DIRECT, FETCH_TIERS, ResponseTooLargeException,
+                                  Scraper, ScraperServiceCreditsExhaustedException, create_session, decode_html,
+                                  read_body)
 
 @pytest.fixture
 def scraper():
@@ -21,6 +28,9 @@ def mock_response():
         </body>
     </html>
     """
+    mock.content = mock.text.encode("utf-8")
+    mock.headers = {"Content-Type": "text/html; charset=utf-8"}
+    mock.iter_content.return_value = [mock.content]
     return mock
 
 def test_scraper_initialization():
@@ -31,6 +41,283 @@ def test_scraper_initialization():
     assert scraper.api_url == api_url
     assert scraper.api_key == api_key
 
+def test_scraper_owns_pooled_session():
+    scraper = Scraper(api_url="https://api.example.com", api_key="test_key", pool_size=20, max_retries=5)
+
+    adapter = scraper.session.get_adapter("https://api.example.com")
+
+    assert adapter._pool_maxsize == 20
+    assert adapter.max_retries.total == 0
+    assert scraper.retry.total == 5
+    assert scraper.session.headers["Connection"] == "keep-alive"
+
+def test_scraper_retries_transient_errors_but_not_forbidden():
+    scraper = Scraper(
+        api_url="https://api.example.com", api_key="test_key", max_retries=2, backoff_factor=0.1, backoff_jitter=0.2
+    )
+
+    retry = scraper.retry
+
+    assert retry.backoff_factor == 0.1
+    assert retry.backoff_jitter == 0.2
+    for status in (429, 500, 502, 503, 504):
+        assert retry.is_retry("GET", status)
+    assert not retry.is_retry("GET", 403)
+
+@patch('requests.Session.get')
+def test_get_html_using_scraper_api_reuses_session(mock_get, scraper, mock_response):
+    mock_get.return_value = mock_response
+    mock_response.raise_for_status = Mock()
+
+    scraper._get_html_using_scraper_api("https://example.com/1")
+    scraper._get_html_using_scraper_api("https://example.com/2")
+
+    assert mock_get.call_count == 2
+    assert mock_get.call_args.kwargs["timeout"] == 30
+
+@patch('requests.Session.get')
+def test_requests_record_latency_and_bytes(mock_get, scraper, mock_response):
+    REGISTRY.reset()
+    mock_get.return_value = mock_response
+    mock_response.status_code = 200
+
+    scraper._get_html_using_scraper_api("https://example.com/1")
+    mock_get.side_effect = requests.ConnectionError("refused")
+    with pytest.raises(RequestException):
+        scraper._get_html_using_scraper_api("https://example.com/2")
+
+    assert REGISTRY.histogram("request_seconds", target="api", status="200").count == 1
+    assert REGISTRY.histogram("request_seconds", target="api", status="error").count == 1
+    assert REGISTRY.value("bytes_downloaded", target="api") == len(mock_response.content)
+
+@patch('requests.Session.get')
+def test_get_html_using_scraper_api_server_error_after_retries(mock_get, scraper):
+    mock_response = Mock()
+    mock_response.status_code = 503
+    mock_response.content = b"Service unavailable"
+    mock_get.return_value.raise_for_status.side_effect = requests.HTTPError(response=mock_response)
+
+    with pytest.raises(RequestException) as exc_info:
+        scraper._get_html_using_scraper_api("https://example.com")
+    assert "HTTP error occurred" in str(exc_info.value)
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+def test_get_html_from_serves_repeat_requests_from_cache(mock_get_html, tmp_path):
+    mock_get_html.return_value = "<html></html>"
+    scraper = Scraper(api_url="https://api.example.com", api_key="test_key", cache=HtmlCache(str(tmp_path)))
+
+    assert scraper.get_html_from("https://example.com/a") == "<html></html>"
+    assert scraper.get_html_from("https://example.com/a/") == "<html></html>"
+    mock_get_html.assert_called_once_with(target_url="https://example.com/a", render=True)
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+def test_get_html_from_offline_never_touches_network(mock_get_html, tmp_path):
+    cache = HtmlCache(str(tmp_path))
+    cache.put("https://example.com/a", {'render': 'true', 'autoparse': 'false'}, "cached")
+    scraper = Scraper(api_url="https://api.example.com", api_key="test_key", cache=cache, offline=True)
+
+    assert scraper.get_html_from("https://example.com/a") == "cached"
+    with pytest.raises(CacheMissException):
+        scraper.get_html_from("https://example.com/b")
+    mock_get_html.assert_not_called()
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+def test_get_html_from_offline_serves_expired_pages(mock_get_html, tmp_path):
+    import time
+
+    cache = HtmlCache(str(tmp_path), default_ttl=60)
+    cache.put("https://example.com/a", {'render': 'true', 'autoparse': 'false'}, "cached")
+    scraper = Scraper(api_url="https://api.example.com", api_key="test_key", cache=cache, offline=True)
+
+    now = time.time()
+    with patch("time.time", return_value=now + 3600):
+        assert scraper.get_html_from("https://example.com/a") == "cached"
+    mock_get_html.assert_not_called()
+
+@pytest.fixture
+def ladder_scraper():
+    return Scraper(
+        api_url="https://api.example.com",
+        api_key="test_key",
+        tiers=FETCH_TIERS,
+        validator=lambda url, html: "rendered" in html or "static" in html,
+    )
+
+def test_scraper_rejects_unknown_tiers():
+    with pytest.raises(ValueError):
+        Scraper(api_url="https://api.example.com", api_key="test_key", tiers=("browser",))
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+@patch.object(Scraper, '_get_html_directly')
+def test_get_html_from_stops_at_cheapest_valid_tier(mock_direct, mock_api, ladder_scraper):
+    mock_direct.return_value = "<p>static</p>"
+
+    assert ladder_scraper.get_html_from("https://example.com/consultants?page=1") == "<p>static</p>"
+    mock_api.assert_not_called()
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+@patch.object(Scraper, '_get_html_directly')
+def test_get_html_from_escalates_and_remembers_tier(mock_direct, mock_api, ladder_scraper):
+    mock_direct.return_value = "<p>loading...</p>"
+    mock_api.side_effect = lambda target_url, render: "<p>rendered</p>" if render else "<p>loading...</p>"
+
+    assert ladder_scraper.get_html_from("https://example.com/consultant/1/") == "<p>rendered</p>"
+    assert ladder_scraper.get_html_from("https://example.com/consultant/2/") == "<p>rendered</p>"
+
+    # The second consultant page starts at the tier that worked for the first.
+    assert mock_direct.call_count == 1
+    assert mock_api.call_count == 3
+    assert ladder_scraper.tier_by_pattern == {"https://example.com/consultant/*": FETCH_TIERS.index(API_RENDER)}
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+@patch.object(Scraper, '_get_html_directly')
+def test_get_html_from_escalates_past_failed_tier(mock_direct, mock_api, ladder_scraper):
+    mock_direct.side_effect = RequestException("blocked")
+    mock_api.return_value = "<p>static</p>"
+
+    assert ladder_scraper.get_html_from("https://example.com/a") == "<p>static</p>"
+    mock_api.assert_called_once_with(target_url="https://example.com/a", render=False)
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+@patch.object(Scraper, '_get_html_directly')
+def test_get_html_from_returns_last_page_when_no_tier_validates(mock_direct, mock_api, ladder_scraper):
+    mock_direct.return_value = "<p>direct</p>"
+    mock_api.side_effect = lambda target_url, render: "<p>api</p>" if not render else "<p>still empty</p>"
+
+    assert ladder_scraper.get_html_from("https://example.com/a") == "<p>still empty</p>"
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+@patch.object(Scraper, '_get_html_directly')
+def test_get_html_from_credits_exhausted_is_not_escalated(mock_direct, mock_api, ladder_scraper):
+    mock_direct.return_value = "<p>loading...</p>"
+    mock_api.side_effect = ScraperServiceCreditsExhaustedException()
+
+    with pytest.raises(ScraperServiceCreditsExhaustedException):
+        ladder_scraper.get_html_from("https://example.com/a")
+    assert mock_api.call_count == 1
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+@patch.object(Scraper, '_get_html_directly')
+def test_get_html_from_raises_when_every_tier_fails(mock_direct, mock_api, ladder_scraper):
+    mock_direct.side_effect = RequestException("blocked")
+    mock_api.side_effect = RequestException("down")
+
+    with pytest.raises(RequestException, match="down"):
+        ladder_scraper.get_html_from("https://example.com/a")
+
+@patch('requests.Session.get')
+def test_get_html_using_scraper_api_without_rendering(mock_get, scraper, mock_response):
+    mock_get.return_value = mock_response
+
+    scraper._get_html_using_scraper_api("https://example.com", render=False)
+
+    assert mock_get.call_args.kwargs["params"]["render"] == "false"
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+@patch.object(Scraper, '_get_html_directly')
+def test_get_html_from_charges_api_tiers_only(mock_direct, mock_api):
+    accountant = CreditAccountant(budget=11)
+    scraper = Scraper(
+        api_url="https://api.example.com",
+        api_key="test_key",
+        tiers=FETCH_TIERS,
+        validator=lambda url, html: html == "rendered",
+        accountant=accountant,
+    )
+    mock_direct.return_value = "static"
+    mock_api.side_effect = lambda target_url, render: "rendered" if render else "static"
+
+    assert scraper.get_html_from("https://example.com/a") == "rendered"
+    assert accountant.calls == {"api": 1, "api_render": 1}
+
+    with pytest.raises(CreditBudgetReachedException):
+        scraper.get_html_from("https://example.com/b")
+    assert mock_api.call_count == 2
+
+@patch.object(Scraper, '_get_html_using_scraper_api', return_value="<p>page</p>")
+def test_get_html_from_uses_api_and_host_limiters(mock_api):
+    api_limiter = Mock(wraps=RateLimiter(max_concurrent=1))
+    host_limiter = Mock(wraps=RateLimiter(requests_per_second=100))
+    scraper = Scraper(
+        api_url="https://api.example.com", api_key="test_key", api_limiter=api_limiter, host_limiter=host_limiter
+    )
+
+    scraper.get_html_from("https://example.com/a")
+
+    api_limiter.slot.assert_called_once_with("test_key")
+    host_limiter.slot.assert_called_once_with("example.com")
+
+def _server_error(status_code=503, headers=None):
+    response = Mock(status_code=status_code, headers=headers or {})
+    return RequestException(f"HTTP error occurred: {status_code}", response=response)
+
+@patch('time.sleep')
+@patch.object(Scraper, '_get_html_using_scraper_api')
+def test_get_html_from_throttles_and_charges_every_retry(mock_api, mock_sleep):
+    accountant = CreditAccountant()
+    api_limiter = Mock(wraps=RateLimiter(max_concurrent=1))
+    scraper = Scraper(
+        api_url="https://api.example.com", api_key="test_key", accountant=accountant, api_limiter=api_limiter
+    )
+    mock_api.side_effect = [
+        _server_error(headers={"Retry-After": "2"}),
+        requests.ConnectionError("reset"),
+        "<p>page</p>",
+    ]
+
+    assert scraper.get_html_from("https://example.com/a") == "<p>page</p>"
+    assert api_limiter.slot.call_count == 3
+    assert accountant.calls == {"api_render": 1}
+    assert mock_sleep.call_args_list[0].args == (2,)
+
+@patch('time.sleep')
+@patch.object(Scraper, '_get_html_using_scraper_api')
+def test_get_html_from_gives_up_after_max_retries(mock_api, mock_sleep):
+    accountant = Mock(wraps=CreditAccountant())
+    scraper = Scraper(api_url="https://api.example.com", api_key="test_key", accountant=accountant, max_retries=2)
+    mock_api.side_effect = _server_error()
+
+    with pytest.raises(RequestException, match="503"):
+        scraper.get_html_from("https://example.com/a")
+    assert mock_api.call_count == 3
+    assert accountant.charge.call_count == 3
+
+@patch('time.sleep')
+@patch.object(Scraper, '_get_html_using_scraper_api')
+def test_get_html_from_does_not_retry_client_errors(mock_api, mock_sleep):
+    scraper = Scraper(api_url="https://api.example.com", api_key="test_key")
+    mock_api.side_effect = _server_error(status_code=404)
+
+    with pytest.raises(RequestException):
+        scraper.get_html_from("https://example.com/a")
+    assert mock_api.call_count == 1
+    mock_sleep.assert_not_called()
+
+@patch.object(Scraper, 'get_html_from')
+def test_extract_pages_from_targets_finishes_cleanly_on_budget(mock_get_html, scraper):
+    mock_get_html.side_effect = CreditBudgetReachedException()
+
+    assert scraper.extract_pages_from_targets(["https://example.com/1"], "https://example.com") == []
+    assert not scraper.crawled_everything
+
+@patch.object(Scraper, 'get_html_from')
+def test_iter_pages_from_targets_hands_on_pages_before_credits_error(mock_get_html, scraper):
+    pages = {"https://example.com/1": '<a href="https://example.com/2">2</a>'}
+    received = []
+
+    def _get_html(url):
+        if url not in pages:
+            raise ScraperServiceCreditsExhaustedException()
+        return pages[url]
+
+    mock_get_html.side_effect = _get_html
+
+    with pytest.raises(ScraperServiceCreditsExhaustedException):
+        for page in scraper.iter_pages_from_targets(["https://example.com/1"], "https://example.com"):
+            received.append(page)
+
+    assert received == [("https://example.com/1", pages["https://example.com/1"])]
+
 def test_is_valid_url():
     assert Scraper._is_valid_url("https://example.com/test", "https://example.com")
     assert Scraper._is_valid_url("https://example.com/test", "https://example.com", "test")
@@ -51,7 +338,7 @@ def test_get_target_contact_urls():
     result = Scraper.get_target_contact_urls(base_url, query_param, total_pages)
     assert result == expected
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_get_html_using_scraper_api_success(mock_get, scraper, mock_response):
     mock_get.return_value = mock_response
     mock_response.raise_for_status = Mock()
@@ -61,7 +348,7 @@ def test_get_html_using_scraper_api_success(mock_get, scraper, mock_response):
     assert result == mock_response.text
     mock_get.assert_called_once()
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_get_html_using_scraper_api_credits_exhausted(mock_get, scraper):
     mock_response = Mock()
     mock_response.status_code = 403
@@ -71,7 +358,7 @@ def test_get_html_using_scraper_api_credits_exhausted(mock_get, scraper):
     with pytest.raises(ScraperServiceCreditsExhaustedException):
         scraper._get_html_using_scraper_api("https://example.com")
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_get_html_using_scraper_api_forbidden(mock_get, scraper):
     mock_response = Mock()
     mock_response.status_code = 403
@@ -107,22 +394,90 @@ def test_extract_urls_from_target(mock_get_html, scraper):
 
     assert result == expected_urls
 
-def test_extract_urls_from_targets(scraper):
-    with patch.object(Scraper, '_extract_urls_from_target') as mock_extract:
-        mock_extract.side_effect = [
-            {"https://example.com/page1"},
-            {"https://example.com/page2"}
-        ]
+@pytest.mark.parametrize("link_backend", ["lxml", "soup"])
+def test_extract_links_filters_resolved_urls(link_backend):
+    scraper = Scraper(api_url="https://api.example.com", api_key="test_key", link_backend=link_backend)
+    html = '<a href="/consultant/1/">1</a><a href="/about">About</a><a href="https://other.com/consultant/2">2</a>'
+
+    result = scraper._extract_links(html, "https://example.com/consultants", "https://example.com/consultant/")
 
+    assert result == {"https://example.com/consultant/1/"}
+
+def test_extract_urls_from_targets(scraper):
+    pages = {
+        "https://example.com/1": '<a href="/page1">Page 1</a>',
+        "https://example.com/2": '<a href="/page2">Page 2</a>',
+        "https://example.com/page1": "",
+        "https://example.com/page2": "",
+    }
+    with patch.object(Scraper, 'get_html_from', side_effect=pages.get) as mock_get_html:
         target_urls = ["https://example.com/1", "https://example.com/2"]
-        filter_url = "https://example.com"
+        filter_url = "https://example.com/page"
 
         result = scraper.extract_urls_from_targets(target_urls, filter_url)
 
-        assert sorted(result) == sorted(["https://example.com/page1", "https://example.com/page2"])
-        assert mock_extract.call_count == 2
+        assert sorted(result) == sorted(pages)
+        assert mock_get_html.call_count == 4
 
-@patch('requests.get')
+def test_extract_urls_from_targets_fetches_shared_pages_once(scraper):
+    pages = {
+        "https://example.com/1": '<a href="/page1/">Page 1</a>',
+        "https://example.com/2": '<a href="/page1#bio">Page 1</a>',
+    }
+    with patch.object(Scraper, 'get_html_from', side_effect=lambda url: pages.get(url, "")) as mock_get_html:
+        result = scraper.extract_urls_from_targets(list(pages)[:2], "https://example.com/page")
+
+    assert len(result) == 3
+    assert mock_get_html.call_count == 3
+    assert scraper.fetches_avoided == 1
+
+def test_extract_pages_from_targets_returns_crawled_html(scraper):
+    pages = {
+        "https://example.com/1": '<a href="/page1">Page 1</a>',
+        "https://example.com/page1": "<p>Contact</p>",
+    }
+    with patch.object(Scraper, 'get_html_from', side_effect=pages.get) as mock_get_html:
+        result = scraper.extract_pages_from_targets(["https://example.com/1"], "https://example.com/page")
+
+    assert sorted(result) == sorted(pages.items())
+    assert mock_get_html.call_count == 2
+    assert scraper.crawled_everything
+
+@patch.object(Scraper, 'get_html_from')
+def test_crawl_that_gives_up_on_a_page_has_not_crawled_everything(mock_get_html, scraper):
+    mock_get_html.side_effect = RequestException("500 Server Error")
+
+    assert scraper.extract_pages_from_targets(["https://example.com/1"], "https://example.com") == []
+    assert not scraper.crawled_everything
+
+def test_iter_pages_from_targets_streams_crawled_html(scraper):
+    pages = {
+        "https://example.com/1": '<a href="/page1">Page 1</a>',
+        "https://example.com/page1": "<p>Contact</p>",
+    }
+    with patch.object(Scraper, 'get_html_from', side_effect=pages.get):
+        stream = scraper.iter_pages_from_targets(["https://example.com/1"], "https://example.com/page", buffer_size=1)
+
+        assert sorted(stream) == sorted(pages.items())
+
+@patch.object(Scraper, 'get_html_from')
+def test_iter_pages_from_targets_credits_exhausted(mock_get_html, scraper):
+    mock_get_html.side_effect = ScraperServiceCreditsExhaustedException()
+
+    with pytest.raises(ScraperServiceCreditsExhaustedException):
+        list(scraper.iter_pages_from_targets(["https://example.com/1"], "https://example.com"))
+
+def test_extract_urls_from_targets_empty(scraper):
+    assert scraper.extract_urls_from_targets([], "https://example.com") == []
+
+@patch.object(Scraper, 'get_html_from')
+def test_extract_urls_from_target_credits_exhausted(mock_get_html, scraper):
+    mock_get_html.side_effect = ScraperServiceCreditsExhaustedException()
+
+    with pytest.raises(ScraperServiceCreditsExhaustedException):
+        scraper.extract_urls_from_targets(["https://example.com/1"], "https://example.com")
+
+@patch('requests.Session.get')
 def test_get_html_using_scraper_api_timeout(mock_get, scraper):
     mock_get.side_effect = requests.Timeout()
 
@@ -136,3 +491,126 @@ def test_scraper_service_credits_exhausted_exception():
 
     default_exception = ScraperServiceCreditsExhaustedException()
     assert str(default_exception) == "No credits remaining in account."
+
+
+def test_discover_total_pages_uses_scraper_fetch_and_filter():
+    scraper = Scraper("https://api.example.com", "test_key", tiers=("direct",))
+    pages = {
+        "https://example.com/list?page=1": '<a href="https://example.com/doctor/1">1</a><a href="?page=2">2</a>',
+        "https://example.com/list?page=2": '<a href="https://example.com/doctor/2">2</a><a href="?page=1">1</a>',
+    }
+
+    with patch.object(scraper, "get_html_from", side_effect=lambda url: pages.get(url, "")) as mock_get:
+        assert scraper.discover_total_pages("https://example.com/list", "?page=", "https://example.com/doctor/") == 2
+
+    assert mock_get.call_count == 2
+
+
+def test_discover_urls_from_sitemaps_is_off_by_default():
+    scraper = Scraper("https://api.example.com", "test_key")
+
+    with patch("requests.Session.get") as mock_get:
+        assert scraper.discover_urls_from_sitemaps("https://example.com/", "https://example.com/doctor/") is None
+
+    mock_get.assert_not_called()
+
+
+class _RawResponse(io.BytesIO):
+    decode_content = False
+
+
+def test_discover_urls_from_sitemaps_streams_direct_requests():
+    scraper = Scraper("https://api.example.com", "test_key", sitemaps=True)
+    sitemap = (
+        b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        b"<url><loc>https://example.com/doctor/1</loc></url></urlset>"
+    )
+
+    def _get(url, timeout, stream):
+        response = Mock()
+        response.raw = _RawResponse(sitemap if url.endswith("sitemap.xml") else b"")
+        return response
+
+    with patch("requests.Session.get", side_effect=_get) as mock_get:
+        urls = scraper.discover_urls_from_sitemaps("https://example.com/doctors/", "https://example.com/doctor/")
+
+    assert urls == ["https://example.com/doctor/1"]
+    assert [call.kwargs["url"] for call in mock_get.call_args_list] == [
+        "https://example.com/robots.txt",
+        "https://example.com/sitemap.xml",
+    ]
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+def test_get_html_from_archives_fetched_pages(mock_get_html, tmp_path):
+    from scrapr.action.warc import WarcWriter, iter_warc_records
+
+    mock_get_html.return_value = "<p>page</p>"
+    path = str(tmp_path / "crawl.warc.gz")
+    with WarcWriter(path) as archive:
+        scraper = Scraper(api_url="https://api.example.com", api_key="test_key", archive=archive)
+        scraper.get_html_from("https://example.com/a")
+
+    headers, block = list(iter_warc_records(path))[-1]
+    assert headers["WARC-Target-URI"] == "https://example.com/a"
+    assert headers["WARC-Scrapr-Tier"] == "api_render"
+    assert block == b"<p>page</p>"
+
+def test_create_session_negotiates_compression():
+    assert "gzip" in ACCEPT_ENCODING
+    assert create_session().headers["Accept-Encoding"] == ACCEPT_ENCODING
+
+def _streamed_response(chunks, headers=None):
+    response = Mock()
+    response.url = "https://example.com/a"
+    response.headers = headers or {}
+    response.iter_content.return_value = iter(chunks)
+    return response
+
+def test_read_body_joins_streamed_chunks():
+    assert read_body(_streamed_response([b"<p>", b"a</p>"]), max_bytes=10) == b"<p>a</p>"
+
+def test_read_body_stops_at_max_bytes():
+    read = []
+
+    def _chunks():
+        for chunk in (b"x" * 6, b"x" * 6, b"x" * 6):
+            read.append(chunk)
+            yield chunk
+
+    with pytest.raises(ResponseTooLargeException):
+        read_body(_streamed_response(_chunks()), max_bytes=10)
+    assert len(read) == 2
+
+def test_read_body_rejects_declared_oversized_response_without_reading():
+    response = _streamed_response([], headers={"Content-Length": "11"})
+
+    with pytest.raises(ResponseTooLargeException, match="declares 11 bytes"):
+        read_body(response, max_bytes=10)
+    response.iter_content.assert_not_called()
+
+def test_decode_html_uses_declared_encoding():
+    body = "<p>café</p>".encode("cp1252")
+
+    assert decode_html(body, "text/html; charset=windows-1252") == "<p>café</p>"
+    assert decode_html(b'<meta charset="windows-1252">' + body) == '<meta charset="windows-1252"><p>café</p>'
+    assert decode_html("<p>café</p>".encode("utf-8"), "text/html") == "<p>café</p>"
+    assert decode_html(b"<p>\xff</p>", "text/html; charset=no-such-codec") == "<p>�</p>"
+
+@patch('requests.Session.get')
+def test_get_html_directly_streams_and_decodes_bytes(mock_get, scraper, mock_response):
+    mock_response.headers = {"Content-Type": "text/html; charset=iso-8859-1"}
+    mock_response.iter_content.return_value = ["<p>café</p>".encode("iso-8859-1")]
+    mock_get.return_value = mock_response
+
+    assert scraper._get_html_directly("https://example.com/a") == "<p>café</p>"
+    assert mock_get.call_args.kwargs["stream"] is True
+    mock_response.close.assert_called_once()
+
+@patch.object(Scraper, '_get_html_using_scraper_api')
+@patch.object(Scraper, '_get_html_directly')
+def test_get_html_from_does_not_escalate_oversized_pages(mock_direct, mock_api, ladder_scraper):
+    mock_direct.side_effect = ResponseTooLargeException()
+
+    with pytest.raises(ResponseTooLargeException):
+        ladder_scraper.get_html_from("https://example.com/a")
+    mock_api.assert_not_called()
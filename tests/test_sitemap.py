@@ -0,0 +1,204 @@
+import gzip
+import io
+from datetime import datetime, timezone
+
+import pytest
+from requests.exceptions import HTTPError
+
+from scrapr.action.sitemap import (
+    SitemapEntry,
+    SitemapTooLargeException,
+    discover_urls_from_sitemaps,
+    iter_sitemap,
+    parse_lastmod,
+    sitemap_urls_from_robots,
+)
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def _urlset(*entries):
+    urls = "".join(
+        f"<url><loc>{loc}</loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}</url>" for loc, lastmod in entries
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{urls}</urlset>'.encode()
+
+
+def _index(*locs):
+    sitemaps = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs)
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {NS}>{sitemaps}</sitemapindex>'.encode()
+
+
+def _opener(documents):
+    opened = []
+
+    def _open(url):
+        opened.append(url)
+        if url not in documents:
+            raise HTTPError(f"404 Client Error: Not Found for url: {url}")
+        return io.BytesIO(documents[url])
+
+    _open.opened = opened
+    return _open
+
+
+def test_sitemap_urls_from_robots():
+    robots = "User-agent: *\nDisallow: /admin\nSitemap: https://example.com/a.xml\nsitemap: /b.xml.gz\n"
+
+    assert sitemap_urls_from_robots(robots, "https://example.com/") == [
+        "https://example.com/a.xml",
+        "https://example.com/b.xml.gz",
+    ]
+
+
+def test_parse_lastmod():
+    assert parse_lastmod("2024-05-01") == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert parse_lastmod("2024-05-01T10:00:00+01:00").utcoffset().total_seconds() == 3600
+    assert parse_lastmod("yesterday") is None
+    assert parse_lastmod(None) is None
+
+
+def test_iter_sitemap_reads_plain_and_gzipped_documents():
+    document = _urlset(("https://example.com/doctor/1", "2024-01-01"), ("https://example.com/doctor/2", None))
+    expected = [
+        SitemapEntry("https://example.com/doctor/1", datetime(2024, 1, 1, tzinfo=timezone.utc)),
+        SitemapEntry("https://example.com/doctor/2", None),
+    ]
+
+    assert list(iter_sitemap(io.BytesIO(document))) == expected
+    assert list(iter_sitemap(io.BytesIO(gzip.compress(document)))) == expected
+
+
+def test_iter_sitemap_yields_child_sitemaps_of_an_index():
+    assert list(iter_sitemap(io.BytesIO(_index("https://example.com/a.xml")))) == ["https://example.com/a.xml"]
+
+
+def test_discovery_follows_robots_and_sitemap_indexes():
+    open_url = _opener(
+        {
+            "https://example.com/robots.txt": b"Sitemap: https://example.com/index.xml",
+            "https://example.com/index.xml": _index(
+                "https://example.com/doctors.xml.gz", "https://example.com/pages.xml"
+            ),
+            "https://example.com/doctors.xml.gz": gzip.compress(
+                _urlset(("https://example.com/doctor/1", None), ("https://example.com/doctor/2", None))
+            ),
+            "https://example.com/pages.xml": _urlset(
+                ("https://example.com/about", None), ("https://example.com/doctor/1", None)
+            ),
+        }
+    )
+
+    urls = discover_urls_from_sitemaps(open_url, "https://example.com/doctors/", "https://example.com/doctor/")
+
+    assert urls == ["https://example.com/doctor/1", "https://example.com/doctor/2"]
+
+
+def test_discovery_falls_back_to_the_default_sitemap_location():
+    open_url = _opener({"https://example.com/sitemap.xml": _urlset(("https://example.com/doctor/1", None))})
+
+    assert discover_urls_from_sitemaps(open_url, "https://example.com/x", "https://example.com/doctor/") == [
+        "https://example.com/doctor/1"
+    ]
+
+
+def test_discovery_filters_by_lastmod():
+    open_url = _opener(
+        {
+            "https://example.com/sitemap.xml": _urlset(
+                ("https://example.com/doctor/old", "2023-01-01"),
+                ("https://example.com/doctor/new", "2024-06-01"),
+                ("https://example.com/doctor/undated", None),
+            )
+        }
+    )
+
+    urls = discover_urls_from_sitemaps(
+        open_url, "https://example.com/", "https://example.com/doctor/", since=datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )
+
+    assert urls == ["https://example.com/doctor/new", "https://example.com/doctor/undated"]
+
+
+def test_discovery_reads_a_naive_since_as_utc():
+    open_url = _opener(
+        {
+            "https://example.com/sitemap.xml": _urlset(
+                ("https://example.com/doctor/old", "2023-12-31T23:00:00+00:00"),
+                ("https://example.com/doctor/new", "2024-01-01T01:00:00+00:00"),
+            )
+        }
+    )
+
+    urls = discover_urls_from_sitemaps(
+        open_url, "https://example.com/", "https://example.com/doctor/", since=datetime(2024, 1, 1)
+    )
+
+    assert urls == ["https://example.com/doctor/new"]
+
+
+def test_discovery_without_sitemap_returns_none(caplog):
+    open_url = _opener({})
+
+    assert discover_urls_from_sitemaps(open_url, "https://example.com/", "https://example.com/doctor/") is None
+    assert "Ignoring unreadable sitemap https://example.com/sitemap.xml" in caplog.text
+
+
+def test_discovery_with_nothing_new_returns_an_empty_list():
+    open_url = _opener({"https://example.com/sitemap.xml": _urlset(("https://example.com/about", None))})
+
+    assert discover_urls_from_sitemaps(open_url, "https://example.com/", "https://example.com/doctor/") == []
+
+
+def test_iter_sitemap_refuses_documents_over_the_size_limit():
+    document = _urlset(*((f"https://example.com/doctor/{index}", None) for index in range(1000)))
+
+    with pytest.raises(SitemapTooLargeException):
+        list(iter_sitemap(io.BytesIO(document), max_bytes=len(document) - 1))
+    # A small compressed document does not get past the limit by expanding once decompressed.
+    with pytest.raises(SitemapTooLargeException):
+        list(iter_sitemap(io.BytesIO(gzip.compress(document)), max_bytes=len(document) // 2))
+    assert len(list(iter_sitemap(io.BytesIO(gzip.compress(document)), max_bytes=len(document)))) == 1000
+
+
+def test_discovery_ignores_sitemaps_over_the_size_limit(caplog):
+    open_url = _opener({"https://example.com/sitemap.xml": _urlset(("https://example.com/doctor/1", None))})
+
+    urls = discover_urls_from_sitemaps(open_url, "https://example.com/", "https://example.com/doctor/", max_bytes=10)
+
+    assert urls is None
+    assert "larger than 10 bytes" in caplog.text
+
+
+def test_discovery_survives_malformed_sitemaps():
+    open_url = _opener(
+        {
+            "https://example.com/robots.txt": b"Sitemap: /broken.xml\nSitemap: /good.xml",
+            "https://example.com/broken.xml": b"<urlset><url><loc>",
+            "https://example.com/good.xml": _urlset(("https://example.com/doctor/1", None)),
+        }
+    )
+
+    assert discover_urls_from_sitemaps(open_url, "https://example.com/", "https://example.com/doctor/") == [
+        "https://example.com/doctor/1"
+    ]
+
+
+def test_discovery_ignores_sitemaps_that_declare_entities(caplog):
+    bomb = (
+        b'<?xml version="1.0"?><!DOCTYPE urlset [<!ENTITY a "aaaaaaaaaa">]><urlset><url><loc>&a;</loc></url></urlset>'
+    )
+    open_url = _opener({"https://example.com/sitemap.xml": bomb})
+
+    assert discover_urls_from_sitemaps(open_url, "https://example.com/", "https://example.com/doctor/") is None
+    assert "Ignoring unreadable sitemap https://example.com/sitemap.xml" in caplog.text
+
+
+def test_discovery_stops_after_max_sitemaps():
+    open_url = _opener(
+        {"https://example.com/sitemap.xml": _index(*(f"https://example.com/{index}.xml" for index in range(10)))}
+    )
+
+    discover_urls_from_sitemaps(open_url, "https://example.com/", "https://example.com/doctor/", max_sitemaps=3)
+
+    assert len(open_url.opened) == 4
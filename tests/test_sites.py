@@ -0,0 +1,40 @@
+from types import ModuleType
+from unittest.mock import Mock, patch
+
+import pytest
+
+from scrapr.sites import get_site, load_sites, uic
+
+
+def test_load_sites_finds_modules_in_package():
+    assert load_sites()["uic"] is uic
+
+
+def test_load_sites_includes_entry_points():
+    site = ModuleType("clinic")
+    site.PARAMS = {}
+    site.execute = Mock()
+    site.create_page_validator = Mock()
+    entry_point = Mock()
+    entry_point.name = "clinic"
+    entry_point.load.return_value = site
+
+    with patch("scrapr.sites.entry_points", return_value=[entry_point]) as mock_entry_points:
+        sites = load_sites()
+
+    mock_entry_points.assert_called_once_with(group="scrapr.sites")
+    assert sites["clinic"] is site
+
+
+def test_load_sites_ignores_incomplete_plugins():
+    entry_point = Mock()
+    entry_point.name = "broken"
+    entry_point.load.return_value = ModuleType("broken")
+
+    with patch("scrapr.sites.entry_points", return_value=[entry_point]):
+        assert "broken" not in load_sites()
+
+
+def test_get_site_rejects_unknown_site():
+    with pytest.raises(ValueError, match="Unknown site 'nowhere'"):
+        get_site("nowhere")
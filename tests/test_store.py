@@ -0,0 +1,96 @@
+import sqlite3
+
+import pytest
+
+from scrapr.action.store import ContactQueries, SqliteContactStore
+from scrapr.model.contact import create_contact_from
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "data" / "contacts.sqlite")
+
+
+def _contact(gmc_number, phone_number="028 9068 7444", specialism="ENT"):
+    return create_contact_from([f"Dr {gmc_number}", specialism, gmc_number, "Adults", phone_number])
+
+
+def _run(store_path, contacts, site="uic", full_crawl=True):
+    store = SqliteContactStore(site, batch_size=2)
+    store.is_full_crawl = lambda: full_crawl
+    store(contacts, store_path)
+    return store
+
+
+def test_store_creates_database_with_indexes(store_path, caplog):
+    store = _run(store_path, [_contact("1"), _contact("2"), _contact("3")])
+
+    assert store.rows_written == 3
+    assert f"Data has been written to {store_path}." in caplog.text
+    connection = sqlite3.connect(store_path)
+    indexes = {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_contacts_gmc_number", "idx_contacts_specialism"} <= indexes
+    assert connection.execute("SELECT COUNT(*) FROM contacts").fetchone() == (3,)
+
+
+def test_rerunning_upserts_instead_of_duplicating(store_path):
+    _run(store_path, [_contact("1"), _contact("2")])
+    _run(store_path, [_contact("1"), _contact("2")])
+
+    queries = ContactQueries(store_path)
+    assert [row["gmc_number"] for row in queries.by_gmc_number("1")] == ["1"]
+    assert len(queries.by_specialism("ENT")) == 2
+
+
+def test_queries_report_new_changed_and_removed_contacts(store_path):
+    first = _run(store_path, [_contact("1"), _contact("2"), _contact("3")])
+    second = _run(store_path, [_contact("1"), _contact("2", phone_number="028 9000 0000"), _contact("4")])
+
+    queries = ContactQueries(store_path)
+    assert queries.last_run_started_at() == second.run_started_at
+    assert [row["gmc_number"] for row in queries.new_since(second.run_started_at)] == ["4"]
+    assert [row["gmc_number"] for row in queries.changed_since(second.run_started_at)] == ["2"]
+    assert [row["gmc_number"] for row in queries.removed_since(second.run_started_at)] == ["3"]
+
+    unchanged = queries.by_gmc_number("1")[0]
+    assert unchanged["first_seen"] < first.run_started_at + 60
+    assert unchanged["last_changed"] == unchanged["first_seen"]
+    assert unchanged["last_seen"] >= second.run_started_at
+
+
+def test_partial_runs_do_not_report_removals(store_path):
+    _run(store_path, [_contact("1"), _contact("2")])
+    partial = _run(store_path, [_contact("1")], full_crawl=False)
+
+    queries = ContactQueries(store_path)
+    assert queries.last_run_started_at() == partial.run_started_at
+    assert queries.removed_since(partial.run_started_at) == []
+
+    full = _run(store_path, [_contact("1")])
+    assert [row["gmc_number"] for row in queries.removed_since(partial.run_started_at)] == ["2"]
+    assert queries.removed_since(full.run_started_at + 60) == []
+
+
+def test_sites_sharing_a_store_keep_their_own_contacts(store_path):
+    _run(store_path, [_contact("1", specialism="ENT")], site="uic")
+    other = _run(store_path, [_contact("1", specialism="Cardiology"), _contact("2")], site="other")
+
+    uic = ContactQueries(store_path, site="uic")
+    assert [row["specialism"] for row in uic.by_gmc_number("1")] == ["ENT"]
+    assert uic.removed_since(other.run_started_at) == []
+    assert [row["gmc_number"] for row in uic.new_since(other.run_started_at)] == []
+    assert len(ContactQueries(store_path, site="other").by_gmc_number("1")) == 1
+
+
+def test_interrupted_run_keeps_flushed_batches(store_path):
+    def _contacts():
+        yield _contact("1")
+        yield _contact("2")
+        raise RuntimeError("crawl failed")
+
+    with pytest.raises(RuntimeError):
+        _run(store_path, _contacts())
+
+    queries = ContactQueries(store_path)
+    assert len(queries.by_specialism("ENT")) == 2
+    assert queries.last_run_started_at() is None
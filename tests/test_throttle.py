@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from scrapr.action.throttle import CreditAccountant, CreditBudgetReachedException, RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_spaces_requests_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        bucket.acquire()
+
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_token_bucket_allows_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, burst=3, clock=clock, sleep=clock.sleep)
+
+    for _ in range(3):
+        bucket.acquire()
+
+    assert clock.sleeps == []
+
+
+def test_token_bucket_rejects_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_rate_limiter_bounds_concurrency_per_key():
+    limiter = RateLimiter(max_concurrent=2)
+    lock = threading.Lock()
+    state = {"current": 0, "peak": 0}
+
+    def _request(key):
+        with limiter.slot(key):
+            with lock:
+                state["current"] += 1
+                state["peak"] = max(state["peak"], state["current"])
+            time.sleep(0.02)
+            with lock:
+                state["current"] -= 1
+
+    threads = [threading.Thread(target=_request, args=("api.example.com",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert state["peak"] == 2
+
+
+def test_rate_limiter_keys_are_independent():
+    limiter = RateLimiter(max_concurrent=1)
+
+    with limiter.slot("a.example.com"):
+        with limiter.slot("b.example.com"):
+            pass
+
+
+def test_unlimited_rate_limiter_is_a_no_op():
+    with RateLimiter().slot("anything"):
+        pass
+
+
+def test_accountant_tracks_costs_by_kind():
+    accountant = CreditAccountant()
+
+    with accountant.charge("api_render"):
+        pass
+    with accountant.charge("api"):
+        pass
+    with accountant.charge("direct"):
+        pass
+
+    assert accountant.spent == 11
+    assert accountant.calls == {"api_render": 1, "api": 1, "direct": 1}
+    assert accountant.remaining is None
+
+
+def test_accountant_stops_before_budget_is_exceeded():
+    accountant = CreditAccountant(budget=15)
+
+    with accountant.charge("api_render"):
+        pass
+    with pytest.raises(CreditBudgetReachedException):
+        with accountant.charge("api_render"):
+            pass
+    with accountant.charge("api"):
+        pass
+
+    assert accountant.spent == 11
+    assert accountant.remaining == 4
+
+
+def test_accountant_refunds_failed_calls():
+    accountant = CreditAccountant(budget=10)
+
+    with pytest.raises(RuntimeError):
+        with accountant.charge("api_render"):
+            raise RuntimeError("502")
+
+    with accountant.charge("api_render"):
+        pass
+    assert accountant.spent == 10
+
+
+def test_accountant_reserves_credits_for_calls_in_flight():
+    accountant = CreditAccountant(budget=10)
+
+    with accountant.charge("api_render"):
+        with pytest.raises(CreditBudgetReachedException):
+            with accountant.charge("api"):
+                pass
@@ -1,17 +1,24 @@
+import csv
 import pytest
 from unittest.mock import Mock, patch
 from typing import Dict, Any
 
+from scrapr.action.checkpoint import DONE, CrawlCheckpoint
+from scrapr.action.persist import CsvWriter
+from scrapr.action.scrape import Scraper
+
 # Assuming the module is named 'site_processor'
-from scrapr.sites.uic import execute, _get_contact_urls, _get_target_urls
+from scrapr.sites.uic import (execute, create_crawl_rules, create_page_validator, _get_contact_pages,
+                              _get_target_urls)
 
 @pytest.fixture
 def mock_scraper():
     scraper = Mock()
-    scraper.extract_urls_from_targets.return_value = [
-        "https://example.com/contact1",
-        "https://example.com/contact2"
+    scraper.iter_pages_from_targets.return_value = [
+        ("https://example.com/contact1", "<html>Contact 1</html>"),
+        ("https://example.com/contact2", "<html>Contact 2</html>")
     ]
+    scraper.discover_urls_from_sitemaps.return_value = None
     scraper.get_target_contact_urls.return_value = [
         "https://example.com/page1",
         "https://example.com/page2"
@@ -21,15 +28,20 @@ def mock_scraper():
 @pytest.fixture
 def mock_parser():
     parser = Mock()
-    parser.get_results.return_value = [
-        {"name": "Contact 1", "email": "contact1@example.com"},
-        {"name": "Contact 2", "email": "contact2@example.com"}
+    results = [
+        ["Contact 1", "ENT", "1", "Adults", "028 0000 0001"],
+        ["Contact 2", "ENT", "2", "Adults", "028 0000 0002"]
     ]
+    # Like the real parser, one result for each page it is handed.
+    parser.iter_results_from_html.side_effect = lambda pages: [result for _, result in zip(pages, results)]
     return parser
 
 @pytest.fixture
 def mock_writer():
-    return Mock()
+    written = []
+    writer = Mock(side_effect=lambda rows, output_file: written.extend(rows))
+    writer.written = written
+    return writer
 
 @pytest.fixture
 def command_dict(mock_scraper, mock_parser, mock_writer):
@@ -63,21 +75,21 @@ def test_get_target_urls(mock_scraper):
     )
     assert result == mock_scraper.get_target_contact_urls.return_value
 
-def test_get_contact_urls(mock_scraper):
+def test_get_contact_pages(mock_scraper):
     target_urls = ["https://example.com/page1", "https://example.com/page2"]
     filter_url = "https://example.com"
 
-    result = _get_contact_urls(
+    result = _get_contact_pages(
         target_urls=target_urls,
         filter_url=filter_url,
         scraper=mock_scraper
     )
 
-    mock_scraper.extract_urls_from_targets.assert_called_once_with(
+    mock_scraper.iter_pages_from_targets.assert_called_once_with(
         target_urls=target_urls,
         filter_url=filter_url
     )
-    assert result == mock_scraper.extract_urls_from_targets.return_value
+    assert result == mock_scraper.iter_pages_from_targets.return_value
 
 def test_execute_full_flow(command_dict):
     # Execute the main function
@@ -91,54 +103,97 @@ def test_execute_full_flow(command_dict):
     )
 
     target_urls = command_dict["scraper"].get_target_contact_urls.return_value
-    command_dict["scraper"].extract_urls_from_targets.assert_called_once_with(
+    command_dict["scraper"].iter_pages_from_targets.assert_called_once_with(
         target_urls=target_urls,
         filter_url=command_dict["filter_url"]
     )
 
     # Verify parser calls
-    contact_urls = command_dict["scraper"].extract_urls_from_targets.return_value
-    command_dict["parser"].get_results.assert_called_once_with(contact_urls)
+    command_dict["parser"].iter_results_from_html.assert_called_once()
 
     # Verify writer calls
-    contacts_list = command_dict["parser"].get_results.return_value
     command_dict["writer"].assert_called_once()
+    assert [row["full_name"] for row in command_dict["writer"].written] == ["Contact 1", "Contact 2"]
+
+def test_execute_discovers_pages_when_total_pages_is_zero(command_dict):
+    command_dict["total_pages"] = 0
+    command_dict["scraper"].discover_total_pages.return_value = 4
+
+    execute(command_dict)
+
+    command_dict["scraper"].discover_total_pages.assert_called_once_with(
+        command_dict["start_url"], command_dict["query_parameter_key"], command_dict["filter_url"]
+    )
+    command_dict["scraper"].get_target_contact_urls.assert_called_once_with(
+        command_dict["start_url"], command_dict["query_parameter_key"], 4
+    )
+
+def test_execute_uses_sitemap_urls_when_available(command_dict):
+    sitemap_urls = ["https://example.com/consultant/1", "https://example.com/consultant/2"]
+    command_dict["scraper"].discover_urls_from_sitemaps.return_value = sitemap_urls
+
+    execute(command_dict)
+
+    command_dict["scraper"].discover_urls_from_sitemaps.assert_called_once_with(
+        command_dict["start_url"], command_dict["filter_url"]
+    )
+    command_dict["scraper"].get_target_contact_urls.assert_not_called()
+    command_dict["scraper"].iter_pages_from_targets.assert_called_once_with(
+        target_urls=sitemap_urls, filter_url=command_dict["filter_url"]
+    )
+
+def test_execute_does_not_crawl_listing_pages_when_sitemap_has_nothing_new(command_dict):
+    command_dict["total_pages"] = 0
+    command_dict["scraper"].discover_urls_from_sitemaps.return_value = []
+
+    execute(command_dict)
+
+    command_dict["scraper"].discover_total_pages.assert_not_called()
+    command_dict["scraper"].get_target_contact_urls.assert_not_called()
+    command_dict["scraper"].iter_pages_from_targets.assert_called_once_with(
+        target_urls=[], filter_url=command_dict["filter_url"]
+    )
+
+def test_execute_with_fixed_total_pages_skips_discovery(command_dict):
+    execute(command_dict)
+
+    command_dict["scraper"].discover_total_pages.assert_not_called()
 
 def test_execute_with_missing_parameters():
     incomplete_command = {}
     with pytest.raises(AttributeError):
         execute(incomplete_command)
 
-@patch('scrapr.model.contact.create_contacts_from')
-def test_execute_with_contact_creation(mock_create_contacts, command_dict):
+@patch('scrapr.model.contact.to_rows')
+@patch('scrapr.model.contact.iter_contact_records_from')
+def test_execute_with_contact_creation(mock_create_contacts, mock_to_rows, command_dict):
     mock_create_contacts.return_value = [
         {"name": "Processed Contact 1", "email": "processed1@example.com"},
         {"name": "Processed Contact 2", "email": "processed2@example.com"}
     ]
+    mock_to_rows.return_value = iter(mock_create_contacts.return_value)
 
     execute(command_dict)
 
     # Verify contact creation was called
-    mock_create_contacts.assert_called_once_with(
-        command_dict["parser"].get_results.return_value
-    )
+    mock_create_contacts.assert_called_once()
 
     # Verify writer was called with processed contacts
-    command_dict["writer"].assert_called_once_with(
-        mock_create_contacts.return_value,
-        command_dict["output_file"]
-    )
+    mock_to_rows.assert_called_once_with(mock_create_contacts.return_value)
+    command_dict["writer"].assert_called_once()
+    assert command_dict["writer"].call_args.args[1] == command_dict["output_file"]
+    assert command_dict["writer"].written == mock_create_contacts.return_value
 
 def test_execute_with_empty_results(command_dict):
     # Modify mock to return empty results
-    command_dict["scraper"].extract_urls_from_targets.return_value = []
-    command_dict["parser"].get_results.return_value = []
+    command_dict["scraper"].iter_pages_from_targets.return_value = []
 
     execute(command_dict)
 
     # Verify the flow still completes
-    command_dict["parser"].get_results.assert_called_once_with([])
+    command_dict["parser"].iter_results_from_html.assert_called_once()
     command_dict["writer"].assert_called_once()
+    assert command_dict["writer"].written == []
 
 def test_execute_validates_required_parameters():
     required_params = [
@@ -152,3 +207,108 @@ def test_execute_validates_required_parameters():
 
         with pytest.raises(AttributeError):
             execute(command)
+
+def test_execute_streams_contacts_to_writer_as_pages_arrive(command_dict):
+    events = []
+
+    def _pages(target_urls, filter_url):
+        for index in range(3):
+            events.append(f"crawled {index}")
+            yield (f"https://example.com/contact{index}", "<html></html>")
+
+    def _results(pages):
+        for url, _ in pages:
+            yield [url, "ENT", "1", "Adults", "028 0000 0000"]
+
+    def _write(rows, output_file):
+        for row in rows:
+            events.append(f"wrote {row['full_name'][-1]}")
+
+    command_dict["scraper"].iter_pages_from_targets.side_effect = _pages
+    command_dict["parser"].iter_results_from_html.side_effect = _results
+    command_dict["writer"].side_effect = _write
+
+    execute(command_dict)
+
+    assert events == ["crawled 0", "wrote 0", "crawled 1", "wrote 1", "crawled 2", "wrote 2"]
+
+def test_page_validator_checks_consultant_page_layout_without_extracting():
+    parser = Mock()
+    parser.matches_layout.side_effect = lambda html: "consultant-details" in html
+    is_valid = create_page_validator("https://example.com/consultant/", parser)
+
+    assert is_valid("https://example.com/consultant/1/", '<div class="consultant-details"><p>Dr. A</p></div>')
+    assert not is_valid("https://example.com/consultant/1/", "<p>Loading</p>")
+    parser.get_result_from_html.assert_not_called()
+
+def test_page_validator_checks_listing_pages_for_consultant_links():
+    is_valid = create_page_validator("https://example.com/consultant/", Mock())
+
+    assert is_valid("https://example.com/consultants/?page=1", '<a href="/consultant/1/">Dr. A</a>')
+    assert not is_valid("https://example.com/consultants/?page=1", '<a href="/about">About</a>')
+
+def test_create_crawl_rules_separates_listing_and_consultant_pages():
+    from scrapr.action.crawl import DETAIL, LISTING
+    from scrapr.sites.uic import PARAMS, create_crawl_rules
+
+    rules = create_crawl_rules(PARAMS["start_url"], PARAMS["filter_url"])
+
+    assert rules.classify(f"{PARAMS['start_url']}{PARAMS['query_parameter_key']}2") == LISTING
+    assert rules.classify(f"{PARAMS['filter_url']}3353330/") == DETAIL
+    assert rules.max_depth == 1
+
+def test_execute_resumes_pages_whose_contacts_were_not_written(tmp_path):
+    listing = "".join(f'<a href="/consultant/{i}/">{i}</a>' for i in range(6))
+    pages = {f"https://example.com/consultant/{i}/": f"<p>Consultant {i}</p>" for i in range(6)}
+    output_file = str(tmp_path / "contacts.csv")
+    checkpoint_file = str(tmp_path / "checkpoint.sqlite")
+    fetched = []
+
+    def _get_html_from(url):
+        fetched.append(url)
+        return pages.get(url, listing)
+
+    def _results_until_stopped(contact_pages):
+        for index, (url, html) in enumerate(contact_pages):
+            if index == 3:
+                raise KeyboardInterrupt()
+            yield [html[3:-4], "ENT", url.split("/")[-2], "Adults", "028 0000 0000"]
+
+    def _run(resume, results):
+        scraper = Scraper(
+            api_url="https://api.example.com",
+            api_key="test_key",
+            checkpoint=CrawlCheckpoint(checkpoint_file),
+            resume=resume,
+            rules=create_crawl_rules("https://example.com/consultants/", "https://example.com/consultant/"),
+        )
+        parser = Mock()
+        parser.iter_results_from_html.side_effect = results
+        execute({
+            "scraper": scraper,
+            "parser": parser,
+            "writer": CsvWriter(append=resume, batch_size=2),
+            "filter_url": "https://example.com/consultant/",
+            "start_url": "https://example.com/consultants/",
+            "query_parameter_key": "?page=",
+            "total_pages": 1,
+            "output_file": output_file,
+        })
+
+    with patch.object(Scraper, "get_html_from", side_effect=_get_html_from):
+        with pytest.raises(KeyboardInterrupt):
+            _run(resume=False, results=_results_until_stopped)
+        statuses = CrawlCheckpoint(checkpoint_file).statuses()
+        written_first = {url for url, status in statuses.items() if url in pages and status == DONE}
+
+        fetched.clear()
+        _run(resume=True, results=lambda contact_pages: (
+            [html[3:-4], "ENT", url.split("/")[-2], "Adults", "028 0000 0000"] for url, html in contact_pages
+        ))
+
+    with open(output_file, newline="", encoding="utf-8") as csv_file:
+        names = sorted(row["full_name"] for row in csv.DictReader(csv_file))
+    # The third contact was still waiting for its batch when the run stopped, so its page is fetched again.
+    assert len(written_first) == 2
+    assert set(fetched) == set(pages) - written_first
+    assert names == [f"Consultant {i}" for i in range(6)]
@@ -0,0 +1,38 @@
+import pytest
+
+from scrapr.action.urls import canonicalise_url, url_pattern
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://example.com/consultant/1/", "https://example.com/consultant/1"),
+        ("https://example.com/consultant/1#bio", "https://example.com/consultant/1"),
+        ("HTTPS://Example.COM/Consultant", "https://example.com/Consultant"),
+        ("https://example.com:443/a", "https://example.com/a"),
+        ("http://example.com:8080/a", "http://example.com:8080/a"),
+        ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+        ("https://example.com/a?page=", "https://example.com/a?page="),
+        ("https://example.com/", "https://example.com"),
+    ],
+)
+def test_canonicalise_url(url, expected):
+    assert canonicalise_url(url) == expected
+
+
+def test_canonicalise_url_is_idempotent():
+    url = canonicalise_url("https://Example.com/a/?z=1&y=2#top")
+    assert canonicalise_url(url) == url
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://example.com/consultant/3353330/", "https://example.com/consultant/*"),
+        ("https://example.com/consultants/?page_2826c=2", "https://example.com/consultants?page_2826c"),
+        ("https://example.com/about", "https://example.com/about"),
+        ("https://example.com/a?b=1&a=2&b=3", "https://example.com/a?a&b"),
+    ],
+)
+def test_url_pattern(url, expected):
+    assert url_pattern(url) == expected
@@ -0,0 +1,81 @@
+import gzip
+
+import pytest
+
+from scrapr.action.warc import WarcFormatException, WarcWriter, iter_warc_pages, iter_warc_records
+
+
+def test_pages_round_trip_through_compressed_archive(tmp_path):
+    path = tmp_path / "crawl.warc.gz"
+    with WarcWriter(str(path)) as archive:
+        archive.write_page("https://example.com/a", "<p>café</p>", tier="direct")
+        archive.write_page("https://example.com/b", "<p>b</p>")
+
+    assert path.read_bytes()[:2] == b"\x1f\x8b"
+    assert list(iter_warc_pages(str(path))) == [
+        ("https://example.com/a", "<p>café</p>"),
+        ("https://example.com/b", "<p>b</p>"),
+    ]
+
+
+def test_records_carry_type_digest_and_scrapr_fields(tmp_path):
+    path = tmp_path / "crawl.warc.gz"
+    with WarcWriter(str(path)) as archive:
+        archive.write_page("https://example.com/a", "<p>a</p>", tier="api_render")
+
+    (info, _), (headers, block) = iter_warc_records(str(path))
+
+    assert info["WARC-Type"] == "warcinfo"
+    assert headers["WARC-Type"] == "resource"
+    assert headers["WARC-Scrapr-Tier"] == "api_render"
+    assert headers["WARC-Block-Digest"].startswith("sha1:")
+    assert block == b"<p>a</p>"
+
+
+def test_reopening_an_archive_appends_without_a_second_warcinfo(tmp_path):
+    path = tmp_path / "crawl.warc.gz"
+    for url in ("https://example.com/a", "https://example.com/b"):
+        with WarcWriter(str(path)) as archive:
+            archive.write_page(url, "<p></p>")
+
+    types = [headers["WARC-Type"] for headers, _ in iter_warc_records(str(path))]
+
+    assert types == ["warcinfo", "resource", "resource"]
+
+
+def test_uncompressed_archives_are_readable(tmp_path):
+    compressed = tmp_path / "crawl.warc.gz"
+    with WarcWriter(str(compressed)) as archive:
+        archive.write_page("https://example.com/a", "<p>a</p>")
+    plain = tmp_path / "crawl.warc"
+    plain.write_bytes(gzip.decompress(compressed.read_bytes()))
+
+    assert list(iter_warc_pages(str(plain))) == [("https://example.com/a", "<p>a</p>")]
+
+
+def test_truncated_last_record_is_skipped(tmp_path, caplog):
+    path = tmp_path / "crawl.warc.gz"
+    with WarcWriter(str(path)) as archive:
+        archive.write_page("https://example.com/a", "<p>a</p>")
+        archive.write_page("https://example.com/b", "<p>b</p>" * 100)
+    # A run killed while writing leaves the last gzip member cut short.
+    path.write_bytes(path.read_bytes()[:-20])
+
+    assert list(iter_warc_pages(str(path))) == [("https://example.com/a", "<p>a</p>")]
+    assert "Ignoring the truncated last record" in caplog.text
+
+
+def test_writing_to_a_closed_archive_fails(tmp_path):
+    archive = WarcWriter(str(tmp_path / "crawl.warc.gz"))
+    archive.close()
+
+    with pytest.raises(ValueError):
+        archive.write_page("https://example.com/a", "<p></p>")
+
+
+def test_non_warc_files_are_rejected(tmp_path):
+    path = tmp_path / "not.warc"
+    path.write_bytes(b"<html></html>\n")
+
+    with pytest.raises(WarcFormatException):
+        list(iter_warc_records(str(path)))
@@ -0,0 +1,117 @@
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from scrapr.action.jobqueue import DONE, FAILED, QUEUED, JobQueue, JobSpec
+from scrapr.action.metrics import REGISTRY
+from scrapr.action.schedule import Job
+from scrapr.jobs import parse_args as parse_job_args
+from scrapr.worker import _parse_args, create_executor, main, run_worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"))
+
+
+def test_run_worker_runs_jobs_back_to_back_and_records_outcomes(queue):
+    good = queue.enqueue(JobSpec("uic", pages=1))
+    bad = queue.enqueue(JobSpec("uic", pages=2))
+
+    def _execute(spec):
+        if spec.pages == 2:
+            raise RuntimeError("down")
+        return {"rows_written": 5}
+
+    assert run_worker(queue, _execute, once=True) == 2
+    assert queue.get(good).status == DONE
+    assert queue.get(good).result == {"rows_written": 5}
+    assert queue.get(bad).status == FAILED
+    assert queue.get(bad).error == "RuntimeError: down"
+
+
+def test_run_worker_releases_job_when_interrupted(queue):
+    job_id = queue.enqueue(JobSpec("uic"))
+
+    def _execute(_):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_worker(queue, _execute, once=True)
+    assert queue.get(job_id).status == QUEUED
+
+
+def test_run_worker_waits_for_jobs_until_stopped(queue):
+    stop = threading.Event()
+    ran = []
+
+    def _execute(spec):
+        ran.append(spec.site)
+        stop.set()
+        return {}
+
+    worker = threading.Thread(target=run_worker, args=(queue, _execute), kwargs={"poll_interval": 0.01, "stop": stop})
+    worker.start()
+    queue.enqueue(JobSpec("uic"))
+    worker.join(timeout=5)
+
+    assert not worker.is_alive()
+    assert ran == ["uic"]
+
+
+def test_executor_reuses_shared_resources_and_applies_job_spec(tmp_path):
+    args = parse_job_args(["--report", str(tmp_path / "report.json"), "--credit-budget", "10"])
+    shared = {"cache": None, "parsers": {}}
+
+    def _create_job(site_name, job_args, app_config, sites, job_shared, overrides):
+        assert job_shared is shared
+        return Job(site_name, lambda: REGISTRY.inc("rows_written", 4))
+
+    REGISTRY.reset()
+    execute = create_executor(args, {}, shared)
+    with patch("scrapr.jobs.create_job", side_effect=_create_job) as mock_create_job:
+        result = execute(JobSpec("uic", start_url="https://example.com/", pages=2, output="refresh.csv"))
+        second = execute(JobSpec("uic"))
+
+    assert mock_create_job.call_args_list[0].args[5] == {
+        "start_url": "https://example.com/",
+        "total_pages": 2,
+        "output_file": "refresh.csv",
+    }
+    assert mock_create_job.call_args_list[1].args[5] == {}
+    # Each job reports only its own work.
+    assert result["rows_written"] == second["rows_written"] == 4
+    assert json.loads((tmp_path / "report.json").read_text())["rows_written"] == 4
+    assert result["output"] == "refresh.csv"
+    assert shared["accountant"].budget == 10
+
+
+def test_parse_args_passes_unknown_run_options_to_jobs():
+    args = _parse_args(["--queue", "q.sqlite", "run", "--once", "--no-cache", "--max-depth", "2"])
+
+    assert args.once
+    assert args.job_argv == ["--no-cache", "--max-depth", "2"]
+
+
+def test_parse_args_rejects_unknown_options_outside_run():
+    with pytest.raises(SystemExit):
+        _parse_args(["status", "--no-cache"])
+
+
+def test_main_enqueues_and_reports_status(tmp_path, capsys):
+    queue_path = str(tmp_path / "jobs.sqlite")
+    with patch("scrapr.worker.configure_logging"):
+        main(["--queue", queue_path, "enqueue", "uic", "--pages", "3", "--output", "refresh.csv"])
+        main(["--queue", queue_path, "status"])
+
+    output = capsys.readouterr().out.splitlines()
+    assert output[0] == "Queued job 1 for uic."
+    assert output[1].split("\t")[:3] == ["1", "uic", "queued"]
+    assert JobQueue(queue_path).get(1).spec == JobSpec("uic", None, 3, "refresh.csv")
+
+
+def test_main_rejects_unknown_site(tmp_path):
+    with patch("scrapr.worker.configure_logging"), pytest.raises(SystemExit, match="Unknown site: nowhere"):
+        main(["--queue", str(tmp_path / "jobs.sqlite"), "enqueue", "nowhere"])